@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+评估流水线基准测试
+
+使用 Mock-LLM（mock_llm.MockChatModel，不调用任何API）端到端运行 evaluate_standard_pairs，
+测量不同问答对数量和并发数下评估流水线自身的开销：
+
+- pairs_per_sec         每秒完成评估并写回的问答对数
+- latency_ms            单个问答对从发出评估请求到评估结果保存完成的延迟（p50/p95/p99）
+- llm_latency_ms        其中模型调用部分的延迟
+- db                    数据库往返次数（连接、语句、事务、ping）及每个问答对的平均往返次数
+- peak_rss_mb           峰值常驻内存
+
+每个场景在独立子进程中运行，保证峰值内存互不影响。数据库使用 configs/database_config.py 的配置
+（可通过 --database 指向专用的基准测试库），问答对写入 benchmark 标签下；
+每个场景结束后删除本次写入的 Mock-LLM 评估记录并重建汇总表，各场景面对相同的数据。
+
+用法：
+    python benchmarks/bench_evaluation.py --ensure-pairs --output benchmarks/results/evaluation.json
+    python benchmarks/bench_evaluation.py --baseline benchmarks/results/evaluation.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import (REPO_ROOT, HIGHER_IS_BETTER, LOWER_IS_BETTER, RoundTripCounter, compare_to_baseline,
+                    environment_info, latency_summary, load_report, peak_rss_mb, setup_paths, write_report)
+
+logger = logging.getLogger(__name__)
+
+MOCK_MODEL = 'Mock-LLM'
+BENCHMARK_TAG = 'benchmark'
+SEED_MODEL = 'Benchmark-Seed'
+SEED_CHUNK_SIZE = 1000
+
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_CONCURRENCY = [1, 4, 16]
+
+# 与基线对比的指标
+REGRESSION_METRICS = {
+    'pairs_per_sec': HIGHER_IS_BETTER,
+    'latency_ms.p95': LOWER_IS_BETTER,
+    'latency_ms.p99': LOWER_IS_BETTER,
+    'db.round_trips_per_pair': LOWER_IS_BETTER,
+    'peak_rss_mb': LOWER_IS_BETTER,
+}
+SCENARIO_KEYS = ['size', 'concurrency', 'pairs_per_request']
+
+_TOPICS_EN = ['machine learning', 'network security', 'database indexing', 'web development',
+              'cloud computing', 'data science', 'operating systems', 'distributed systems']
+_TOPICS_ZH = ['机器学习', '网络安全', '数据库索引', '网页开发', '云计算', '数据科学', '操作系统', '分布式系统']
+_QUESTION_TEMPLATES_EN = ['What are the benefits of {}?', 'How to implement {}?', 'Explain the process of {}.']
+_QUESTION_TEMPLATES_ZH = ['{}有哪些优势？', '如何实现{}？', '请解释{}的基本原理。']
+
+
+def _configure_environment(args):
+    """在导入 src 模块之前设置环境变量（数据库名、Mock-LLM 参数在模块导入时读取）"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(REPO_ROOT, '.env'))
+    except ImportError:
+        pass
+
+    if args.database:
+        os.environ['DB_NAME'] = args.database
+    os.environ['MOCK_LLM_ENABLED'] = 'true'
+    os.environ['MOCK_LLM_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['MOCK_LLM_LATENCY_SIGMA'] = str(args.latency_sigma)
+    os.environ['MOCK_LLM_ERROR_RATE'] = str(args.error_rate)
+    os.environ['MOCK_LLM_SEED'] = str(args.seed)
+    setup_paths()
+
+
+def _synthetic_pair(rng: random.Random, index: int):
+    """生成一个中英文交替的问答对"""
+    if index % 2:
+        topic = rng.choice(_TOPICS_ZH)
+        question = rng.choice(_QUESTION_TEMPLATES_ZH).format(topic)
+        sentences = max(1, int(rng.lognormvariate(1.5, 0.6)))
+        answer = ''.join(f"{topic}的第{i + 1}个要点是提高系统的可靠性和可维护性。" for i in range(sentences))
+    else:
+        topic = rng.choice(_TOPICS_EN)
+        question = rng.choice(_QUESTION_TEMPLATES_EN).format(topic)
+        sentences = max(1, int(rng.lognormvariate(1.5, 0.6)))
+        answer = ' '.join(f"Point {i + 1}: {topic} improves reliability and maintainability."
+                          for i in range(sentences))
+    return f"{question} (#{index})", answer
+
+
+def ensure_benchmark_pairs(count: int, seed: int = 0) -> int:
+    """
+    保证 benchmark 标签下至少有 count 个问答对，不足时补足
+
+    按外键依赖依次写入 ori_qs、ori_ans、standard_ans、standard_QS、llm_evaluation（问答对必需的
+    初始评估，记在 Benchmark-Seed 模型下）和 standard_pair。主键按当前最大值显式分配，
+    因此应在没有其他写入的专用基准测试库上运行。
+
+    Returns:
+        benchmark 标签下的问答对数量
+    """
+    from database import create_tables, execute_query, execute_transaction, rebuild_evaluation_summary
+
+    create_tables()
+
+    count_query = """
+    SELECT COUNT(*) FROM standard_pair sp
+    JOIN standard_QS sq ON sp.std_qs_id = sq.std_qs_id
+    JOIN tags t ON sq.tag_id = t.tag_id
+    WHERE t.name = %s
+    """
+    success, rows = execute_query(count_query, (BENCHMARK_TAG,), fetch=True)
+    if not success:
+        raise RuntimeError(f"统计基准测试问答对失败: {rows}")
+    existing = rows[0][0]
+    if existing >= count:
+        return existing
+
+    rng = random.Random(seed + existing)
+    logger.info(f"补充基准测试问答对: {existing} -> {count}")
+
+    def prepare(cursor):
+        cursor.execute("INSERT IGNORE INTO tags (name) VALUES (%s)", (BENCHMARK_TAG,))
+        cursor.execute("SELECT tag_id FROM tags WHERE name = %s", (BENCHMARK_TAG,))
+        tag_id = cursor.fetchone()[0]
+        cursor.execute(
+            """
+            INSERT INTO llm_type (name, params, costs_per_million_token) VALUES (%s, 1, 0)
+            ON DUPLICATE KEY UPDATE llm_type_id = LAST_INSERT_ID(llm_type_id)
+            """,
+            (SEED_MODEL,)
+        )
+        seed_type_id = cursor.lastrowid
+        cursor.execute("INSERT INTO updated_content (content, operation) VALUES (%s, 'CREATE')",
+                       ("benchmark seed",))
+        return tag_id, seed_type_id, cursor.lastrowid
+
+    success, prepared = execute_transaction(prepare)
+    if not success:
+        raise RuntimeError(f"准备基准测试数据失败: {prepared}")
+    tag_id, seed_type_id, version = prepared
+
+    def insert_chunk(cursor, start: int, size: int):
+        next_ids = {}
+        for table, column in (('ori_qs', 'ori_qs_id'), ('ori_ans', 'ori_ans_id'), ('standard_ans', 'ans_id'),
+                              ('standard_QS', 'std_qs_id'), ('llm_evaluation', 'eval_id'),
+                              ('standard_pair', 'pair_id')):
+            cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+            next_ids[table] = cursor.fetchone()[0]
+
+        rows = {table: [] for table in next_ids}
+        for offset in range(size):
+            question, answer = _synthetic_pair(rng, start + offset)
+            qs_id, ori_ans_id, ans_id, std_qs_id, eval_id, pair_id = (
+                next_ids[table] + offset for table in next_ids
+            )
+            rows['ori_qs'].append((qs_id, question))
+            rows['ori_ans'].append((ori_ans_id, answer, qs_id))
+            rows['standard_ans'].append((ans_id, answer, ori_ans_id, version, 'approved'))
+            rows['standard_QS'].append((std_qs_id, question, qs_id, tag_id, ans_id, version, 'approved'))
+            rows['llm_evaluation'].append((eval_id, answer, seed_type_id, ans_id, 75))
+            rows['standard_pair'].append((pair_id, std_qs_id, ans_id, eval_id, version))
+
+        cursor.executemany("INSERT INTO ori_qs (ori_qs_id, content) VALUES (%s, %s)", rows['ori_qs'])
+        cursor.executemany("INSERT INTO ori_ans (ori_ans_id, content, ori_qs_id) VALUES (%s, %s, %s)",
+                           rows['ori_ans'])
+        cursor.executemany(
+            """
+            INSERT INTO standard_ans (ans_id, ans_content, ori_ans_id, updated_content_version, status)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            rows['standard_ans']
+        )
+        cursor.executemany(
+            """
+            INSERT INTO standard_QS (std_qs_id, content, ori_qs_id, tag_id, std_ans_id,
+                                     updated_content_version, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            rows['standard_QS']
+        )
+        cursor.executemany(
+            "INSERT INTO llm_evaluation (eval_id, llm_answer, llm_type_id, std_ans_id, llm_score) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows['llm_evaluation']
+        )
+        cursor.executemany(
+            """
+            INSERT INTO standard_pair (pair_id, std_qs_id, std_ans_id, eval_id, updated_content_version)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            rows['standard_pair']
+        )
+        return size
+
+    for start in range(existing, count, SEED_CHUNK_SIZE):
+        size = min(SEED_CHUNK_SIZE, count - start)
+        success, result = execute_transaction(lambda cursor: insert_chunk(cursor, start, size))
+        if not success:
+            raise RuntimeError(f"写入基准测试问答对失败: {result}")
+
+    rebuild_evaluation_summary([seed_type_id])
+    return count
+
+
+def run_scenario(size: int, concurrency: int, pairs_per_request: int, keep_results: bool) -> Dict:
+    """在当前进程中运行一个场景（由子进程调用）"""
+    counter = RoundTripCounter()
+    counter.install()
+
+    import llm_evaluator
+    from database import execute_query, execute_transaction, rebuild_evaluation_summary
+
+    evaluator = llm_evaluator.evaluator
+    if MOCK_MODEL not in evaluator.models:
+        raise RuntimeError("Mock-LLM 未启用")
+    evaluator.model_configs[MOCK_MODEL.lower()]['concurrency'] = concurrency
+
+    # 记录每个问答对的评估开始时间，保存完成时计算端到端延迟
+    started = {}
+    latencies, llm_latencies = [], []
+    evaluate_pairs_batch = evaluator.evaluate_pairs_batch
+    save_evaluation_result = evaluator.save_evaluation_result
+
+    def timed_evaluate_pairs_batch(model_name, pairs, *args, **kwargs):
+        start = time.perf_counter()
+        for pair in pairs:
+            started[pair['pair_id']] = start
+        try:
+            return evaluate_pairs_batch(model_name, pairs, *args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            llm_latencies.extend([elapsed] * len(pairs))
+
+    def timed_save_evaluation_result(pair_id, *args, **kwargs):
+        saved = save_evaluation_result(pair_id, *args, **kwargs)
+        start = started.pop(pair_id, None)
+        if saved and start is not None:
+            latencies.append((time.perf_counter() - start) * 1000)
+        return saved
+
+    evaluator.evaluate_pairs_batch = timed_evaluate_pairs_batch
+    evaluator.save_evaluation_result = timed_save_evaluation_result
+
+    success, rows = execute_query("SELECT COALESCE(MAX(eval_id), 0) FROM llm_evaluation", fetch=True)
+    if not success:
+        raise RuntimeError(f"读取评估记录失败: {rows}")
+    last_eval_id = rows[0][0]
+
+    counter.reset()
+    start = time.perf_counter()
+    result = llm_evaluator.evaluate_standard_pairs(MOCK_MODEL, tag_filter=BENCHMARK_TAG, limit=size,
+                                                   pairs_per_request=pairs_per_request)
+    wall_seconds = time.perf_counter() - start
+    db = counter.snapshot()
+
+    if not result.get('success'):
+        raise RuntimeError(result.get('message', '评估失败'))
+
+    evaluated = result['success_count'] + result['fail_count']
+    db['round_trips_per_pair'] = round(db['round_trips'] / evaluated, 3) if evaluated else None
+
+    if not keep_results:
+        llm_type_id = evaluator._get_or_create_llm_type(MOCK_MODEL)
+
+        def cleanup(cursor):
+            cursor.execute("DELETE FROM llm_evaluation WHERE llm_type_id = %s AND eval_id > %s",
+                           (llm_type_id, last_eval_id))
+            rebuild_evaluation_summary([llm_type_id], cursor=cursor)
+            return True
+
+        success, message = execute_transaction(cleanup)
+        if not success:
+            logger.warning(f"清理基准测试评估记录失败: {message}")
+
+    return {
+        'size': size,
+        'concurrency': concurrency,
+        'pairs_per_request': pairs_per_request,
+        'evaluated': evaluated,
+        'success_count': result['success_count'],
+        'fail_count': result['fail_count'],
+        'wall_seconds': round(wall_seconds, 3),
+        'pairs_per_sec': round(evaluated / wall_seconds, 2) if wall_seconds else None,
+        'latency_ms': latency_summary(latencies),
+        'llm_latency_ms': latency_summary(llm_latencies),
+        'db': db,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _run_in_subprocess(args, size: int, concurrency: int) -> Dict:
+    command = [
+        sys.executable, os.path.abspath(__file__), '--run-one',
+        '--sizes', str(size), '--concurrency', str(concurrency),
+        '--pairs-per-request', str(args.pairs_per_request),
+        '--latency-ms', str(args.latency_ms), '--latency-sigma', str(args.latency_sigma),
+        '--error-rate', str(args.error_rate), '--seed', str(args.seed),
+    ]
+    if args.database:
+        command += ['--database', args.database]
+    if args.keep_results:
+        command.append('--keep-results')
+
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=REPO_ROOT)
+    # 数据库模块的错误信息会打印到标准输出，结果是最后一行JSON
+    lines = [line for line in completed.stdout.splitlines() if line.strip()]
+    if completed.returncode == 0 and lines:
+        try:
+            return json.loads(lines[-1])
+        except json.JSONDecodeError:
+            pass
+    error = (completed.stderr.strip().splitlines() or lines or ['未知错误'])[-1]
+    return {'size': size, 'concurrency': concurrency, 'pairs_per_request': args.pairs_per_request,
+            'error': error}
+
+
+def _parse_int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="评估流水线基准测试（Mock-LLM）")
+    parser.add_argument('--sizes', type=_parse_int_list, default=DEFAULT_SIZES,
+                        help="问答对数量，逗号分隔（默认 100,1000,10000）")
+    parser.add_argument('--concurrency', type=_parse_int_list, default=DEFAULT_CONCURRENCY,
+                        help="并发数，逗号分隔（默认 1,4,16）")
+    parser.add_argument('--pairs-per-request', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="Mock-LLM 延迟中位数（毫秒）")
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', help="使用的数据库名，默认为 DB_NAME 配置")
+    parser.add_argument('--ensure-pairs', action='store_true', help="运行前补足 benchmark 标签下的问答对")
+    parser.add_argument('--keep-results', action='store_true', help="保留本次写入的 Mock-LLM 评估记录")
+    parser.add_argument('--output', help="结果JSON文件路径，默认打印到标准输出")
+    parser.add_argument('--baseline', help="基线结果JSON文件，发现回退时返回非零退出码")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允许的相对变差比例（默认0.2）")
+    parser.add_argument('--run-one', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    _configure_environment(args)
+
+    if args.run_one:
+        logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+        record = run_scenario(args.sizes[0], args.concurrency[0], args.pairs_per_request, args.keep_results)
+        print(json.dumps(record, ensure_ascii=False))
+        return 0
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.ensure_pairs:
+        available = ensure_benchmark_pairs(max(args.sizes), args.seed)
+        logger.info(f"benchmark 标签下共有 {available} 个问答对")
+
+    scenarios = []
+    for size in args.sizes:
+        for concurrency in args.concurrency:
+            logger.info(f"运行场景 - 问答对: {size}, 并发: {concurrency}")
+            record = _run_in_subprocess(args, size, concurrency)
+            if 'error' in record:
+                logger.error(f"场景失败: {record['error']}")
+            else:
+                logger.info(f"{record['pairs_per_sec']} pairs/s, p95 {record['latency_ms']['p95']} ms, "
+                            f"{record['db']['round_trips_per_pair']} 次往返/对, {record['peak_rss_mb']} MB")
+                if record['evaluated'] < size:
+                    logger.warning(f"benchmark 标签下只有 {record['evaluated']} 个问答对，"
+                                   f"可使用 --ensure-pairs 补足")
+            scenarios.append(record)
+
+    report = {
+        'benchmark': 'evaluation_pipeline',
+        'environment': environment_info(),
+        'config': {
+            'model': MOCK_MODEL,
+            'latency_ms': args.latency_ms,
+            'latency_sigma': args.latency_sigma,
+            'error_rate': args.error_rate,
+            'seed': args.seed,
+            'pairs_per_request': args.pairs_per_request,
+        },
+        'scenarios': scenarios,
+    }
+
+    exit_code = 1 if any('error' in record for record in scenarios) else 0
+    if args.baseline:
+        baseline = load_report(args.baseline)
+        regressions = compare_to_baseline(scenarios, baseline.get('scenarios', []), SCENARIO_KEYS,
+                                          REGRESSION_METRICS, args.tolerance)
+        report['baseline'] = {'path': args.baseline, 'tolerance': args.tolerance, 'regressions': regressions}
+        for regression in regressions:
+            logger.error(f"性能回退 {regression['scenario']} {regression['metric']}: "
+                         f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})")
+        if regressions:
+            exit_code = 1
+
+    write_report(report, args.output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
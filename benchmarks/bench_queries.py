@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+分析查询基准测试
+
+依次运行 database.py 中的各个查询函数，分页查询分别测量第一页、中间页和最后一页
+（OFFSET 越大越慢），记录延迟分布以及每条SQL的 EXPLAIN FORMAT=JSON 执行计划，
+并可与基线结果对比，发现延迟变差或执行计划退化为全表扫描时返回非零退出码。
+
+不同数据规模使用不同的数据库（可用 generate_dataset.py 生成），通过 --databases 依次测量。
+
+用法：
+    python benchmarks/bench_queries.py --databases bench_10k,bench_1m --output benchmarks/results/queries.json
+    python benchmarks/bench_queries.py --databases bench_10k,bench_1m --baseline benchmarks/results/queries.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import (REPO_ROOT, LOWER_IS_BETTER, compare_to_baseline, environment_info, latency_summary,
+                    load_report, setup_paths, write_report)
+
+logger = logging.getLogger(__name__)
+
+SCENARIO_KEYS = ['dataset', 'function', 'page_position']
+REGRESSION_METRICS = {
+    'latency_ms.p50': LOWER_IS_BETTER,
+    'latency_ms.p95': LOWER_IS_BETTER,
+    'explain.query_cost': LOWER_IS_BETTER,
+}
+# 记录数据规模的表
+SCALE_TABLES = ('ori_qs', 'ori_ans', 'standard_QS', 'standard_ans', 'llm_evaluation', 'standard_pair',
+                'updated_content')
+
+
+def build_cases(database, args) -> List[Tuple[str, Callable, bool]]:
+    """
+    查询用例：(函数名, 调用函数 fn(page, page_size), 是否分页)
+
+    参数化查询使用的标签取问题最多的标签
+    """
+    success, rows = database.execute_query(
+        """
+        SELECT t.name FROM tags t JOIN standard_QS sq ON sq.tag_id = t.tag_id
+        GROUP BY t.tag_id, t.name ORDER BY COUNT(*) DESC LIMIT 1
+        """,
+        fetch=True
+    )
+    tag_name = rows[0][0] if success and rows else ''
+
+    paginated = [
+        'get_all_questions_with_answers', 'get_questions_with_tags', 'get_llm_evaluation_results',
+        'get_top_scored_answers', 'get_question_answer_pairs', 'get_model_performance_comparison',
+        'get_recent_updates', 'get_tag_distribution', 'get_model_cost_analysis', 'get_evaluation_trends',
+        'get_answer_length_analysis', 'get_question_complexity_analysis', 'get_orphan_records',
+    ]
+    cases = [(name, getattr(database, name), True) for name in paginated]
+    cases += [
+        ('get_questions_by_tag',
+         lambda page, page_size: database.get_questions_by_tag(tag_name, page, page_size), True),
+        ('get_answers_by_score_range',
+         lambda page, page_size: database.get_answers_by_score_range(args.min_score, args.max_score,
+                                                                       page, page_size), True),
+        ('search_content',
+         lambda page, page_size: database.search_content(args.search_term, page, page_size), True),
+        ('get_database_statistics', lambda page, page_size: database.get_database_statistics(), False),
+        ('get_evaluation_score_distribution',
+         lambda page, page_size: database.get_evaluation_score_distribution(), False),
+    ]
+    if args.functions:
+        cases = [case for case in cases if case[0] in args.functions]
+    return cases
+
+
+class StatementRecorder:
+    """替换 database.execute_query，记录查询函数发出的每条SQL及其耗时"""
+
+    def __init__(self, database):
+        self.database = database
+        self.original = database.execute_query
+        self.statements: List[Tuple[str, Optional[tuple], float]] = []
+
+    def __enter__(self):
+        def recording_execute_query(query, params=None, fetch=False, many=False):
+            start = time.perf_counter()
+            try:
+                return self.original(query, params, fetch, many)
+            finally:
+                self.statements.append((query, tuple(params) if params else None,
+                                        (time.perf_counter() - start) * 1000))
+
+        self.database.execute_query = recording_execute_query
+        return self
+
+    def __exit__(self, *exc):
+        self.database.execute_query = self.original
+        return False
+
+
+def _walk_tables(node, tables: List[Dict]):
+    """收集 EXPLAIN JSON 中所有访问的表"""
+    if isinstance(node, dict):
+        if 'table_name' in node and 'access_type' in node:
+            tables.append({
+                'table': node['table_name'],
+                'access_type': node['access_type'],
+                'key': node.get('key'),
+                'rows_examined_per_scan': node.get('rows_examined_per_scan'),
+            })
+        for value in node.values():
+            _walk_tables(value, tables)
+    elif isinstance(node, list):
+        for value in node:
+            _walk_tables(value, tables)
+
+
+def explain_statement(database, query: str, params: Optional[tuple]) -> Dict:
+    """获取一条SELECT语句的 EXPLAIN FORMAT=JSON，并提取成本和访问方式摘要"""
+    success, rows = database.execute_query(f"EXPLAIN FORMAT=JSON {query}", params, True)
+    if not success or not rows:
+        return {'error': rows if not success else 'EXPLAIN 无结果'}
+
+    plan = json.loads(rows[0][0])
+    tables = []
+    _walk_tables(plan, tables)
+    cost = plan.get('query_block', {}).get('cost_info', {}).get('query_cost')
+    return {
+        'query_cost': float(cost) if cost is not None else None,
+        'tables': tables,
+        'full_scans': sorted({table['table'] for table in tables if table['access_type'] == 'ALL'}),
+        'plan': plan,
+    }
+
+
+def _page_numbers(case_fn: Callable, paginated: bool, page_size: int) -> Dict[str, int]:
+    if not paginated:
+        return {'first': 1}
+    result = case_fn(1, page_size)
+    total_pages = result[4] if len(result) > 4 else 0
+    if not result[0] or total_pages <= 1:
+        return {'first': 1}
+    return {'first': 1, 'middle': max(1, (total_pages + 1) // 2), 'last': total_pages}
+
+
+def run_case(database, name: str, case_fn: Callable, paginated: bool, args) -> List[Dict]:
+    records = []
+    for position, page in _page_numbers(case_fn, paginated, args.page_size).items():
+        for _ in range(args.warmup):
+            case_fn(page, args.page_size)
+
+        latencies = []
+        statement_latencies: Dict[int, List[float]] = {}
+        statements = []
+        for _ in range(args.repeat):
+            with StatementRecorder(database) as recorder:
+                start = time.perf_counter()
+                case_fn(page, args.page_size)
+                latencies.append((time.perf_counter() - start) * 1000)
+            statements = recorder.statements
+            for index, (_, _, elapsed) in enumerate(statements):
+                statement_latencies.setdefault(index, []).append(elapsed)
+
+        explains = []
+        for index, (query, params, _) in enumerate(statements):
+            explain = explain_statement(database, query, params) if not args.no_explain else {}
+            if not args.keep_plans:
+                explain.pop('plan', None)
+            explains.append({
+                'sql': ' '.join(query.split()),
+                'latency_ms': latency_summary(statement_latencies.get(index, [])),
+                **explain,
+            })
+
+        costs = [explain['query_cost'] for explain in explains if explain.get('query_cost') is not None]
+        records.append({
+            'function': name,
+            'page_position': position,
+            'page': page,
+            'latency_ms': latency_summary(latencies),
+            'explain': {
+                'query_cost': round(sum(costs), 2) if costs else None,
+                'full_scans': sorted({table for explain in explains for table in explain.get('full_scans', [])}),
+            },
+            'statements': explains,
+        })
+        logger.info(f"{name} [{position} 第{page}页] p50 {records[-1]['latency_ms']['p50']} ms")
+    return records
+
+
+def dataset_scale(database) -> Dict[str, int]:
+    scale = {}
+    for table in SCALE_TABLES:
+        success, rows = database.execute_query(f"SELECT COUNT(*) FROM `{table}`", fetch=True)
+        scale[table] = rows[0][0] if success and rows else None
+    return scale
+
+
+def find_plan_regressions(current: List[Dict], baseline: List[Dict]) -> List[Dict]:
+    """执行计划中新出现的全表扫描"""
+    baseline_by_key = {tuple(record.get(field) for field in SCENARIO_KEYS): record for record in baseline}
+    regressions = []
+    for record in current:
+        key = tuple(record.get(field) for field in SCENARIO_KEYS)
+        base = baseline_by_key.get(key)
+        if base is None:
+            continue
+        new_scans = sorted(set(record['explain']['full_scans']) - set(base.get('explain', {}).get('full_scans', [])))
+        if new_scans:
+            regressions.append({
+                'scenario': dict(zip(SCENARIO_KEYS, key)),
+                'metric': 'explain.full_scans',
+                'baseline': base['explain']['full_scans'],
+                'current': record['explain']['full_scans'],
+                'change': f"新增全表扫描: {', '.join(new_scans)}",
+            })
+    return regressions
+
+
+def _parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="database.py 分析查询基准测试")
+    parser.add_argument('--databases', type=_parse_list, help="依次测量的数据库，逗号分隔，默认为 DB_NAME 配置")
+    parser.add_argument('--functions', type=_parse_list, help="只测量指定的查询函数，逗号分隔")
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5, help="每页测量次数（默认5）")
+    parser.add_argument('--warmup', type=int, default=1, help="每页预热次数（默认1）")
+    parser.add_argument('--search-term', default='caching')
+    parser.add_argument('--min-score', type=float, default=60)
+    parser.add_argument('--max-score', type=float, default=80)
+    parser.add_argument('--no-explain', action='store_true', help="不采集执行计划")
+    parser.add_argument('--keep-plans', action='store_true', help="在结果中保留完整的 EXPLAIN JSON")
+    parser.add_argument('--output', help="结果JSON文件路径，默认打印到标准输出")
+    parser.add_argument('--baseline', help="基线结果JSON文件，发现回退时返回非零退出码")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允许的相对变差比例（默认0.2）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(REPO_ROOT, '.env'))
+    except ImportError:
+        pass
+    setup_paths()
+    import database
+
+    datasets = []
+    scenarios = []
+    for name in args.databases or [database.DB_CONFIG['database']]:
+        # get_connection 每次调用都读取 DB_CONFIG，切换数据库无需重新导入
+        database.DB_CONFIG['database'] = name
+        scale = dataset_scale(database)
+        if any(count is None for count in scale.values()):
+            logger.error(f"数据库 {name} 不可用或缺少数据表，跳过")
+            datasets.append({'dataset': name, 'error': '数据库不可用或缺少数据表'})
+            continue
+        datasets.append({'dataset': name, 'scale': scale})
+        logger.info(f"数据库 {name}: {scale}")
+
+        for function_name, case_fn, paginated in build_cases(database, args):
+            for record in run_case(database, function_name, case_fn, paginated, args):
+                scenarios.append({'dataset': name, **record})
+
+    report = {
+        'benchmark': 'analytics_queries',
+        'environment': environment_info(),
+        'config': {'page_size': args.page_size, 'repeat': args.repeat, 'warmup': args.warmup},
+        'datasets': datasets,
+        'scenarios': scenarios,
+    }
+
+    exit_code = 1 if any('error' in dataset for dataset in datasets) else 0
+    if args.baseline:
+        baseline = load_report(args.baseline).get('scenarios', [])
+        regressions = compare_to_baseline(scenarios, baseline, SCENARIO_KEYS, REGRESSION_METRICS, args.tolerance)
+        regressions += find_plan_regressions(scenarios, baseline)
+        report['baseline'] = {'path': args.baseline, 'tolerance': args.tolerance, 'regressions': regressions}
+        for regression in regressions:
+            logger.error(f"性能回退 {regression['scenario']} {regression['metric']}: "
+                         f"{regression['baseline']} -> {regression['current']} ({regression['change']})")
+        if regressions:
+            exit_code = 1
+
+    write_report(report, args.output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
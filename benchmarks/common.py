@@ -0,0 +1,235 @@
+"""
+基准测试公共工具
+src 路径设置、数据库往返计数、延迟分位数、峰值内存，以及与基线结果对比检测性能回退。
+"""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(REPO_ROOT, 'src')
+CONFIGS_DIR = os.path.join(REPO_ROOT, 'configs')
+
+# 基线对比时各指标的方向：1 表示越大越好，-1 表示越小越好
+HIGHER_IS_BETTER = 1
+LOWER_IS_BETTER = -1
+
+
+def setup_paths():
+    """将 src 和 configs 加入导入路径（与 app.py 的运行方式一致）"""
+    for path in (SRC_DIR, CONFIGS_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def latency_summary(samples_ms: List[float]) -> Dict:
+    """计算延迟样本（毫秒）的分位数"""
+    if not samples_ms:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    values = np.asarray(samples_ms, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）；Linux 上 ru_maxrss 单位为KB，macOS 上为字节"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def environment_info() -> Dict:
+    """记录运行环境，便于比较不同机器或不同提交的结果"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+class RoundTripCounter:
+    """
+    统计数据库往返次数
+
+    install() 替换 mysql.connector.connect，返回的连接和游标被包装后计数：
+    新建连接、execute/executemany、start_transaction/commit/rollback 以及
+    is_connected()（会向服务端发送 ping）各算一次往返。
+    executemany 对 INSERT 会合并为一条多行语句，因此也只算一次。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {'connections': 0, 'statements': 0, 'transactions': 0, 'pings': 0}
+        self._original_connect = None
+
+    def _incr(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def reset(self):
+        with self._lock:
+            for key in self.counts:
+                self.counts[key] = 0
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.counts.values())
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {**self.counts, 'round_trips': sum(self.counts.values())}
+
+    def install(self):
+        import mysql.connector
+
+        if self._original_connect is not None:
+            return
+        self._original_connect = mysql.connector.connect
+        counter = self
+
+        def connect(*args, **kwargs):
+            conn = counter._original_connect(*args, **kwargs)
+            counter._incr('connections')
+            return _CountingConnection(conn, counter)
+
+        mysql.connector.connect = connect
+
+    def uninstall(self):
+        import mysql.connector
+
+        if self._original_connect is not None:
+            mysql.connector.connect = self._original_connect
+            self._original_connect = None
+
+
+class _CountingCursor:
+    def __init__(self, cursor, counter: RoundTripCounter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._counter._incr('statements')
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._counter._incr('statements')
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _CountingConnection:
+    def __init__(self, conn, counter: RoundTripCounter):
+        self._conn = conn
+        self._counter = counter
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs), self._counter)
+
+    def start_transaction(self, *args, **kwargs):
+        self._counter._incr('transactions')
+        return self._conn.start_transaction(*args, **kwargs)
+
+    def commit(self):
+        self._counter._incr('transactions')
+        return self._conn.commit()
+
+    def rollback(self):
+        self._counter._incr('transactions')
+        return self._conn.rollback()
+
+    def is_connected(self):
+        self._counter._incr('pings')
+        return self._conn.is_connected()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def write_report(report: Dict, output: Optional[str]):
+    """输出JSON结果：指定路径时写入文件，否则打印到标准输出"""
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+def load_report(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _lookup(record: Dict, metric: str):
+    """按点分路径读取指标，如 'latency_ms.p95'"""
+    value = record
+    for part in metric.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def compare_to_baseline(current: List[Dict], baseline: List[Dict], key_fields: List[str],
+                        metrics: Dict[str, int], tolerance: float) -> List[Dict]:
+    """
+    将本次各场景结果与基线中相同场景（key_fields 相同）对比
+
+    Args:
+        metrics: 指标路径 -> HIGHER_IS_BETTER / LOWER_IS_BETTER
+        tolerance: 允许的相对变差比例，如 0.2 表示变差超过20%视为回退
+
+    Returns:
+        回退列表，每项包含场景、指标、基线值、当前值和相对变化
+    """
+    baseline_by_key = {tuple(record.get(field) for field in key_fields): record for record in baseline}
+    regressions = []
+    for record in current:
+        key = tuple(record.get(field) for field in key_fields)
+        base = baseline_by_key.get(key)
+        if base is None:
+            continue
+        for metric, direction in metrics.items():
+            old, new = _lookup(base, metric), _lookup(record, metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old == 0:
+                continue
+            change = (new - old) / abs(old)
+            if change * direction < -tolerance:
+                regressions.append({
+                    'scenario': dict(zip(key_fields, key)),
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': round(change, 4),
+                })
+    return regressions
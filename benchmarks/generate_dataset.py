@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+大规模合成数据生成器
+
+按 create_tables 中的表结构生成引用一致的数据（ori_qs、ori_ans、tags、User、updated_content、
+standard_QS、standard_ans、llm_type、llm_evaluation、standard_pair），用于在生产规模下测试
+database.py 中的查询和评估流水线。
+
+- 规模：--rows 指定各表总行数的目标（如 10k、1m、10m），按各表的派生比例换算为原始问题数
+- 文本：中英文混合（--zh-ratio），问题和答案长度服从对数正态分布，带长尾
+- 可复现：相同的 --seed 生成相同的数据；主键从各表当前最大值之后显式分配，可在已有数据上追加
+- 写入：每批数据写成临时 TSV 文件后用 LOAD DATA LOCAL INFILE 导入（需服务端开启 local_infile），
+  不可用时回退为多行 INSERT；导入期间在会话内关闭外键和唯一性检查
+
+用法：
+    python benchmarks/generate_dataset.py --rows 1m --database db_design_pj_bench
+    python benchmarks/generate_dataset.py --rows 100k --dry-run
+"""
+
+import argparse
+import hashlib
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import REPO_ROOT, setup_paths
+
+logger = logging.getLogger(__name__)
+
+# 每批处理的原始问题数
+DEFAULT_CHUNK_QUESTIONS = 10000
+# 回退为 INSERT 时每条语句的行数
+INSERT_BATCH_SIZE = 1000
+
+# 每个原始问题的答案数：1 + 几何分布，上限 MAX_ANSWERS_PER_QUESTION
+EXTRA_ANSWER_PROBABILITY = 0.4
+MAX_ANSWERS_PER_QUESTION = 5
+# 问题被标准化（生成标准问题、标准答案、更新记录和问答对）的比例
+DEFAULT_STANDARDIZE_RATIO = 0.6
+# 每个标准答案被各模型评估的概率（至少评估一次，问答对需要引用评估记录）
+DEFAULT_EVALUATION_RATIO = 0.5
+# 每多少个原始问题对应一个用户
+QUESTIONS_PER_USER = 1000
+# 生成数据的时间范围（固定结束时间，保证相同种子生成相同数据）
+TIME_SPAN_DAYS = 365
+END_TIME = datetime(2026, 1, 1)
+
+# 与 auth.hash_password 相同的 sha256，所有生成的用户密码均为 password123
+PASSWORD_HASH = hashlib.sha256(b'password123').hexdigest()
+
+MODELS = [
+    # (名称, 参数量, 每百万token单价)
+    ('GPT-4', 1000000000000, 30.0),
+    ('GPT-3.5-Turbo', 175000000000, 0.5),
+    ('Claude-3-Opus', 500000000000, 15.0),
+    ('Claude-3-Sonnet', 200000000000, 3.0),
+    ('Llama-3-8B-Local', 8000000000, 0.0),
+]
+
+TOPICS_EN = ['machine learning', 'network security', 'database indexing', 'web development', 'cloud computing',
+             'data science', 'operating systems', 'distributed systems', 'compilers', 'computer graphics',
+             'quantum computing', 'blockchain', 'bioinformatics', 'robotics', 'renewable energy',
+             'supply chain', 'digital marketing', 'linear algebra', 'probability theory', 'microservices']
+TOPICS_ZH = ['机器学习', '网络安全', '数据库索引', '网页开发', '云计算', '数据科学', '操作系统', '分布式系统',
+             '编译原理', '计算机图形学', '量子计算', '区块链', '生物信息学', '机器人', '可再生能源',
+             '供应链管理', '数字营销', '线性代数', '概率论', '微服务']
+
+_QUESTION_TEMPLATES_EN = [
+    'What are the benefits of {}?', 'How to implement {} in practice?', 'Explain the process of {}.',
+    'What is the history of {}?', 'Define {} in simple terms.', 'What are common pitfalls when using {}?',
+    'Compare {} with its main alternatives.', 'Why does {} matter for large organizations?',
+]
+_QUESTION_TEMPLATES_ZH = [
+    '{}有哪些优势？', '如何在实际项目中实现{}？', '请解释{}的基本原理。', '{}的发展历史是怎样的？',
+    '用通俗的语言解释什么是{}。', '使用{}时常见的问题有哪些？', '{}与其他方案相比有什么区别？',
+    '为什么{}对大型组织很重要？',
+]
+_SENTENCES_EN = [
+    'It reduces operational cost by automating repetitive work.',
+    'The core idea is to split a large problem into smaller, independent parts.',
+    'Careful measurement is required before and after every change.',
+    'Most production systems combine it with caching and monitoring.',
+    'A common mistake is to optimize before understanding the workload.',
+    'Teams usually start with a small prototype and iterate quickly.',
+    'Security and privacy requirements shape many of the design decisions.',
+    'The approach scales horizontally when the data is partitioned well.',
+    'Documentation and clear interfaces make long-term maintenance easier.',
+    'Trade-offs between latency, throughput and cost must be made explicit.',
+    'Open-source tooling has lowered the barrier to entry considerably.',
+    'Regulatory constraints differ between regions and industries.',
+]
+_SENTENCES_ZH = [
+    '它可以通过自动化重复性工作降低运营成本。', '核心思想是把一个大问题拆分成多个相互独立的小问题。',
+    '每次改动前后都需要进行仔细的测量。', '大多数生产系统会将其与缓存和监控结合使用。',
+    '常见的错误是在理解负载之前就开始优化。', '团队通常先构建一个小原型，然后快速迭代。',
+    '安全和隐私要求决定了许多设计选择。', '数据划分合理时，这种方法可以水平扩展。',
+    '清晰的文档和接口让长期维护更加容易。', '必须明确权衡延迟、吞吐量和成本。',
+    '开源工具大大降低了入门门槛。', '不同地区和行业的监管要求各不相同。',
+]
+
+_STATUS_WEIGHTS = (('approved', 0.55), ('review', 0.2), ('draft', 0.2), ('archived', 0.05))
+_ROLE_WEIGHTS = (('user', 0.6), ('evaluator', 0.3), ('guest', 0.08), ('admin', 0.02))
+_OPERATION_WEIGHTS = (('CREATE', 0.4), ('EDIT', 0.3), ('REVIEW', 0.15), ('APPROVE', 0.1), ('MERGE', 0.05))
+
+# 各表的列（与 create_tables 一致，省略有默认值且无需生成的列）
+TABLE_COLUMNS = {
+    'User': ('user_id', 'username', 'password_hash', 'name', 'role', 'is_active', 'created_at', 'last_login'),
+    'ori_qs': ('ori_qs_id', 'content', 'created_at', 'updated_at'),
+    'ori_ans': ('ori_ans_id', 'content', 'ori_qs_id', 'created_at', 'updated_at'),
+    'updated_content': ('updated_content_version', 'content', 'operation', 'created_by', 'created_at'),
+    'standard_ans': ('ans_id', 'ans_content', 'ori_ans_id', 'eval_id', 'std_qs_id', 'updated_content_version',
+                     'created_by', 'approved_by', 'status', 'quality_score', 'created_at', 'updated_at'),
+    'standard_QS': ('std_qs_id', 'content', 'ori_qs_id', 'tag_id', 'std_ans_id', 'updated_content_version',
+                    'created_by', 'approved_by', 'status', 'created_at', 'updated_at'),
+    'llm_evaluation': ('eval_id', 'llm_answer', 'llm_type_id', 'std_ans_id', 'llm_score', 'evaluated_by',
+                       'evaluation_date', 'accuracy_score', 'completeness_score', 'clarity_score',
+                       'professionalism_score', 'relevance_score', 'prompt_tokens', 'completion_tokens',
+                       'cost_usd'),
+    'standard_pair': ('pair_id', 'std_qs_id', 'std_ans_id', 'eval_id', 'updated_content_version', 'created_by',
+                      'confidence_score', 'is_verified', 'created_at', 'verified_at'),
+}
+PRIMARY_KEYS = {table: columns[0] for table, columns in TABLE_COLUMNS.items()}
+
+
+def parse_scale(value: str) -> int:
+    """解析 10k / 2.5m 形式的行数"""
+    value = value.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    return int(float(number) * multiplier)
+
+
+def expected_rows_per_question(standardize_ratio: float, evaluation_ratio: float) -> float:
+    """每个原始问题平均派生的总行数，用于把目标行数换算为问题数"""
+    answers = sum(EXTRA_ANSWER_PROBABILITY ** k for k in range(MAX_ANSWERS_PER_QUESTION))
+    n = len(MODELS)
+    evaluations = n * evaluation_ratio + (1 - evaluation_ratio) ** n
+    # ori_qs + ori_ans + (standard_QS, standard_ans, updated_content, standard_pair, llm_evaluation)
+    return 1 + answers + standardize_ratio * (4 + evaluations) + 1 / QUESTIONS_PER_USER
+
+
+def _weighted_choice(rng: random.Random, weights: Sequence[Tuple[str, float]]) -> str:
+    roll = rng.random()
+    for value, weight in weights:
+        roll -= weight
+        if roll < 0:
+            return value
+    return weights[-1][0]
+
+
+class TextGenerator:
+    """按对数正态分布的长度生成中英文问答文本"""
+
+    def __init__(self, rng: random.Random, zh_ratio: float):
+        self.rng = rng
+        self.zh_ratio = zh_ratio
+
+    def language(self) -> str:
+        return 'zh' if self.rng.random() < self.zh_ratio else 'en'
+
+    def question(self, language: str) -> str:
+        rng = self.rng
+        if language == 'zh':
+            text = rng.choice(_QUESTION_TEMPLATES_ZH).format(rng.choice(TOPICS_ZH))
+        else:
+            text = rng.choice(_QUESTION_TEMPLATES_EN).format(rng.choice(TOPICS_EN))
+        # 约三成问题带有补充说明
+        if rng.random() < 0.3:
+            separator = '' if language == 'zh' else ' '
+            text += separator + separator.join(self._sentences(language, 1.0, 0.5, 4))
+        return text
+
+    def answer(self, language: str) -> str:
+        # 中位数约6句，长尾可达上百句
+        return (''.join if language == 'zh' else ' '.join)(self._sentences(language, math.log(6), 0.8, 150))
+
+    def _sentences(self, language: str, mu: float, sigma: float, cap: int) -> List[str]:
+        count = min(cap, max(1, int(self.rng.lognormvariate(mu, sigma))))
+        return self.rng.choices(_SENTENCES_ZH if language == 'zh' else _SENTENCES_EN, k=count)
+
+
+def _escape_tsv(value) -> str:
+    """LOAD DATA 默认格式：反斜杠转义，\\N 表示 NULL"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    text = str(value)
+    if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+        text = (text.replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+    return text
+
+
+class BulkLoader:
+    """把一批行写入指定表：优先 LOAD DATA LOCAL INFILE，不可用时回退为多行 INSERT"""
+
+    def __init__(self, conn, use_load_data: bool = True):
+        self.conn = conn
+        self.cursor = conn.cursor() if conn is not None else None
+        self.use_load_data = use_load_data and conn is not None
+        self.counts = {table: 0 for table in TABLE_COLUMNS}
+
+    def load(self, table: str, rows: List[Tuple]):
+        if not rows:
+            return
+        self.counts[table] += len(rows)
+        if self.conn is None:
+            return
+
+        columns = TABLE_COLUMNS[table]
+        column_list = ', '.join(f'`{column}`' for column in columns)
+        if self.use_load_data:
+            try:
+                self._load_data(table, column_list, rows)
+                return
+            except Exception as e:
+                logger.warning(f"LOAD DATA LOCAL INFILE 不可用，回退为批量 INSERT: {e}")
+                self.use_load_data = False
+
+        query = f"INSERT INTO `{table}` ({column_list}) VALUES ({', '.join(['%s'] * len(columns))})"
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            self.cursor.executemany(query, rows[start:start + INSERT_BATCH_SIZE])
+
+    def _load_data(self, table: str, column_list: str, rows: List[Tuple]):
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tsv', delete=False) as f:
+            path = f.name
+            for row in rows:
+                f.write('\t'.join(_escape_tsv(value) for value in row))
+                f.write('\n')
+        try:
+            self.cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({column_list})",
+                (path,)
+            )
+        finally:
+            os.remove(path)
+
+    def commit(self):
+        if self.conn is not None:
+            self.conn.commit()
+
+
+class DatasetGenerator:
+    """按批生成所有表的数据，主键在各表当前最大值之后连续分配"""
+
+    def __init__(self, loader: BulkLoader, questions: int, seed: int = 0, zh_ratio: float = 0.5,
+                 standardize_ratio: float = DEFAULT_STANDARDIZE_RATIO,
+                 evaluation_ratio: float = DEFAULT_EVALUATION_RATIO,
+                 chunk_questions: int = DEFAULT_CHUNK_QUESTIONS):
+        self.loader = loader
+        self.questions = questions
+        self.seed = seed
+        self.standardize_ratio = standardize_ratio
+        self.evaluation_ratio = evaluation_ratio
+        self.chunk_questions = chunk_questions
+        self.rng = random.Random(seed)
+        self.text = TextGenerator(self.rng, zh_ratio)
+        self.end_time = END_TIME
+        self.next_ids = {table: 1 for table in TABLE_COLUMNS}
+        self.tag_ids: List[int] = []
+        self.model_ids: List[Tuple[int, float]] = []
+        self.user_ids: List[int] = []
+
+    def _new_id(self, table: str) -> int:
+        value = self.next_ids[table]
+        self.next_ids[table] = value + 1
+        return value
+
+    def _timestamp(self, after: Optional[datetime] = None) -> datetime:
+        start = after or self.end_time - timedelta(days=TIME_SPAN_DAYS)
+        span = max(1, int((self.end_time - start).total_seconds()))
+        return start + timedelta(seconds=self.rng.randrange(span))
+
+    @staticmethod
+    def _fmt(value: Optional[datetime]) -> Optional[str]:
+        return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+    def prepare(self, cursor=None):
+        """读取各表当前最大主键，创建标签和模型类型（小表，已存在时复用）"""
+        if cursor is None:
+            self.tag_ids = list(range(1, len(TOPICS_EN) + 1))
+            self.model_ids = [(index + 1, cost) for index, (_, _, cost) in enumerate(MODELS)]
+            return
+
+        for table, column in PRIMARY_KEYS.items():
+            cursor.execute(f"SELECT COALESCE(MAX(`{column}`), 0) + 1 FROM `{table}`")
+            self.next_ids[table] = cursor.fetchone()[0]
+
+        for topic_en, topic_zh in zip(TOPICS_EN, TOPICS_ZH):
+            cursor.execute("INSERT IGNORE INTO tags (name) VALUES (%s)", (f"{topic_en} / {topic_zh}"[:50],))
+        cursor.execute("SELECT tag_id FROM tags WHERE name IN ({})".format(', '.join(['%s'] * len(TOPICS_EN))),
+                       tuple(f"{en} / {zh}"[:50] for en, zh in zip(TOPICS_EN, TOPICS_ZH)))
+        self.tag_ids = sorted(row[0] for row in cursor.fetchall())
+
+        for name, params, cost in MODELS:
+            cursor.execute(
+                """
+                INSERT INTO llm_type (name, params, costs_per_million_token) VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE llm_type_id = LAST_INSERT_ID(llm_type_id)
+                """,
+                (name, params, cost)
+            )
+            self.model_ids.append((cursor.lastrowid, cost))
+
+    def _generate_users(self, count: int):
+        rows = []
+        for _ in range(count):
+            user_id = self._new_id('User')
+            created_at = self._timestamp()
+            last_login = self._timestamp(created_at) if self.rng.random() < 0.8 else None
+            rows.append((user_id, f"gen_user_{user_id}", PASSWORD_HASH, f"Load Test User {user_id}",
+                         _weighted_choice(self.rng, _ROLE_WEIGHTS), self.rng.random() < 0.95,
+                         self._fmt(created_at), self._fmt(last_login)))
+            self.user_ids.append(user_id)
+        self.loader.load('User', rows)
+
+    def _generate_chunk(self, count: int):
+        rng = self.rng
+        rows = {table: [] for table in TABLE_COLUMNS if table != 'User'}
+
+        for _ in range(count):
+            language = self.text.language()
+            question = self.text.question(language)
+            qs_id = self._new_id('ori_qs')
+            qs_created = self._timestamp()
+            rows['ori_qs'].append((qs_id, question, self._fmt(qs_created), self._fmt(qs_created)))
+
+            answers = []
+            while True:
+                ans_id = self._new_id('ori_ans')
+                answer = self.text.answer(language)
+                ans_created = self._timestamp(qs_created)
+                rows['ori_ans'].append((ans_id, answer, qs_id, self._fmt(ans_created), self._fmt(ans_created)))
+                answers.append((ans_id, answer, ans_created))
+                if len(answers) >= MAX_ANSWERS_PER_QUESTION or rng.random() >= EXTRA_ANSWER_PROBABILITY:
+                    break
+
+            if rng.random() >= self.standardize_ratio:
+                continue
+
+            ori_ans_id, answer, ans_created = rng.choice(answers)
+            created_by = rng.choice(self.user_ids)
+            approved_by = rng.choice(self.user_ids) if rng.random() < 0.6 else None
+            status = _weighted_choice(rng, _STATUS_WEIGHTS)
+            std_created = self._timestamp(ans_created)
+            std_updated = self._timestamp(std_created)
+
+            version = self._new_id('updated_content')
+            rows['updated_content'].append((version, question, _weighted_choice(rng, _OPERATION_WEIGHTS),
+                                            created_by, self._fmt(std_created)))
+
+            std_qs_id = self._new_id('standard_QS')
+            std_ans_id = self._new_id('standard_ans')
+
+            # 每个模型按概率评估，至少保留一条评估记录
+            models = [model for model in self.model_ids if rng.random() < self.evaluation_ratio]
+            if not models:
+                models = [rng.choice(self.model_ids)]
+            eval_ids = []
+            for llm_type_id, cost in models:
+                eval_id = self._new_id('llm_evaluation')
+                dimensions = [round(min(100.0, max(0.0, rng.gauss(75, 12))), 2) for _ in range(5)]
+                prompt_tokens = 200 + len(question) // 3 + len(answer) // 3
+                completion_tokens = rng.randint(80, 400)
+                rows['llm_evaluation'].append((
+                    eval_id, f"模拟评估结果 {eval_id}", llm_type_id, std_ans_id,
+                    round(sum(dimensions) / len(dimensions), 2), rng.choice(self.user_ids),
+                    self._fmt(self._timestamp(std_created)), *dimensions, prompt_tokens, completion_tokens,
+                    round((prompt_tokens + completion_tokens) * cost / 1000000, 6)
+                ))
+                eval_ids.append(eval_id)
+
+            rows['standard_ans'].append((
+                std_ans_id, answer, ori_ans_id, eval_ids[0], std_qs_id, version, created_by, approved_by, status,
+                round(rng.uniform(0, 5), 2), self._fmt(std_created), self._fmt(std_updated)
+            ))
+            rows['standard_QS'].append((
+                std_qs_id, question, qs_id, rng.choice(self.tag_ids), std_ans_id, version, created_by,
+                approved_by, status, self._fmt(std_created), self._fmt(std_updated)
+            ))
+
+            verified = rng.random() < 0.4
+            rows['standard_pair'].append((
+                self._new_id('standard_pair'), std_qs_id, std_ans_id, eval_ids[0], version, created_by,
+                round(rng.uniform(0.3, 1.0), 2), verified,
+                self._fmt(std_created), self._fmt(self._timestamp(std_created)) if verified else None
+            ))
+
+        for table, table_rows in rows.items():
+            self.loader.load(table, table_rows)
+        self.loader.commit()
+
+    def run(self):
+        """生成全部数据，返回各表写入的行数"""
+        self._generate_users(max(1, self.questions // QUESTIONS_PER_USER))
+        self.loader.commit()
+
+        started = time.perf_counter()
+        for start in range(0, self.questions, self.chunk_questions):
+            count = min(self.chunk_questions, self.questions - start)
+            self._generate_chunk(count)
+            done = start + count
+            elapsed = time.perf_counter() - started
+            logger.info(f"已生成 {done}/{self.questions} 个原始问题 "
+                        f"({sum(self.loader.counts.values())} 行, {elapsed:.1f}s)")
+        return dict(self.loader.counts)
+
+
+def _connect(database: Optional[str]):
+    """单独建立允许 LOCAL INFILE 的连接，关闭自动提交"""
+    import mysql.connector
+    from database import DB_CONFIG
+
+    return mysql.connector.connect(
+        host=DB_CONFIG['host'], user=DB_CONFIG['user'], password=DB_CONFIG['password'],
+        database=database or DB_CONFIG['database'], port=DB_CONFIG.get('port', 3306),
+        charset=DB_CONFIG.get('charset', 'utf8mb4'), autocommit=False, allow_local_infile=True
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="生成大规模合成测试数据")
+    parser.add_argument('--rows', type=parse_scale, default=parse_scale('10k'),
+                        help="各表总行数目标，如 10k、1m、10m（默认10k）")
+    parser.add_argument('--questions', type=parse_scale, help="直接指定原始问题数，优先于 --rows")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--zh-ratio', type=float, default=0.5, help="中文问答的比例（默认0.5）")
+    parser.add_argument('--standardize-ratio', type=float, default=DEFAULT_STANDARDIZE_RATIO)
+    parser.add_argument('--evaluation-ratio', type=float, default=DEFAULT_EVALUATION_RATIO)
+    parser.add_argument('--chunk-questions', type=int, default=DEFAULT_CHUNK_QUESTIONS)
+    parser.add_argument('--database', help="目标数据库名，默认为 DB_NAME 配置")
+    parser.add_argument('--no-load-data', action='store_true', help="不使用 LOAD DATA，直接批量 INSERT")
+    parser.add_argument('--dry-run', action='store_true', help="只生成数据并统计行数，不写入数据库")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(REPO_ROOT, '.env'))
+    except ImportError:
+        pass
+    if args.database:
+        os.environ['DB_NAME'] = args.database
+    setup_paths()
+
+    questions = args.questions or max(
+        1, round(args.rows / expected_rows_per_question(args.standardize_ratio, args.evaluation_ratio))
+    )
+    logger.info(f"目标约 {args.rows} 行，生成 {questions} 个原始问题")
+
+    conn = None
+    if not args.dry_run:
+        from database import create_tables, rebuild_evaluation_summary
+
+        create_tables()
+        conn = _connect(args.database)
+
+    loader = BulkLoader(conn, use_load_data=not args.no_load_data)
+    generator = DatasetGenerator(loader, questions, args.seed, args.zh_ratio, args.standardize_ratio,
+                                 args.evaluation_ratio, args.chunk_questions)
+    started = time.perf_counter()
+    try:
+        if conn is not None:
+            loader.cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+            generator.prepare(loader.cursor)
+            loader.commit()
+        else:
+            generator.prepare()
+        counts = generator.run()
+    finally:
+        if conn is not None:
+            loader.cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+            loader.cursor.close()
+            conn.close()
+
+    if conn is not None:
+        # 评估记录绕过了评估器的增量维护，重建汇总表并更新统计信息
+        success, message = rebuild_evaluation_summary()
+        if not success:
+            logger.error(f"重建评估汇总表失败: {message}")
+        from database import execute_query
+        execute_query(f"ANALYZE TABLE {', '.join(f'`{table}`' for table in TABLE_COLUMNS)}", fetch=True)
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, count in counts.items():
+        logger.info(f"{table}: {count} 行")
+    logger.info(f"共 {total} 行，用时 {elapsed:.1f}s（{total / elapsed:.0f} 行/秒）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,13 +3,13 @@ import pandas as pd
 import mysql.connector
 import json #确保导入json模块
 import os
-from database import (create_tables, get_connection, get_table_names, get_table_data, execute_query, batch_import_json_data, 
+from database import (create_tables, get_connection, get_table_names, get_table_data, execute_query, execute_transaction, batch_import_json_data, 
                      get_all_questions_with_answers, get_questions_with_tags, get_llm_evaluation_results, 
                      get_top_scored_answers, get_question_answer_pairs, get_model_performance_comparison,
                      get_questions_by_tag, get_answers_by_score_range, get_recent_updates, search_content,
                      get_database_statistics, get_tag_distribution, get_model_cost_analysis, 
                      get_evaluation_trends, get_answer_length_analysis, get_question_complexity_analysis,
-                     get_orphan_records, get_evaluation_score_distribution) # 导入新的查询函数
+                     get_orphan_records, get_evaluation_score_distribution, rebuild_evaluation_summary) # 导入新的查询函数
 from utils import (show_success_message, show_error_message, show_table_data, show_table_schema, 
                    download_sample_json, get_table_schema, show_warning_message, safe_string, safe_text_preview)
 
@@ -21,15 +21,28 @@ from components.auth_ui import (
     initialize_auth_system
 )
 
+# 导入进程级元数据缓存
+from metadata_cache import get_tag_names, get_tag_id
+
+# 导入查询统计和慢查询日志
+from query_stats import get_query_stats, dump_query_stats, reset_query_stats
+from slow_query_log import get_slow_queries, clear_slow_queries, SLOW_QUERY_THRESHOLD_MS
+
 # 导入答案标注模块
-from components.answer_annotation import create_answer_annotation_ui
+from components.answer_annotation import create_answer_annotation_ui, AnswerAnnotationManager
 
 # 导入LLM评估模块
 try:
     from llm_evaluator import (
         evaluator, 
         evaluate_standard_pairs, 
-        get_model_statistics
+        get_model_statistics,
+        get_model_statistics_bulk,
+        submit_evaluation_batch_job,
+        refresh_evaluation_batch_job,
+        retry_failed_evaluations,
+        fan_out_evaluate_models,
+        cascade_evaluate_pairs
     )
     LLM_EVALUATOR_AVAILABLE = True
 except ImportError as e:
@@ -792,7 +805,8 @@ if query_selected:
                 
                 if success:
                     st.success(f"{message}")
-                    columns = ["模型名称", "参数量", "单价(/百万token)", "总评估数", "平均分", "预估总成本"]
+                    columns = ["模型名称", "参数量", "单价(/百万token)", "总评估数", "平均分",
+                               "输入token", "输出token", "实际总成本($)", "平均每次评估成本($)"]
                     display_query_results(results, columns, "cost", total_count, total_pages, st.session_state.cost_page)
                 else:
                     show_error_message(f"分析失败: {message}")
@@ -1096,13 +1110,13 @@ elif menu == "数据库管理":
         st.info("您可以查看数据，但无法进行表操作")
         admin_tabs = ["数据查看"]
     else:
-        admin_tabs = ["表操作", "数据查看"]
+        admin_tabs = ["表操作", "数据查看", "查询统计"]
     
     # 创建选项卡
     if len(admin_tabs) == 1:
         tab2 = st.container()
     else:
-        tab1, tab2 = st.tabs(admin_tabs)
+        tab1, tab2, tab3 = st.tabs(admin_tabs)
     
     # 只在管理员模式下显示表操作
     if user_info['role'] == 'admin':
@@ -1129,6 +1143,15 @@ elif menu == "数据库管理":
                         st.info(f"当前数据库表数量: {len(tables)}")
                     else:
                         st.warning("数据库中没有表")
+                if st.button("重建评估汇总", key="rebuild_eval_summary",
+                             help="根据 llm_evaluation 重新计算各模型的评估汇总统计；"
+                                  "在数据库中直接删除问题、答案或模型（会级联删除评估记录）后需要执行"):
+                    with st.spinner("重建中..."):
+                        success, message = rebuild_evaluation_summary()
+                        if success:
+                            show_success_message(message)
+                        else:
+                            show_error_message(f"重建失败: {message}")
             
             with col2:
                 # 表信息统计
@@ -1179,6 +1202,72 @@ elif menu == "数据库管理":
                             conn.close()
                         else:
                             show_error_message("无法连接到数据库")
+    
+    # 查询统计只对管理员显示
+    if user_info['role'] == 'admin':
+        with tab3:
+            st.subheader("查询统计")
+            st.caption("execute_query 执行的每条SQL按语句指纹汇总（本进程启动或上次重置以来，所有会话共享）")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.button("刷新", key="refresh_query_stats")
+            with col2:
+                if st.button("重置统计", key="reset_query_stats"):
+                    reset_query_stats()
+                    show_success_message("查询统计已重置")
+            with col3:
+                st.download_button(
+                    "导出JSON",
+                    data=json.dumps(dump_query_stats(), ensure_ascii=False, indent=2),
+                    file_name="query_stats.json",
+                    mime="application/json",
+                    key="download_query_stats"
+                )
+            
+            query_stats = get_query_stats()
+            if not query_stats:
+                st.info("暂无查询统计")
+            else:
+                total_count = sum(item['count'] for item in query_stats)
+                total_ms = sum(item['total_ms'] for item in query_stats)
+                metric_cols = st.columns(3)
+                metric_cols[0].metric("语句指纹数", len(query_stats))
+                metric_cols[1].metric("执行次数", total_count)
+                metric_cols[2].metric("总耗时", f"{total_ms / 1000:.2f} s")
+                
+                stats_df = pd.DataFrame(query_stats)[[
+                    'fingerprint', 'count', 'errors', 'total_ms', 'avg_ms', 'p50_ms', 'p95_ms', 'max_ms',
+                    'avg_rows', 'avg_acquire_ms', 'statement'
+                ]]
+                stats_df.columns = ['指纹', '次数', '错误', '总耗时(ms)', '平均(ms)', 'P50(ms)', 'P95(ms)',
+                                    '最大(ms)', '平均行数', '平均获取连接(ms)', '语句']
+                st.dataframe(stats_df, use_container_width=True, hide_index=True)
+            
+            st.markdown("---")
+            st.subheader("慢查询")
+            if SLOW_QUERY_THRESHOLD_MS <= 0:
+                st.info("慢查询日志已关闭（SLOW_QUERY_THRESHOLD_MS=0）")
+            else:
+                st.caption(f"耗时超过 {SLOW_QUERY_THRESHOLD_MS:.0f} ms 的语句（分页查询按总数查询和分页查询合计），最新的在前")
+                if st.button("清空慢查询", key="clear_slow_queries"):
+                    clear_slow_queries()
+                    show_success_message("慢查询日志已清空")
+                
+                slow_queries = get_slow_queries()
+                if not slow_queries:
+                    st.info("暂无慢查询")
+                for index, entry in enumerate(slow_queries):
+                    recorded_at = pd.to_datetime(entry['timestamp'], unit='s').strftime('%Y-%m-%d %H:%M:%S')
+                    with st.expander(f"{entry['duration_ms']:.0f} ms · {entry['caller'] or '未知调用方'} · {recorded_at}"):
+                        st.code(entry['sql'], language="sql")
+                        st.json({
+                            key: value for key, value in entry.items()
+                            if key not in ('sql', 'explain', 'statement')
+                        }, expanded=False)
+                        if entry.get('explain'):
+                            st.markdown("**执行计划**")
+                            st.json(entry['explain'], expanded=False)
 
 # LLM评估页面
 elif menu == "LLM评估":
@@ -1208,11 +1297,15 @@ elif menu == "LLM评估":
                     help="选择用于评估的LLM模型"
                 )
                 
-                # API密钥状态检查
-                if model.startswith("gpt"):
-                    api_status = "✅ OpenAI" if os.getenv("OPENAI_API_KEY") else "❌ 需要OPENAI_API_KEY"
-                elif model.startswith("claude"):
-                    api_status = "✅ Anthropic" if os.getenv("ANTHROPIC_API_KEY") else "❌ 需要ANTHROPIC_API_KEY"
+                # API密钥状态检查（按模型注册表中的服务商和密钥环境变量）
+                model_spec = evaluator.model_specs.get(model, {})
+                missing_key = evaluator.get_missing_api_key(model)
+                if missing_key:
+                    api_status = f"❌ 需要{missing_key}"
+                elif model_spec.get('provider') == 'openai_compatible':
+                    api_status = f"✅ 兼容接口 {model_spec['base_url']}"
+                elif model_spec:
+                    api_status = f"✅ {model_spec['provider']}"
                 else:
                     api_status = "未知"
                 
@@ -1235,11 +1328,20 @@ elif menu == "LLM评估":
             
             st.markdown("### 评估范围")
             
+            # 抽样评估（高级设置中勾选）按抽样数量和置信区间决定评估哪些问答对，
+            # 不使用问题ID和限制数量，选中时隐藏这两个输入
+            sampling_selected = st.session_state.get('sampling_mode', False)
+            eval_scope_options = ["评估所有标准问答对", "评估特定标签的问答对"]
+            if not sampling_selected:
+                eval_scope_options.append("评估特定问题ID")
+            
             eval_option = st.radio(
                 "评估范围选项",
-                ["评估所有标准问答对", "评估特定标签的问答对", "评估特定问题ID"],
+                eval_scope_options,
                 help="选择要评估的问答对范围"
             )
+            if sampling_selected:
+                st.caption("已启用抽样评估：在全部或所选标签的问答对中分层抽样，评估数量由抽样设置决定")
             
             # 根据选择显示不同的配置选项
             tag_to_eval = None
@@ -1249,14 +1351,19 @@ elif menu == "LLM评估":
             if eval_option == "评估特定标签的问答对":
                 col1, col2 = st.columns([2, 1])
                 with col1:
-                    tag_to_eval = st.text_input("输入标签名称", placeholder="例如: database, sql")
-                with col2:
-                    eval_limit = st.number_input("限制数量", min_value=1, value=10, help="限制评估的问答对数量")
+                    tag_names = get_tag_names()
+                    if tag_names:
+                        tag_to_eval = st.selectbox("选择标签", tag_names)
+                    else:
+                        tag_to_eval = st.text_input("输入标签名称", placeholder="例如: database, sql")
+                if not sampling_selected:
+                    with col2:
+                        eval_limit = st.number_input("限制数量", min_value=1, value=10, help="限制评估的问答对数量")
             
             elif eval_option == "评估特定问题ID":
                 question_id = st.number_input("输入问题Pair ID", min_value=1, value=1)
             
-            else:  # 评估所有
+            elif not sampling_selected:  # 评估所有
                 eval_limit = st.number_input("限制数量（可选）", min_value=1, value=50, help="限制评估数量以避免过多API调用")
             
             # 高级设置
@@ -1407,6 +1514,30 @@ elif menu == "LLM评估":
                 with col1:
                     show_progress = st.checkbox("显示详细进度", value=True)
                     save_prompt_history = st.checkbox("保存Prompt历史", value=False, help="保存使用过的自定义Prompt")
+                    incremental = st.checkbox(
+                        "只评估新增或变更的问答对", value=False,
+                        help="跳过该模型已评估过且之后问题/答案未更新的问答对"
+                    )
+                    structured_output = st.checkbox(
+                        "使用结构化输出", value=False,
+                        help="通过服务商的结构化输出/工具调用直接获取各维度分数，不可用时回退为文本解析"
+                    )
+                    pairs_per_request = st.number_input(
+                        "每次请求问答对数", min_value=1, max_value=20, value=1,
+                        help="大于1时将多个问答对合并为一次API请求评估，解析失败的问答对会自动单独重试"
+                    )
+                    max_cost_input = st.number_input(
+                        "本次运行成本上限($)", min_value=0.0, value=0.0, step=0.5,
+                        help="累计成本达到上限后停止发起新的评估请求，0表示不限制"
+                    )
+                    max_tokens_input = st.number_input(
+                        "本次运行token上限", min_value=0, value=0, step=10000,
+                        help="累计token数达到上限后停止发起新的评估请求，0表示不限制"
+                    )
+                    batch_provider_option = st.selectbox(
+                        "离线批处理服务商", ["按模型自动选择", "openai", "anthropic", "local"],
+                        help="提交离线批处理任务时使用；local 为本地文件替身服务商，用于测试"
+                    )
                 
                 with col2:
                     temperature_override = st.checkbox("自定义模型温度", value=False)
@@ -1414,6 +1545,24 @@ elif menu == "LLM评估":
                         custom_temperature = st.slider("温度值", 0.0, 1.0, 0.3, 0.1, help="较低温度更稳定，较高温度更有创造性")
                     else:
                         custom_temperature = 0.3
+                    
+                    sampling_mode = st.checkbox(
+                        "抽样评估", value=False, key="sampling_mode",
+                        help="按标签分层随机抽取部分问答对评估，并给出平均分的bootstrap置信区间"
+                        "（不使用问题ID和限制数量）"
+                    )
+                    if sampling_mode:
+                        sample_size = st.number_input("每轮抽样数量", min_value=1, max_value=10000, value=50)
+                        target_ci_width = st.number_input(
+                            "目标置信区间宽度", min_value=0.0, value=0.0, step=0.5,
+                            help="大于0时持续追加抽样，直到95%置信区间宽度不超过该值；0表示只抽样一轮"
+                        )
+                        sample_seed = st.number_input(
+                            "随机种子", min_value=0, value=42,
+                            help="不同模型使用相同种子会抽到相同的问答对，便于对比"
+                        )
+                    else:
+                        sample_size = target_ci_width = sample_seed = None
                 
                 # Prompt预览功能
                 if st.button("🔍 预览完整Prompt", key="preview_prompt"):
@@ -1484,10 +1633,9 @@ elif menu == "LLM评估":
                         test_model = st.selectbox("测试模型", available_models, key="test_model_select")
                     with col_test_btn:
                         if st.button("执行测试"):
-                            if test_model.startswith("gpt") and not os.getenv("OPENAI_API_KEY"):
-                                st.error("❌ 请配置OPENAI_API_KEY环境变量")
-                            elif test_model.startswith("claude") and not os.getenv("ANTHROPIC_API_KEY"):
-                                st.error("❌ 请配置ANTHROPIC_API_KEY环境变量")
+                            test_missing_key = evaluator.get_missing_api_key(test_model)
+                            if test_missing_key:
+                                st.error(f"❌ 请配置{test_missing_key}环境变量")
                             else:
                                 with st.spinner("测试中..."):
                                     try:
@@ -1596,16 +1744,25 @@ elif menu == "LLM评估":
                     use_container_width=True,
                     help="点击开始LLM评估过程"
                 )
+                submit_batch = st.button(
+                    "📦 提交离线批处理任务",
+                    key="submit_batch_job",
+                    use_container_width=True,
+                    help="将问答对打包提交到服务商批处理API，完成后在下方任务列表中导入结果，适合大规模评估"
+                )
             
-            if start_eval:
+            batch_provider = None if batch_provider_option == "按模型自动选择" else batch_provider_option
+            
+            if start_eval or submit_batch:
                 # 参数验证
                 can_proceed = True
                 
-                if model.startswith("gpt") and not os.getenv("OPENAI_API_KEY"):
-                    st.error("❌ 请配置OPENAI_API_KEY环境变量")
-                    can_proceed = False
-                elif model.startswith("claude") and not os.getenv("ANTHROPIC_API_KEY"):
-                    st.error("❌ 请配置ANTHROPIC_API_KEY环境变量")
+                # 本地替身服务商不调用真实模型，无需API密钥
+                needs_api_key = not (submit_batch and batch_provider == "local")
+                
+                missing_key = evaluator.get_missing_api_key(model)
+                if needs_api_key and missing_key:
+                    st.error(f"❌ 请配置{missing_key}环境变量")
                     can_proceed = False
                 
                 # 确定评估参数
@@ -1628,8 +1785,24 @@ elif menu == "LLM评估":
                             'limit': eval_limit
                         }
                 
+                # 提交离线批处理任务
+                if can_proceed and submit_batch:
+                    with st.spinner("正在提交批处理任务..."):
+                        batch_result = submit_evaluation_batch_job(
+                            model_name=model,
+                            criteria=criteria,
+                            temperature=custom_temperature,
+                            provider_name=batch_provider,
+                            incremental=incremental,
+                            **eval_params
+                        )
+                    if batch_result['success']:
+                        st.success(f"✅ {batch_result['message']}（任务ID: {batch_result['job_id']}）")
+                    else:
+                        st.error(f"❌ {batch_result['message']}")
+                
                 # 开始评估
-                if can_proceed:
+                if can_proceed and start_eval:
                     with st.spinner(f"正在使用 {model} 进行评估..."):
                         progress_container = st.container()
                         
@@ -1639,12 +1812,41 @@ elif menu == "LLM评估":
                                 model_name=model,
                                 criteria=criteria,
                                 temperature=custom_temperature,
+                                pairs_per_request=pairs_per_request,
+                                max_cost=max_cost_input or None,
+                                max_tokens=max_tokens_input or None,
+                                structured_output=structured_output,
+                                incremental=incremental,
+                                sample_size=sample_size,
+                                target_ci_width=target_ci_width or None,
+                                sample_seed=sample_seed,
                                 **eval_params
                             )
                             
                             if result['success']:
                                 st.success(f"✅ {result['message']}")
                                 
+                                sampling = result.get('sampling')
+                                if sampling:
+                                    st.info(
+                                        f"📐 抽样估计: 平均分 {sampling['mean']:.2f}，"
+                                        f"{sampling['confidence']:.0%} 置信区间 "
+                                        f"[{sampling['ci_low']:.2f}, {sampling['ci_high']:.2f}]"
+                                        f"（宽度 {sampling['ci_width']:.2f}），"
+                                        f"样本 {sampling['sample_size']}/{sampling['population_size']}，"
+                                        f"共 {sampling['rounds']} 轮"
+                                    )
+                                    st.dataframe(
+                                        pd.DataFrame(sampling['strata']),
+                                        use_container_width=True,
+                                        column_config={
+                                            "tag": "标签",
+                                            "population": "问答对总数",
+                                            "evaluated": "成功评估样本数",
+                                            "mean": "样本平均分"
+                                        }
+                                    )
+                                
                                 # 显示评估统计
                                 col1, col2, col3 = st.columns(3)
                                 with col1:
@@ -1654,6 +1856,25 @@ elif menu == "LLM评估":
                                 with col3:
                                     st.metric("失败数量", result['fail_count'])
                                 
+                                if result.get('budget_exceeded'):
+                                    st.warning(f"⚠️ 已达到运行预算，{result['skipped_count']} 个问答对未评估")
+                                
+                                token_usage = result.get('token_usage')
+                                if token_usage:
+                                    st.caption(
+                                        f"🧮 本次运行用量: 输入 {token_usage['prompt_tokens']} tokens，"
+                                        f"输出 {token_usage['completion_tokens']} tokens，"
+                                        f"成本约 ${token_usage['cost_usd']:.4f}"
+                                    )
+                                
+                                cache_stats = result.get('cache_stats')
+                                if cache_stats and cache_stats['requests']:
+                                    st.caption(
+                                        f"⚡ 提示前缀缓存: {cache_stats['cache_hits']}/{cache_stats['requests']} 次请求命中，"
+                                        f"缓存读取 {cache_stats['cache_read_tokens']} tokens，"
+                                        f"缓存写入 {cache_stats['cache_creation_tokens']} tokens"
+                                    )
+                                
                                 # 显示详细结果
                                 if result['results']:
                                     st.markdown("#### 评估结果详情")
@@ -1749,6 +1970,218 @@ elif menu == "LLM评估":
                             st.error(f"❌ 评估过程出错: {str(e)}")
                             if 'logger' in globals():
                                 logger.error(f"LLM评估错误: {e}", exc_info=True)
+            
+            # 离线批处理任务列表
+            with st.expander("📦 离线批处理任务"):
+                batch_jobs = evaluator.get_batch_jobs()
+                if batch_jobs:
+                    st.dataframe(
+                        pd.DataFrame(batch_jobs),
+                        use_container_width=True,
+                        column_config={
+                            "job_id": "任务ID",
+                            "provider": "服务商",
+                            "provider_job_id": "服务商任务ID",
+                            "model_name": "模型",
+                            "status": "状态",
+                            "total_pairs": "问答对数",
+                            "success_count": "成功",
+                            "fail_count": "失败",
+                            "skipped_count": "跳过",
+                            "created_at": "提交时间",
+                            "completed_at": "完成时间"
+                        }
+                    )
+                    
+                    # ingesting 的任务也列出：导入中断超时后可重新导入
+                    pending_jobs = [job['job_id'] for job in batch_jobs if job['status'] in ('submitted', 'ingesting')]
+                    if pending_jobs:
+                        job_to_refresh = st.selectbox("选择未完成的任务", pending_jobs, key="batch_job_to_refresh")
+                        if st.button("🔄 查询状态并导入结果", key="refresh_batch_job"):
+                            with st.spinner("正在查询批处理任务..."):
+                                refresh_result = refresh_evaluation_batch_job(job_to_refresh)
+                            if refresh_result['success']:
+                                st.success(f"✅ {refresh_result['message']}")
+                            else:
+                                st.error(f"❌ {refresh_result['message']}")
+                else:
+                    st.info("暂无批处理任务")
+            
+            # 死信列表：评估失败待重试的问答对
+            with st.expander(f"🔁 失败重试（{model}）"):
+                dead_letters = evaluator.get_dead_letters(model)
+                if dead_letters:
+                    st.dataframe(
+                        pd.DataFrame(dead_letters),
+                        use_container_width=True,
+                        column_config={
+                            "pair_id": "问答对ID",
+                            "model_name": "模型",
+                            "error": "最近错误",
+                            "attempts": "失败次数",
+                            "updated_at": "最近失败时间"
+                        }
+                    )
+                    if st.button(f"🔁 重试 {len(dead_letters)} 个失败的问答对", key="retry_dead_letters"):
+                        with st.spinner(f"正在使用 {model} 重试..."):
+                            retry_result = retry_failed_evaluations(
+                                model,
+                                criteria=criteria,
+                                temperature=custom_temperature,
+                                pairs_per_request=pairs_per_request,
+                                structured_output=structured_output
+                            )
+                        if retry_result['success']:
+                            st.success(f"✅ {retry_result['message']}")
+                        else:
+                            st.error(f"❌ {retry_result['message']}")
+                else:
+                    st.info("该模型没有失败待重试的问答对")
+            
+            # 多模型对比评估：问答对只读取一次，并发分发给多个模型
+            with st.expander("🔀 多模型对比评估"):
+                fan_out_models = st.multiselect(
+                    "选择对比模型", available_models,
+                    default=available_models[:2] if len(available_models) >= 2 else available_models,
+                    key="fan_out_models"
+                )
+                fan_out_col1, fan_out_col2 = st.columns(2)
+                with fan_out_col1:
+                    fan_out_tag = st.text_input("标签（可选）", key="fan_out_tag")
+                with fan_out_col2:
+                    fan_out_limit = st.number_input("评估数量", min_value=1, max_value=10000, value=10,
+                                                    key="fan_out_limit")
+                
+                if st.button("🔀 开始对比评估", key="start_fan_out", disabled=not fan_out_models):
+                    missing_keys = [name for name in fan_out_models if evaluator.get_missing_api_key(name)]
+                    if missing_keys:
+                        st.error(f"❌ 以下模型缺少API密钥配置: {', '.join(missing_keys)}")
+                    else:
+                        with st.spinner(f"正在使用 {len(fan_out_models)} 个模型并发评估..."):
+                            fan_out_result = fan_out_evaluate_models(
+                                fan_out_models,
+                                tag_filter=fan_out_tag or None,
+                                limit=fan_out_limit,
+                                criteria=criteria,
+                                temperature=custom_temperature,
+                                structured_output=structured_output
+                            )
+                        if fan_out_result['success']:
+                            st.success(f"✅ {fan_out_result['message']}")
+                            comparison_df = pd.DataFrame([
+                                {
+                                    'model_name': item['model_name'],
+                                    'avg_score': item['avg_score'],
+                                    **item['dimension_averages'],
+                                    'success_count': item['success_count'],
+                                    'fail_count': item['fail_count'],
+                                    'prompt_tokens': item['prompt_tokens'],
+                                    'completion_tokens': item['completion_tokens'],
+                                    'cost_usd': round(item['cost_usd'], 4)
+                                }
+                                for item in fan_out_result['comparison']
+                            ])
+                            st.dataframe(
+                                comparison_df,
+                                use_container_width=True,
+                                column_config={
+                                    "model_name": "模型",
+                                    "avg_score": "平均分",
+                                    "accuracy": "准确性",
+                                    "completeness": "完整性",
+                                    "clarity": "清晰度",
+                                    "professionalism": "专业性",
+                                    "relevance": "相关性",
+                                    "success_count": "成功",
+                                    "fail_count": "失败",
+                                    "prompt_tokens": "输入tokens",
+                                    "completion_tokens": "输出tokens",
+                                    "cost_usd": "成本($)"
+                                }
+                            )
+                            st.dataframe(
+                                pd.DataFrame([
+                                    {'问答对ID': row['pair_id'], '问题': row['question'], **row['scores']}
+                                    for row in fan_out_result['results']
+                                ]),
+                                use_container_width=True
+                            )
+                        else:
+                            st.error(f"❌ {fan_out_result['message']}")
+            
+            # 级联评估：低成本模型先评分，不确定或解析失败时升级到高成本模型
+            with st.expander("🪜 级联评估"):
+                cascade_col1, cascade_col2 = st.columns(2)
+                with cascade_col1:
+                    cheap_model = st.selectbox(
+                        "低成本模型", available_models,
+                        index=available_models.index("GPT-3.5-Turbo") if "GPT-3.5-Turbo" in available_models else 0,
+                        key="cascade_cheap_model"
+                    )
+                    cascade_limit = st.number_input("评估数量", min_value=1, max_value=10000, value=10,
+                                                    key="cascade_limit")
+                with cascade_col2:
+                    expensive_model = st.selectbox(
+                        "高成本模型", available_models,
+                        index=available_models.index("GPT-4") if "GPT-4" in available_models else 0,
+                        key="cascade_expensive_model"
+                    )
+                    cascade_tag = st.text_input("标签（可选）", key="cascade_tag")
+                uncertainty_band = st.slider(
+                    "不确定区间", min_value=0.0, max_value=100.0, value=(60.0, 80.0), step=1.0,
+                    help="低成本模型的总分落在该区间内时升级到高成本模型重新评估"
+                )
+                
+                if st.button("🪜 开始级联评估", key="start_cascade", disabled=cheap_model == expensive_model):
+                    missing_keys = [name for name in (cheap_model, expensive_model)
+                                    if evaluator.get_missing_api_key(name)]
+                    if missing_keys:
+                        st.error(f"❌ 以下模型缺少API密钥配置: {', '.join(missing_keys)}")
+                    else:
+                        with st.spinner("正在级联评估..."):
+                            cascade_result = cascade_evaluate_pairs(
+                                cheap_model,
+                                expensive_model,
+                                tag_filter=cascade_tag or None,
+                                limit=cascade_limit,
+                                criteria=criteria,
+                                temperature=custom_temperature,
+                                uncertainty_band=uncertainty_band,
+                                structured_output=structured_output,
+                                incremental=incremental
+                            )
+                        if cascade_result['success']:
+                            st.success(f"✅ {cascade_result['message']}")
+                            metric_col1, metric_col2, metric_col3 = st.columns(3)
+                            with metric_col1:
+                                st.metric("升级比例",
+                                          f"{cascade_result['escalated_count'] / cascade_result['total_pairs']:.0%}")
+                            with metric_col2:
+                                st.metric("实际成本", f"${cascade_result['total_cost']:.4f}")
+                            with metric_col3:
+                                st.metric("仅用高成本模型的估算成本",
+                                          f"${cascade_result['estimated_expensive_only_cost']:.4f}")
+                            st.caption(
+                                f"平均每个问答对 ${cascade_result['avg_cost_per_pair']:.5f}，"
+                                f"{cascade_result['avg_seconds_per_pair']:.2f} 秒；"
+                                f"分数不确定升级 {cascade_result['escalations']['uncertain']} 个，"
+                                f"解析失败升级 {cascade_result['escalations']['failed']} 个"
+                            )
+                            st.dataframe(
+                                pd.DataFrame(cascade_result['results']),
+                                use_container_width=True,
+                                column_config={
+                                    "pair_id": "问答对ID",
+                                    "question": "问题",
+                                    "score": "分数",
+                                    "model_name": "评分模型",
+                                    "cascade_tier": "层级",
+                                    "success": "成功",
+                                    "error": "错误"
+                                }
+                            )
+                        else:
+                            st.error(f"❌ {cascade_result['message']}")
         
         with tab2:
             st.subheader("评估结果查看")
@@ -1765,6 +2198,19 @@ elif menu == "LLM评估":
                     st.markdown("#### 模型评估统计")
                     
                     stats_df = pd.DataFrame(stats_result['statistics'])
+                    dimension_labels = {
+                        'accuracy': '准确性',
+                        'completeness': '完整性',
+                        'clarity': '清晰度',
+                        'professionalism': '专业性',
+                        'relevance': '相关性'
+                    }
+                    
+                    # 各维度平均分展开为独立列
+                    dimension_df = pd.DataFrame(
+                        stats_df.pop('dimension_averages').tolist(), index=stats_df.index
+                    ).rename(columns=dimension_labels)
+                    stats_df = stats_df.join(dimension_df)
                     
                     # 显示统计表格
                     st.dataframe(
@@ -1807,8 +2253,46 @@ elif menu == "LLM评估":
                                 title="评估次数分布"
                             )
                             st.plotly_chart(fig_count, use_container_width=True)
+                        
+                        # 各维度平均分对比
+                        if not dimension_df.empty:
+                            dimension_long_df = stats_df.melt(
+                                id_vars='model_name',
+                                value_vars=list(dimension_df.columns),
+                                var_name='dimension',
+                                value_name='avg_dimension_score'
+                            ).dropna()
+                            fig_dimensions = px.bar(
+                                dimension_long_df,
+                                x='dimension',
+                                y='avg_dimension_score',
+                                color='model_name',
+                                barmode='group',
+                                title="各模型分维度平均分对比",
+                                labels={'dimension': '评估维度', 'avg_dimension_score': '平均分数', 'model_name': '模型'}
+                            )
+                            st.plotly_chart(fig_dimensions, use_container_width=True)
                 else:
                     st.info("📊 暂无评估数据，请先进行评估")
+                
+                # 各模型输出解析情况（累计）
+                parse_stats = evaluator.get_parse_statistics()
+                if parse_stats:
+                    st.markdown("#### 输出解析统计")
+                    parse_df = pd.DataFrame(parse_stats)
+                    parse_df['failure_rate'] = (parse_df['failure_rate'] * 100).round(1)
+                    st.dataframe(
+                        parse_df,
+                        use_container_width=True,
+                        column_config={
+                            "model_name": "模型名称",
+                            "total": "解析次数",
+                            "structured": "结构化输出",
+                            "text": "文本解析",
+                            "failed": "解析失败",
+                            "failure_rate": "解析失败率(%)"
+                        }
+                    )
                     
             except Exception as e:
                 st.error(f"❌ 获取评估统计失败: {str(e)}")
@@ -1846,16 +2330,14 @@ elif menu == "LLM评估":
                     st.markdown("#### 对比结果")
                     
                     try:
-                        # 获取选中模型的统计数据
-                        comparison_data = []
-                        for model_name in models_to_compare:
-                            model_stats = get_model_statistics(model_name)
-                            if model_stats['success'] and model_stats['statistics']:
-                                comparison_data.extend(model_stats['statistics'])
+                        # 一次分组查询获取所有选中模型的统计数据
+                        comparison_result = get_model_statistics_bulk(models_to_compare)
+                        if not comparison_result['success']:
+                            st.error(f"❌ 获取模型统计失败: {comparison_result['error']}")
+                        comparison_data = comparison_result.get('statistics', [])
                         
                         if comparison_data:
                             comp_df = pd.DataFrame(comparison_data)
-                            comp_df = comp_df[comp_df['model_name'].isin(models_to_compare)]
                             
                             # 生成对比图表
                             if "平均分数" in comparison_metrics and len(comp_df) > 0:
@@ -1863,13 +2345,35 @@ elif menu == "LLM评估":
                                 import plotly.graph_objects as go
                                 
                                 fig_comparison = go.Figure()
+                                dimension_labels = {
+                                    'accuracy': '准确性',
+                                    'completeness': '完整性',
+                                    'clarity': '清晰度',
+                                    'professionalism': '专业性',
+                                    'relevance': '相关性'
+                                }
                                 
-                                fig_comparison.add_trace(go.Scatterpolar(
-                                    r=comp_df['avg_score'].tolist(),
-                                    theta=comp_df['model_name'].tolist(),
-                                    fill='toself',
-                                    name='平均分数'
-                                ))
+                                if any(stat['dimension_averages'] for stat in comparison_data):
+                                    # 每个模型一条轨迹，按评估维度展开
+                                    for stat in comparison_data:
+                                        dimensions = stat['dimension_averages']
+                                        if not dimensions:
+                                            continue
+                                        fig_comparison.add_trace(go.Scatterpolar(
+                                            r=list(dimensions.values()),
+                                            theta=[dimension_labels.get(dim, dim) for dim in dimensions],
+                                            fill='toself',
+                                            name=stat['model_name']
+                                        ))
+                                    radar_title = "模型各维度平均分雷达图"
+                                else:
+                                    fig_comparison.add_trace(go.Scatterpolar(
+                                        r=comp_df['avg_score'].tolist(),
+                                        theta=comp_df['model_name'].tolist(),
+                                        fill='toself',
+                                        name='平均分数'
+                                    ))
+                                    radar_title = "模型平均分数雷达图"
                                 
                                 fig_comparison.update_layout(
                                     polar=dict(
@@ -1878,7 +2382,7 @@ elif menu == "LLM评估":
                                             range=[0, 100]
                                         )),
                                     showlegend=True,
-                                    title="模型平均分数雷达图"
+                                    title=radar_title
                                 )
                                 
                                 st.plotly_chart(fig_comparison, use_container_width=True)
@@ -2262,29 +2766,31 @@ elif menu == "答案标注":
                                     button_text = f"🔄 替换为标准答案" if has_existing_standard else f"🏷️ 标注为标准答案"
                                     
                                     if st.button(button_text, key=f"annotate_answer_{ori_ans_id}", use_container_width=True):
-                                        if has_existing_standard:
-                                            # 如果已有标准答案，先删除它们
-                                            delete_query = """
-                                            DELETE sa FROM standard_ans sa
-                                            JOIN ori_ans oa ON sa.ori_ans_id = oa.ori_ans_id
-                                            WHERE oa.ori_qs_id = %s AND sa.status != 'archived'
-                                            """
-                                            
-                                            success_delete, result_delete = execute_query(delete_query, [ori_qs_id])
+                                        def replace_standard_answer(cursor):
+                                            if has_existing_standard:
+                                                # 如果已有标准答案，先删除它们（与插入在同一事务中）
+                                                delete_query = """
+                                                DELETE sa FROM standard_ans sa
+                                                JOIN ori_ans oa ON sa.ori_ans_id = oa.ori_ans_id
+                                                WHERE oa.ori_qs_id = %s AND sa.status != 'archived'
+                                                """
+                                                # 删除会级联删除评估记录，记下受影响的模型以便重建汇总统计
+                                                cursor.execute("""
+                                                SELECT DISTINCT le.llm_type_id FROM llm_evaluation le
+                                                JOIN standard_ans sa ON le.std_ans_id = sa.ans_id
+                                                JOIN ori_ans oa ON sa.ori_ans_id = oa.ori_ans_id
+                                                WHERE oa.ori_qs_id = %s AND sa.status != 'archived'
+                                                """, [ori_qs_id])
+                                                affected_llm_types = [row[0] for row in cursor.fetchall()]
+                                                cursor.execute(delete_query, [ori_qs_id])
+                                                rebuild_evaluation_summary(affected_llm_types, cursor)
                                             
-                                            if not success_delete:
-                                                st.error(f"❌ 删除原有标准答案失败: {result_delete}")
-                                                st.stop()
-                                        
-                                        # 执行新的答案标注
-                                        insert_answer_query = """
-                                        INSERT INTO standard_ans (ori_ans_id, ans_content, created_by, updated_content_version, status)
-                                        VALUES (%s, %s, %s, 1, 'draft')
-                                        """
-                                        
-                                        insert_answer_params = [ori_ans_id, answer_content, user_info['user_id']]
+                                            # 执行新的答案标注（创建 updated_content 版本记录并插入标准答案）
+                                            return AnswerAnnotationManager().insert_standard_answer(
+                                                cursor, ori_ans_id, user_info['user_id'], answer_content
+                                            )
                                         
-                                        success_ans, result_ans = execute_query(insert_answer_query, insert_answer_params)
+                                        success_ans, result_ans = execute_transaction(replace_standard_answer)
                                         
                                         if success_ans:
                                             if has_existing_standard:
@@ -2306,17 +2812,30 @@ elif menu == "答案标注":
                     st.markdown("**标注操作**")
                     
                     if annotation_status == "未标注":
+                        tag_names = get_tag_names()
+                        if not tag_names:
+                            st.warning("暂无标签，请先创建标签")
+                        question_tag = st.selectbox("标签", tag_names, key=f"annotate_tag_{ori_qs_id}")
+                        
                         # 标注按钮
-                        if st.button(f"🏷️ 标注为标准问题", key=f"annotate_{ori_qs_id}", use_container_width=True):
-                            # 执行标注
-                            insert_query = """
-                            INSERT INTO standard_QS (ori_qs_id, content, created_by, tag_id, updated_content_version, status)
-                            VALUES (%s, %s, %s, 1, 1, 'draft')
-                            """
-                            
-                            insert_params = [ori_qs_id, question_content, user_info['user_id']]
+                        if st.button(f"🏷️ 标注为标准问题", key=f"annotate_{ori_qs_id}", use_container_width=True,
+                                     disabled=not tag_names):
+                            def create_standard_question(cursor):
+                                # 创建更新内容记录，lastrowid 即为新的更新版本ID
+                                cursor.execute(
+                                    "INSERT INTO updated_content (content, operation, created_by) VALUES (%s, %s, %s)",
+                                    (f"标注原始问题 {ori_qs_id} 为标准问题", 'CREATE', user_info['user_id'])
+                                )
+                                updated_content_version = cursor.lastrowid
+                                
+                                insert_query = """
+                                INSERT INTO standard_QS (ori_qs_id, content, created_by, tag_id, updated_content_version, status)
+                                VALUES (%s, %s, %s, %s, %s, 'draft')
+                                """
+                                cursor.execute(insert_query, [ori_qs_id, question_content, user_info['user_id'],
+                                                              get_tag_id(question_tag), updated_content_version])
                             
-                            success, result = execute_query(insert_query, insert_params)
+                            success, result = execute_transaction(create_standard_question)
                             
                             if success:
                                 st.success(f"✅ 问题 #{ori_qs_id} 已成功标注为标准问题！")
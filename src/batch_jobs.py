@@ -0,0 +1,308 @@
+"""
+离线批处理评估模块
+将评估请求序列化为服务商批处理任务格式（OpenAI Batch / Anthropic Message Batches），
+提交后轮询状态并取回结果，适合数万条问答对的大规模评估。
+
+另提供基于本地文件的替身服务商（local），按 OpenAI Batch 的输入/输出 JSONL 格式
+读写文件，无需网络和API密钥即可走通提交、轮询、导入的完整流程。
+"""
+
+import io
+import json
+import os
+import uuid
+import logging
+from typing import Callable, Dict, List, Optional
+
+from token_counter import count_tokens
+from mock_llm import mock_evaluation
+
+logger = logging.getLogger(__name__)
+
+# 本地替身服务商的任务文件目录
+BATCH_JOBS_DIR = os.getenv(
+    'BATCH_JOBS_DIR',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'batch_jobs')
+)
+
+# 统一后的任务状态
+STATUS_IN_PROGRESS = 'in_progress'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+
+def _parse_openai_output_lines(lines) -> Dict[str, Dict]:
+    """解析 OpenAI Batch 输出 JSONL，返回 custom_id -> {'content', 'error'}"""
+    results = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.error(f"批处理输出行解析失败: {e}")
+            continue
+
+        custom_id = item.get('custom_id')
+        response = item.get('response') or {}
+        body = response.get('body') or {}
+        if item.get('error') or response.get('status_code', 200) != 200:
+            results[custom_id] = {'content': None, 'error': str(item.get('error') or body)}
+            continue
+
+        try:
+            content = body['choices'][0]['message']['content']
+            results[custom_id] = {'content': content, 'error': None, 'usage': body.get('usage')}
+        except (KeyError, IndexError, TypeError) as e:
+            results[custom_id] = {'content': None, 'error': f"响应格式错误: {e}"}
+    return results
+
+
+def _build_chat_completions_request(custom_id: str, model_id: str, system_prompt: str,
+                                    user_prompt: str, temperature: float) -> Dict:
+    """构造 OpenAI Batch 输入格式的一行请求"""
+    return {
+        'custom_id': custom_id,
+        'method': 'POST',
+        'url': '/v1/chat/completions',
+        'body': {
+            'model': model_id,
+            'temperature': temperature,
+            'messages': [
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': user_prompt}
+            ]
+        }
+    }
+
+
+class OpenAIBatchProvider:
+    """OpenAI Batch API：上传 JSONL 文件，以 /v1/chat/completions 为端点创建批处理任务"""
+
+    name = 'openai'
+
+    def __init__(self):
+        from openai import OpenAI
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY环境变量未设置")
+        self.client = OpenAI(api_key=api_key)
+
+    def build_request(self, custom_id: str, model_id: str, system_prompt: str,
+                      user_prompt: str, temperature: float) -> Dict:
+        """构造一行批处理请求"""
+        return _build_chat_completions_request(custom_id, model_id, system_prompt, user_prompt, temperature)
+
+    def submit(self, requests: List[Dict]) -> str:
+        """提交批处理任务，返回服务商任务ID"""
+        payload = "\n".join(json.dumps(request, ensure_ascii=False) for request in requests)
+        input_file = self.client.files.create(
+            file=("evaluation_batch.jsonl", io.BytesIO(payload.encode('utf-8'))),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def get_status(self, provider_job_id: str) -> str:
+        """查询任务状态"""
+        batch = self.client.batches.retrieve(provider_job_id)
+        if batch.status == 'completed':
+            return STATUS_COMPLETED
+        if batch.status in ('failed', 'expired', 'cancelled'):
+            return STATUS_FAILED
+        return STATUS_IN_PROGRESS
+
+    def fetch_results(self, provider_job_id: str) -> Dict[str, Dict]:
+        """取回任务结果，返回 custom_id -> {'content', 'error'}"""
+        batch = self.client.batches.retrieve(provider_job_id)
+        results = {}
+        if batch.output_file_id:
+            results.update(_parse_openai_output_lines(
+                self.client.files.content(batch.output_file_id).text.splitlines()
+            ))
+        if batch.error_file_id:
+            results.update(_parse_openai_output_lines(
+                self.client.files.content(batch.error_file_id).text.splitlines()
+            ))
+        return results
+
+
+class AnthropicBatchProvider:
+    """Anthropic Message Batches API"""
+
+    name = 'anthropic'
+
+    def __init__(self):
+        import anthropic
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY环境变量未设置")
+        self.client = anthropic.Anthropic(api_key=api_key)
+
+    def build_request(self, custom_id: str, model_id: str, system_prompt: str,
+                      user_prompt: str, temperature: float) -> Dict:
+        """构造一条批处理请求，系统提示标记为可缓存前缀"""
+        return {
+            'custom_id': custom_id,
+            'params': {
+                'model': model_id,
+                'max_tokens': 1024,
+                'temperature': temperature,
+                'system': [{
+                    'type': 'text',
+                    'text': system_prompt,
+                    'cache_control': {'type': 'ephemeral'}
+                }],
+                'messages': [{'role': 'user', 'content': user_prompt}]
+            }
+        }
+
+    def submit(self, requests: List[Dict]) -> str:
+        """提交批处理任务，返回服务商任务ID"""
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def get_status(self, provider_job_id: str) -> str:
+        """查询任务状态"""
+        batch = self.client.messages.batches.retrieve(provider_job_id)
+        if batch.processing_status == 'ended':
+            return STATUS_COMPLETED
+        if batch.processing_status == 'canceling':
+            return STATUS_FAILED
+        return STATUS_IN_PROGRESS
+
+    def fetch_results(self, provider_job_id: str) -> Dict[str, Dict]:
+        """取回任务结果，返回 custom_id -> {'content', 'error'}"""
+        results = {}
+        for entry in self.client.messages.batches.results(provider_job_id):
+            if entry.result.type == 'succeeded':
+                message = entry.result.message
+                text = "".join(block.text for block in message.content if block.type == 'text')
+                results[entry.custom_id] = {
+                    'content': text,
+                    'error': None,
+                    'usage': message.usage.model_dump() if message.usage else None
+                }
+            else:
+                results[entry.custom_id] = {'content': None, 'error': f"请求未成功: {entry.result.type}"}
+        return results
+
+
+def _default_local_responder(body: Dict) -> str:
+    """本地替身服务商的默认应答：根据请求内容生成确定性的评估JSON"""
+    return json.dumps(
+        mock_evaluation(body['messages'][-1]['content'], "本地批处理替身服务商生成的评估结果"),
+        ensure_ascii=False
+    )
+
+
+class LocalFileBatchProvider:
+    """
+    基于本地文件的批处理替身服务商
+
+    提交时写入 <任务ID>.input.jsonl，处理后写入 OpenAI Batch 格式的 <任务ID>.output.jsonl；
+    输出文件存在即视为任务完成
+    """
+
+    name = 'local'
+
+    def __init__(self, base_dir: Optional[str] = None,
+                 responder: Optional[Callable[[Dict], str]] = None,
+                 auto_process: bool = True):
+        """
+        Args:
+            base_dir: 任务文件目录
+            responder: 根据请求体生成模型输出文本的函数，默认生成确定性评分
+            auto_process: 提交后是否立即处理；为False时需调用 process() 模拟服务端完成
+        """
+        self.base_dir = base_dir or BATCH_JOBS_DIR
+        self.responder = responder or _default_local_responder
+        self.auto_process = auto_process
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _path(self, provider_job_id: str, kind: str) -> str:
+        return os.path.join(self.base_dir, f"{provider_job_id}.{kind}.jsonl")
+
+    def build_request(self, custom_id: str, model_id: str, system_prompt: str,
+                      user_prompt: str, temperature: float) -> Dict:
+        """与 OpenAI Batch 输入格式相同"""
+        return _build_chat_completions_request(custom_id, model_id, system_prompt, user_prompt, temperature)
+
+    def submit(self, requests: List[Dict]) -> str:
+        """写入输入文件，返回任务ID"""
+        provider_job_id = f"local-{uuid.uuid4().hex}"
+        with open(self._path(provider_job_id, 'input'), 'w', encoding='utf-8') as f:
+            for request in requests:
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+        if self.auto_process:
+            self.process(provider_job_id)
+        return provider_job_id
+
+    def process(self, provider_job_id: str):
+        """模拟服务端处理：逐行调用 responder 生成输出文件"""
+        output_lines = []
+        with open(self._path(provider_job_id, 'input'), encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                try:
+                    content = self.responder(request['body'])
+                    usage = {
+                        'prompt_tokens': sum(count_tokens(message['content'])
+                                             for message in request['body']['messages']),
+                        'completion_tokens': count_tokens(content)
+                    }
+                    output = {
+                        'custom_id': request['custom_id'],
+                        'response': {
+                            'status_code': 200,
+                            'body': {
+                                'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                                'usage': usage
+                            }
+                        },
+                        'error': None
+                    }
+                except Exception as e:
+                    output = {'custom_id': request['custom_id'], 'response': None, 'error': str(e)}
+                output_lines.append(json.dumps(output, ensure_ascii=False))
+
+        # 先写临时文件再改名，避免轮询时读到不完整的输出
+        output_path = self._path(provider_job_id, 'output')
+        with open(output_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write("\n".join(output_lines) + "\n")
+        os.replace(output_path + '.tmp', output_path)
+
+    def get_status(self, provider_job_id: str) -> str:
+        """查询任务状态"""
+        if os.path.exists(self._path(provider_job_id, 'output')):
+            return STATUS_COMPLETED
+        if os.path.exists(self._path(provider_job_id, 'input')):
+            return STATUS_IN_PROGRESS
+        return STATUS_FAILED
+
+    def fetch_results(self, provider_job_id: str) -> Dict[str, Dict]:
+        """读取输出文件，返回 custom_id -> {'content', 'error'}"""
+        with open(self._path(provider_job_id, 'output'), encoding='utf-8') as f:
+            return _parse_openai_output_lines(f)
+
+
+BATCH_PROVIDERS = {
+    'openai': OpenAIBatchProvider,
+    'anthropic': AnthropicBatchProvider,
+    'local': LocalFileBatchProvider,
+}
+
+
+def get_batch_provider(name: str):
+    """按名称创建批处理服务商实例"""
+    if name not in BATCH_PROVIDERS:
+        raise ValueError(f"不支持的批处理服务商: {name}")
+    return BATCH_PROVIDERS[name]()
@@ -9,8 +9,9 @@ Date: 2024
 - 将原始答案标注为标准答案
 - 支持编辑答案内容后再标注
 - 管理标准答案的状态（draft, review, approved, archived）
+- 支持多选批量标注和批量状态更新
 - 提供答案标注统计信息
-- 具备缓存机制，优化性能
+- 具备缓存机制，优化性能（用户等参考数据使用进程级元数据缓存）
 
 性能优化：
 - 使用缓存减少重复数据库查询
@@ -20,13 +21,58 @@ Date: 2024
 
 import streamlit as st
 import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import sys
 import os
 
 # 添加父目录到路径以导入数据库模块
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from database import execute_query, get_paginated_query
+from database import execute_query, execute_transaction, get_paginated_query
+from metadata_cache import get_active_users
+
+# 批量操作时每条语句处理的最大行数，避免 IN 列表和批量插入语句过大
+BULK_BATCH_SIZE = 500
+# 手动输入的ID列表（含范围展开后）的最大数量
+MAX_BULK_IDS = 10000
+
+
+def _chunks(items: List, size: int):
+    """按固定大小切分列表"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _parse_id_list(text: str) -> Tuple[List[int], List[str]]:
+    """
+    解析ID列表输入，支持逗号/空白分隔和范围写法
+
+    例如 "1, 3, 10-15" -> ([1, 3, 10, 11, 12, 13, 14, 15], [])
+
+    Returns:
+        (ids, rejected)：无法解析的写法（如 "abc"、"9-3"、"1-"）、超过 MAX_BULK_IDS 的范围，
+        以及会使ID总数超过 MAX_BULK_IDS 的写法都放入 rejected，由调用方提示而不是静默忽略
+    """
+    ids = []
+    rejected = []
+    for token in text.replace("，", ",").replace(",", " ").split():
+        if "-" in token:
+            start, _, end = token.partition("-")
+            if not (start.isdigit() and end.isdigit() and int(start) <= int(end)):
+                rejected.append(token)
+                continue
+            token_ids = range(int(start), int(end) + 1)
+        elif token.isdigit():
+            token_ids = [int(token)]
+        else:
+            rejected.append(token)
+            continue
+
+        if len(ids) + len(token_ids) > MAX_BULK_IDS:
+            rejected.append(token)
+            continue
+        ids.extend(token_ids)
+    return ids, rejected
+
 
 class AnswerAnnotationManager:
     """答案标注管理器"""
@@ -73,18 +119,11 @@ class AnswerAnnotationManager:
 
     
     def get_available_users(self) -> List[Dict]:
-        """获取可用的用户列表（用于标注者）"""
-        query = """
-        SELECT user_id, username, name 
-        FROM User 
-        WHERE is_active = TRUE 
-        ORDER BY username
-        """
-        success, result = execute_query(query, None, True)
-        
-        if success and result:
-            return [{"user_id": row[0], "username": row[1], "name": row[2]} for row in result]
-        return []
+        """获取可用的用户列表（用于标注者），数据来自进程级元数据缓存"""
+        return [
+            {"user_id": user['user_id'], "username": user['username'], "name": user['name']}
+            for user in get_active_users()
+        ]
     
 
 
@@ -102,79 +141,163 @@ class AnswerAnnotationManager:
         Returns:
             Tuple[success, message]
         """
-        try:
-            # 首先检查是否已经存在标准答案
-            check_query = "SELECT ans_id FROM standard_ans WHERE ori_ans_id = %s"
-            success, existing = execute_query(check_query, (ori_ans_id,), True)
+        success, result = execute_transaction(
+            lambda cursor: self.insert_standard_answer(cursor, ori_ans_id, created_by, edited_content, quality_score)
+        )
+        
+        if success:
+            return True, "成功标注为标准答案"
+        else:
+            return False, f"标注失败: {result}"
+    
+    def insert_standard_answer(self, cursor, ori_ans_id: int, created_by: int,
+                               edited_content: str = None, quality_score: Optional[float] = None) -> int:
+        """
+        在调用方的事务中将原始答案标注为标准答案：创建 updated_content 版本记录后插入标准答案
+        
+        供需要与其他语句（如替换原有标准答案时的删除）放在同一事务中的调用方使用，
+        已标注时抛出 ValueError 使整个事务回滚
+        
+        Returns:
+            新标准答案的 ans_id
+        """
+        # 在同一事务中检查并锁定，避免并发重复标注
+        cursor.execute(
+            "SELECT ans_id FROM standard_ans WHERE ori_ans_id = %s FOR UPDATE",
+            (ori_ans_id,)
+        )
+        if cursor.fetchone():
+            raise ValueError("该原始答案已经被标注为标准答案")
+        
+        # 获取答案内容（使用编辑后的内容或原始内容）
+        if edited_content is None:
+            cursor.execute("SELECT content FROM ori_ans WHERE ori_ans_id = %s", (ori_ans_id,))
+            ans_row = cursor.fetchone()
+            if not ans_row:
+                raise ValueError("获取原始答案内容失败")
+            answer_content = ans_row[0]
+        else:
+            answer_content = edited_content
+        
+        # 创建更新内容记录，lastrowid 即为新的更新版本ID
+        update_content_query = """
+        INSERT INTO updated_content (content, operation, created_by) 
+        VALUES (%s, %s, %s)
+        """
+        content_desc = f"标注原始答案 {ori_ans_id} 为标准答案"
+        cursor.execute(update_content_query, (content_desc, 'CREATE', created_by))
+        updated_content_version = cursor.lastrowid
+        
+        # 创建标准答案
+        insert_query = """
+        INSERT INTO standard_ans (
+            ans_content, ori_ans_id, updated_content_version, 
+            created_by, status, quality_score
+        ) VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        cursor.execute(insert_query, (
+            answer_content, ori_ans_id, updated_content_version,
+            created_by, 'draft', quality_score
+        ))
+        return cursor.lastrowid
+    
+    def bulk_create_standard_answers(self, ori_ans_ids: List[int], created_by: int,
+                                     quality_score: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        批量将原始答案标注为标准答案
+        
+        所有答案在同一事务中处理：每个答案各自创建一条 updated_content 版本记录，
+        版本记录和标准答案都按批次多行插入，已标注的答案会被跳过。
+        
+        Args:
+            ori_ans_ids: 原始答案ID列表
+            created_by: 创建者用户ID
+            quality_score: 质量评分（可选，应用于所有答案）
             
-            if success and existing:
-                return False, "该原始答案已经被标注为标准答案"
+        Returns:
+            Tuple[success, message]
+        """
+        ori_ans_ids = list(dict.fromkeys(ori_ans_ids))
+        if not ori_ans_ids:
+            return False, "未选择任何答案"
+        
+        def bulk_create(cursor):
+            # 锁定已存在的标准答案，找出需要跳过的答案
+            existing_ids = set()
+            for chunk in _chunks(ori_ans_ids, BULK_BATCH_SIZE):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT ori_ans_id FROM standard_ans WHERE ori_ans_id IN ({placeholders}) FOR UPDATE",
+                    chunk
+                )
+                existing_ids.update(row[0] for row in cursor.fetchall())
             
-            # 创建更新内容记录
-            update_content_query = """
-            INSERT INTO updated_content (content, operation, created_by) 
-            VALUES (%s, %s, %s)
-            """
-            content_desc = f"标注原始答案 {ori_ans_id} 为标准答案"
-            success, result = execute_query(
-                update_content_query, 
-                (content_desc, 'CREATE', created_by)
-            )
+            pending_ids = [ans_id for ans_id in ori_ans_ids if ans_id not in existing_ids]
             
-            if not success:
-                return False, f"创建更新记录失败: {result}"
+            # 批量读取原始答案内容
+            contents = {}
+            for chunk in _chunks(pending_ids, BULK_BATCH_SIZE):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT ori_ans_id, content FROM ori_ans WHERE ori_ans_id IN ({placeholders})",
+                    chunk
+                )
+                contents.update(cursor.fetchall())
             
-            # 获取刚创建的更新版本ID
-            get_version_query = "SELECT LAST_INSERT_ID()"
-            success, version_result = execute_query(get_version_query, None, True)
+            pending_ids = [ans_id for ans_id in pending_ids if ans_id in contents]
+            missing_count = len(ori_ans_ids) - len(existing_ids) - len(pending_ids)
             
-            if not success or not version_result:
-                return False, "获取更新版本ID失败"
-                
-            updated_content_version = version_result[0][0]
+            if not pending_ids:
+                return 0, len(existing_ids), missing_count
             
-            # 获取答案内容（使用编辑后的内容或原始内容）
-            if edited_content is None:
-                get_ans_query = "SELECT content FROM ori_ans WHERE ori_ans_id = %s"
-                success, ans_result = execute_query(get_ans_query, (ori_ans_id,), True)
-                
-                if not success or not ans_result:
-                    return False, "获取原始答案内容失败"
-                    
-                answer_content = ans_result[0][0]
-            else:
-                answer_content = edited_content
+            # 多行 INSERT 生成的自增ID连续，lastrowid 为第一行的ID，按自增步长推算其余各行
+            cursor.execute("SELECT @@auto_increment_increment")
+            increment = cursor.fetchone()[0]
             
-            # 创建标准答案
             insert_query = """
             INSERT INTO standard_ans (
                 ans_content, ori_ans_id, updated_content_version, 
                 created_by, status, quality_score
             ) VALUES (%s, %s, %s, %s, %s, %s)
             """
+            for chunk in _chunks(pending_ids, BULK_BATCH_SIZE):
+                # 每个答案一条版本记录，与单个标注的描述一致
+                cursor.execute(
+                    "INSERT INTO updated_content (content, operation, created_by) VALUES "
+                    + ", ".join(["(%s, %s, %s)"] * len(chunk)),
+                    [value for ans_id in chunk
+                     for value in (f"标注原始答案 {ans_id} 为标准答案", 'CREATE', created_by)]
+                )
+                first_version = cursor.lastrowid
+                cursor.executemany(insert_query, [
+                    (contents[ans_id], ans_id, first_version + index * increment,
+                     created_by, 'draft', quality_score)
+                    for index, ans_id in enumerate(chunk)
+                ])
             
-            params = (
-                answer_content, ori_ans_id, updated_content_version,
-                created_by, 'draft', quality_score
-            )
-            
-            success, message = execute_query(insert_query, params)
-            
-            if success:
-                return True, "成功标注为标准答案"
-            else:
-                return False, f"标注失败: {message}"
-                
-        except Exception as e:
-            return False, f"标注过程中发生错误: {str(e)}"
+            return len(pending_ids), len(existing_ids), missing_count
+        
+        success, result = execute_transaction(bulk_create)
+        
+        if not success:
+            return False, f"批量标注失败: {result}"
+        
+        # 事务已提交即为成功，全部已标注时也只是没有需要新建的答案
+        created_count, skipped_count, missing_count = result
+        message = f"成功标注 {created_count} 个答案"
+        if skipped_count:
+            message += f"，跳过 {skipped_count} 个已标注答案"
+        if missing_count:
+            message += f"，{missing_count} 个答案不存在"
+        return True, message
     
-    def update_standard_answer_status(self, ans_id: int, new_status: str, 
+    def update_standard_answer_status(self, ans_id: Union[int, List[int]], new_status: str, 
                                     updated_by: int) -> Tuple[bool, str]:
         """
         更新标准答案状态
         
         Args:
-            ans_id: 标准答案ID
+            ans_id: 标准答案ID，传入ID列表时在同一事务中批量更新
             new_status: 新状态 ('draft', 'review', 'approved', 'archived')
             updated_by: 更新者用户ID
             
@@ -185,17 +308,31 @@ class AnswerAnnotationManager:
         if new_status not in valid_statuses:
             return False, f"无效的状态值，必须是: {', '.join(valid_statuses)}"
         
-        update_query = """
-        UPDATE standard_ans 
-        SET status = %s, approved_by = %s, updated_at = CURRENT_TIMESTAMP
-        WHERE ans_id = %s
-        """
+        ans_ids = list(ans_id) if isinstance(ans_id, (list, tuple, set)) else [ans_id]
+        if not ans_ids:
+            return False, "未选择任何标准答案"
         
         approved_by = updated_by if new_status == 'approved' else None
-        success, message = execute_query(update_query, (new_status, approved_by, ans_id))
+        
+        def update_status(cursor):
+            updated_count = 0
+            for chunk in _chunks(ans_ids, BULK_BATCH_SIZE):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                update_query = f"""
+                UPDATE standard_ans 
+                SET status = %s, approved_by = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE ans_id IN ({placeholders})
+                """
+                cursor.execute(update_query, (new_status, approved_by, *chunk))
+                updated_count += cursor.rowcount
+            return updated_count
+        
+        success, message = execute_transaction(update_status)
         
         if success:
-            return True, f"成功更新状态为: {new_status}"
+            if len(ans_ids) == 1:
+                return True, f"成功更新状态为: {new_status}"
+            return True, f"成功将 {message} 个标准答案更新为: {new_status}"
         else:
             return False, f"状态更新失败: {message}"
     
@@ -300,13 +437,6 @@ def create_answer_annotation_ui():
         st.session_state.cached_stats = manager.get_annotation_statistics()
         st.session_state.stats_cache_time = current_time
     
-    # 缓存用户数据
-    if ('cached_users' not in st.session_state or 
-        'users_cache_time' not in st.session_state or 
-        current_time - st.session_state.users_cache_time > cache_timeout):
-        st.session_state.cached_users = manager.get_available_users()
-        st.session_state.users_cache_time = current_time
-    
     # 侧边栏 - 统计信息
     with st.sidebar:
         st.subheader("📊 标注统计")
@@ -417,10 +547,84 @@ def create_answer_annotation_ui():
         
         st.subheader(f"💡 答案列表 (共 {total_count} 条)")
         
-        # 使用缓存的用户选项
-        users = st.session_state.cached_users
+        # 用户数据来自进程级元数据缓存，所有会话共享
+        users = manager.get_available_users()
         user_options = {f"{user['username']} ({user['name']})": user['user_id'] for user in users}
-        
+
+        # 批量操作 - 一次提交多个答案，只触发一次数据库事务和页面刷新
+        if users:
+            with st.expander("⚡ 批量标注 / 批量更新状态", expanded=False):
+                bulk_user = st.selectbox("操作者", list(user_options.keys()), key="bulk_user_a")
+                bulk_col1, bulk_col2 = st.columns(2)
+
+                with bulk_col1:
+                    st.markdown("**批量标注为标准答案**")
+                    unannotated_options = {
+                        f"#{row[0]} {row[1][:40]}": row[0] for row in data if row[5] == "未标注"
+                    }
+                    select_all = st.checkbox("选择本页全部未标注答案", key="bulk_select_all_a")
+                    selected_labels = st.multiselect(
+                        "选择本页答案",
+                        list(unannotated_options.keys()),
+                        default=list(unannotated_options.keys()) if select_all else []
+                    )
+                    extra_ids_text = st.text_input(
+                        "或输入原始答案ID",
+                        placeholder="例如: 1, 3, 100-200",
+                        key="bulk_extra_ids_a",
+                        help="支持逗号分隔和范围写法，用于跨页批量标注"
+                    )
+                    bulk_score = st.slider("质量评分", 0.0, 5.0, 3.0, 0.1, key="bulk_score_a")
+
+                    bulk_ids = [unannotated_options[label] for label in selected_labels]
+                    extra_ids, rejected_tokens = _parse_id_list(extra_ids_text)
+                    bulk_ids += extra_ids
+                    if rejected_tokens:
+                        st.error(f"无法识别或超出数量上限（{MAX_BULK_IDS} 个）的ID: {', '.join(rejected_tokens)}")
+
+                    if st.button(f"批量标注 ({len(set(bulk_ids))} 个)", key="bulk_annotate_a",
+                                 disabled=not bulk_ids or bool(rejected_tokens)):
+                        success, message = manager.bulk_create_standard_answers(
+                            bulk_ids, user_options[bulk_user], bulk_score
+                        )
+                        if success:
+                            if 'cached_stats' in st.session_state:
+                                del st.session_state.cached_stats
+                            st.success(message)
+                            st.rerun()
+                        else:
+                            st.error(message)
+
+                with bulk_col2:
+                    st.markdown("**批量更新状态**")
+                    annotated_options = {
+                        f"#{row[0]} (标准答案 {row[6]}, {row[7]})": row[6]
+                        for row in data if row[5] == "已标注"
+                    }
+                    selected_status_labels = st.multiselect(
+                        "选择本页已标注答案",
+                        list(annotated_options.keys())
+                    )
+                    bulk_status = st.selectbox(
+                        "目标状态",
+                        ['draft', 'review', 'approved', 'archived'],
+                        key="bulk_status_a"
+                    )
+
+                    if st.button(f"批量更新状态 ({len(selected_status_labels)} 个)", key="bulk_update_a",
+                                 disabled=not selected_status_labels):
+                        success, message = manager.update_standard_answer_status(
+                            [annotated_options[label] for label in selected_status_labels],
+                            bulk_status, user_options[bulk_user]
+                        )
+                        if success:
+                            if 'cached_stats' in st.session_state:
+                                del st.session_state.cached_stats
+                            st.success(message)
+                            st.rerun()
+                        else:
+                            st.error(message)
+
         # 优化：添加状态图标，减少字符串操作
         for i, row in enumerate(data):
             (ori_ans_id, answer_content, ori_qs_id, question_content, 
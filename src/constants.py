@@ -0,0 +1,7 @@
+"""
+共享常量模块
+不依赖数据库或第三方库，独立运行的模块（如 mock_llm 的HTTP替身服务）也可以直接导入。
+"""
+
+# LLM评估的五个维度，每个维度在 llm_evaluation 中有对应的 <维度>_score 列
+EVALUATION_DIMENSIONS = ('accuracy', 'completeness', 'clarity', 'professionalism', 'relevance')
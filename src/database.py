@@ -1,8 +1,13 @@
+import json
 import mysql.connector
 from mysql.connector import Error
 import pandas as pd
+import re
 import sys
 import os
+import threading
+import time
+from functools import partial
 
 # 添加 configs 目录到路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'configs'))
@@ -13,6 +18,87 @@ except ImportError as e:
     print(f"❌ 无法导入配置文件: {e}")
     print("请确保 configs/database_config.py 文件存在")
 
+# 同目录模块（通过 src.database 导入时 src 不在导入路径中）
+sys.path.append(os.path.dirname(__file__))
+from constants import EVALUATION_DIMENSIONS
+from query_stats import record_query
+from slow_query_log import (SLOW_QUERY_PERSIST, slow_query_log, is_slow, build_entry, find_caller,
+                            main_table, submit_background)
+
+# 参考数据表（小型、变化缓慢，由 metadata_cache 在进程内缓存）
+REFERENCE_TABLES = ('User', 'tags', 'llm_type')
+
+# 参考数据表的版本号，任何写入都会递增对应版本使缓存失效
+_reference_versions = {table: 0 for table in REFERENCE_TABLES}
+_reference_lock = threading.Lock()
+
+_REFERENCE_WRITE_PATTERN = re.compile(
+    r"^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+`?(\w+)`?",
+    re.IGNORECASE
+)
+
+# 只更新最后登录时间的语句不影响缓存的列，不使 User 缓存失效（否则每次登录都会清空）
+_LAST_LOGIN_ONLY_PATTERN = re.compile(
+    r"^\s*UPDATE\s+`?User`?\s+SET\s+`?last_login`?\s*=\s*[^,]*?\s+WHERE\b",
+    re.IGNORECASE
+)
+
+def written_reference_table(query):
+    """语句写入的参考数据表名，不写入参考数据表（或只更新最后登录时间）时返回None"""
+    match = _REFERENCE_WRITE_PATTERN.match(query)
+    if not match or _LAST_LOGIN_ONLY_PATTERN.match(query):
+        return None
+    return match.group(1)
+
+def invalidate_reference_data(table_name):
+    """递增参考数据表的版本号，使该表的进程级缓存失效"""
+    with _reference_lock:
+        for table in REFERENCE_TABLES:
+            if table.lower() == str(table_name).lower():
+                _reference_versions[table] += 1
+
+def get_reference_version(table_name):
+    """获取参考数据表的当前版本号"""
+    with _reference_lock:
+        return _reference_versions[table_name]
+
+# 为已存在的表补充后续新增的列和索引（CREATE TABLE IF NOT EXISTS 不会修改已有表）
+# 每项为 (表名, 列名或索引名, 'COLUMN' 或 'INDEX', 定义)
+# 输出解析方式（structured / text / failed）对应的 llm_evaluation_summary 计数列
+PARSE_OUTCOME_COLUMNS = {
+    'structured': 'parse_structured_count',
+    'text': 'parse_text_count',
+    'failed': 'parse_failed_count',
+}
+
+SCHEMA_MIGRATIONS = [
+    *[('llm_evaluation', f'{dim}_score', 'COLUMN', 'DECIMAL(5,2) DEFAULT NULL')
+      for dim in EVALUATION_DIMENSIONS],
+    ('llm_evaluation', 'idx_type_dimensions', 'INDEX',
+     f"(llm_type_id, {', '.join(f'{dim}_score' for dim in EVALUATION_DIMENSIONS)})"),
+    ('llm_evaluation_summary', 'dim_count', 'COLUMN', 'INT NOT NULL DEFAULT 0'),
+    *[('llm_evaluation_summary', f'{dim}_sum', 'COLUMN', 'DECIMAL(20,2) NOT NULL DEFAULT 0')
+      for dim in EVALUATION_DIMENSIONS],
+    ('llm_evaluation', 'prompt_tokens', 'COLUMN', 'INT DEFAULT NULL'),
+    ('llm_evaluation', 'completion_tokens', 'COLUMN', 'INT DEFAULT NULL'),
+    ('llm_evaluation', 'cost_usd', 'COLUMN', 'DECIMAL(12,6) DEFAULT NULL'),
+    ('llm_evaluation_summary', 'prompt_tokens_sum', 'COLUMN', 'BIGINT NOT NULL DEFAULT 0'),
+    ('llm_evaluation_summary', 'completion_tokens_sum', 'COLUMN', 'BIGINT NOT NULL DEFAULT 0'),
+    ('llm_evaluation_summary', 'cost_sum', 'COLUMN', 'DECIMAL(20,6) NOT NULL DEFAULT 0'),
+    # 增量评估的反连接：按 (答案, 模型) 查找最近的评估时间
+    ('llm_evaluation', 'idx_ans_type_date', 'INDEX', '(std_ans_id, llm_type_id, evaluation_date)'),
+    ('llm_evaluation', 'cascade_tier', 'COLUMN', "TINYINT DEFAULT NULL COMMENT '级联评估中产生该分数的层级'"),
+    ('llm_evaluation', 'question_truncated', 'COLUMN', "BOOLEAN DEFAULT NULL COMMENT '评估前问题是否按token预算被截断'"),
+    ('llm_evaluation', 'answer_truncated', 'COLUMN', "BOOLEAN DEFAULT NULL COMMENT '评估前答案是否按token预算被截断'"),
+    # 导入中断的批处理任务按 updated_at 判断是否超时，超时后可重新抢占
+    ('evaluation_batch_job', 'updated_at', 'COLUMN', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
+    # 导入时已有更新评估结果（任务提交后由其他运行保存）而跳过的问答对数
+    ('evaluation_batch_job', 'skipped_count', 'COLUMN', 'INT NOT NULL DEFAULT 0'),
+    # 各模型输出解析方式的累计次数，由评估器累加，重建汇总表时保留
+    *[('llm_evaluation_summary', column, 'COLUMN', 'INT NOT NULL DEFAULT 0')
+      for column in PARSE_OUTCOME_COLUMNS.values()],
+]
+
 def get_connection():
     """建立数据库连接"""
     try:
@@ -39,13 +125,18 @@ def get_connection():
         return None
 
 def execute_query(query, params=None, fetch=False, many=False):
-    """执行SQL查询"""
+    """执行SQL查询（耗时、返回行数和获取连接耗时记入 query_stats，超过阈值的语句记入慢查询日志）"""
+    acquire_start = time.perf_counter()
     conn = get_connection()
+    acquire_ms = (time.perf_counter() - acquire_start) * 1000
     result = None
     
     if conn is None:
         return False, "数据库连接失败"
     
+    start = time.perf_counter()
+    rows = None
+    error = False
     try:
         cursor = conn.cursor(buffered=True)  # 使用buffered=True避免"Unread result found"错误
         if many:  # 新增批量操作分支
@@ -57,16 +148,186 @@ def execute_query(query, params=None, fetch=False, many=False):
         
         if fetch:
             result = cursor.fetchall()
+            rows = len(result)
         else:
             conn.commit()
+            rows = cursor.rowcount
+            # 写入参考数据表后使缓存失效
+            table_name = written_reference_table(query)
+            if table_name:
+                invalidate_reference_data(table_name)
         
         return True, result if fetch else "操作成功"
     except Error as e:
+        error = True
         return False, f"查询执行错误: {e}"
     finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
+        record_query(query, duration_ms, rows, acquire_ms, error)
+        # 分页查询中的语句由 get_paginated_query 合并记录
+        if is_slow(duration_ms) and not getattr(_slow_query_state, 'paginated', False):
+            _log_slow_query(query, params, duration_ms, many)
+
+# 慢查询记录的线程状态：paginated 表示处于 get_paginated_query 中
+_slow_query_state = threading.local()
+
+def _explain_statement(query, params=None):
+    """获取语句的 EXPLAIN FORMAT=JSON（直接使用连接执行，不经过 execute_query）"""
+    conn = get_connection()
+    if conn is None:
+        return {'error': '数据库连接失败'}
+    cursor = None
+    try:
+        cursor = conn.cursor(buffered=True)
+        if params:
+            cursor.execute(f"EXPLAIN FORMAT=JSON {query}", params)
+        else:
+            cursor.execute(f"EXPLAIN FORMAT=JSON {query}")
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+    except (Error, ValueError) as e:
+        return {'error': str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if conn.is_connected():
+            conn.close()
+
+def _persist_slow_query(entry):
+    """将慢查询记录写入 system_logs（直接使用连接执行，不经过 execute_query）"""
+    conn = get_connection()
+    if conn is None:
+        return
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO system_logs (action, table_name, new_values) VALUES (%s, %s, %s)",
+            ('SLOW_QUERY', main_table(entry['sql']), json.dumps(entry, ensure_ascii=False, default=str))
+        )
+        conn.commit()
+    except Error as e:
+        print(f"❌ 写入慢查询日志失败: {e}")
+    finally:
+        if cursor:
+            cursor.close()
         if conn.is_connected():
+            conn.close()
+
+def _complete_slow_query(entry, query, params, explain):
+    """后台线程中补全慢查询记录：采集执行计划，按配置写入 system_logs"""
+    if explain:
+        entry['explain'] = _explain_statement(query, params)
+    if SLOW_QUERY_PERSIST:
+        _persist_slow_query(entry)
+
+def _log_slow_query(query, params, duration_ms, many=False, detail=None, caller=None):
+    """
+    记录一条慢查询：记录立即写入环形缓冲区，执行计划的采集和写入 system_logs 交给后台线程，
+    不在刚执行完慢查询的请求线程上再额外开连接
+    """
+    try:
+        entry = build_entry(query, params, duration_ms, many, caller or find_caller(), None, detail)
+        slow_query_log.add(entry)
+        explain = not many and slow_query_log.should_explain(query)
+        if explain or SLOW_QUERY_PERSIST:
+            submit_background(partial(_complete_slow_query, entry, query, params, explain))
+    except Exception as e:
+        print(f"❌ 记录慢查询失败: {e}")
+
+class _InstrumentedCursor:
+    """
+    execute_transaction 传给回调的游标：每次 execute/executemany 的耗时和影响行数记入 query_stats，
+    超过阈值的语句先暂存（调用方在执行时确定），事务结束、连接关闭后再记入慢查询日志，
+    避免在持有行锁时采集执行计划；写入的参考数据表在事务提交后才使缓存失效。
+    其余属性和方法直接转发给原游标
+    """
+
+    def __init__(self, cursor, acquire_ms=0.0):
+        self._cursor = cursor
+        self._acquire_ms = acquire_ms
+        self.slow_statements = []
+        self.written_reference_tables = set()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _run(self, method, query, params, many):
+        table_name = written_reference_table(query)
+        if table_name:
+            self.written_reference_tables.add(table_name)
+        start = time.perf_counter()
+        error = False
+        try:
+            return method(query, params) if params is not None or many else method(query)
+        except Exception:
+            error = True
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            # 获取连接的耗时只计入事务的第一条语句
+            record_query(query, duration_ms, None if error else self._cursor.rowcount, self._acquire_ms, error)
+            self._acquire_ms = 0.0
+            if is_slow(duration_ms):
+                self.slow_statements.append((query, params, duration_ms, many, find_caller()))
+
+    def execute(self, query, params=None):
+        return self._run(self._cursor.execute, query, params, False)
+
+    def executemany(self, query, params):
+        return self._run(self._cursor.executemany, query, params, True)
+
+def execute_transaction(work):
+    """
+    在同一个连接、同一个事务中执行多条SQL语句
+
+    Args:
+        work: 回调函数 work(cursor)，在事务内用同一个游标执行语句。
+              其返回值作为结果返回；返回None时返回最后一次插入的 cursor.lastrowid。
+              回调中抛出的任何异常都会回滚整个事务，异常信息作为错误消息返回。
+              游标上的每条语句与 execute_query 一样记入 query_stats 和慢查询日志，
+              写入参考数据表时在提交后使对应缓存失效。
+
+    Returns:
+        Tuple[success, result]: 成功时为回调结果，失败时为错误信息
+    """
+    acquire_start = time.perf_counter()
+    conn = get_connection()
+    acquire_ms = (time.perf_counter() - acquire_start) * 1000
+
+    if conn is None:
+        return False, "数据库连接失败"
+
+    cursor = None
+    try:
+        conn.start_transaction()
+        cursor = _InstrumentedCursor(conn.cursor(buffered=True), acquire_ms)
+        result = work(cursor)
+        conn.commit()
+        for table_name in cursor.written_reference_tables:
+            invalidate_reference_data(table_name)
+
+        return True, cursor.lastrowid if result is None else result
+    except Error as e:
+        conn.rollback()
+        return False, f"事务执行错误: {e}"
+    except Exception as e:
+        conn.rollback()
+        return False, str(e)
+    finally:
+        if cursor:
             cursor.close()
+        if conn.is_connected():
             conn.close()
+        if cursor:
+            for query, params, duration_ms, many, caller in cursor.slow_statements:
+                _log_slow_query(query, params, duration_ms, many, caller=caller)
 
 def create_tables():
     """创建所有数据库表"""
@@ -175,16 +436,73 @@ def create_tables():
             evaluated_by INT DEFAULT NULL,
             evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             notes TEXT DEFAULT NULL,
+            accuracy_score DECIMAL(5,2) DEFAULT NULL,
+            completeness_score DECIMAL(5,2) DEFAULT NULL,
+            clarity_score DECIMAL(5,2) DEFAULT NULL,
+            professionalism_score DECIMAL(5,2) DEFAULT NULL,
+            relevance_score DECIMAL(5,2) DEFAULT NULL,
+            prompt_tokens INT DEFAULT NULL,
+            completion_tokens INT DEFAULT NULL,
+            cost_usd DECIMAL(12,6) DEFAULT NULL,
+            cascade_tier TINYINT DEFAULT NULL COMMENT '级联评估中产生该分数的层级：1 低成本模型，2 升级到高成本模型',
+            question_truncated BOOLEAN DEFAULT NULL COMMENT '评估前问题是否按token预算被截断',
+            answer_truncated BOOLEAN DEFAULT NULL COMMENT '评估前答案是否按token预算被截断',
             INDEX idx_llm_type (llm_type_id),
             INDEX idx_std_ans (std_ans_id),
             INDEX idx_score (llm_score),
             INDEX idx_evaluation_date (evaluation_date),
+            INDEX idx_type_dimensions (llm_type_id, accuracy_score, completeness_score, clarity_score, professionalism_score, relevance_score),
+            INDEX idx_ans_type_date (std_ans_id, llm_type_id, evaluation_date),
             FOREIGN KEY (llm_type_id) REFERENCES llm_type(llm_type_id) ON DELETE CASCADE,
             FOREIGN KEY (std_ans_id) REFERENCES standard_ans(ans_id) ON DELETE CASCADE,
             FOREIGN KEY (evaluated_by) REFERENCES User(user_id) ON DELETE SET NULL
         )
         """,
         """
+        CREATE TABLE IF NOT EXISTS llm_evaluation_summary (
+            llm_type_id INT PRIMARY KEY,
+            eval_count INT NOT NULL DEFAULT 0,
+            score_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+            score_sq_sum DECIMAL(24,4) NOT NULL DEFAULT 0,
+            min_score DECIMAL(5,2) DEFAULT NULL,
+            max_score DECIMAL(5,2) DEFAULT NULL,
+            dim_count INT NOT NULL DEFAULT 0,
+            accuracy_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+            completeness_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+            clarity_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+            professionalism_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+            relevance_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+            prompt_tokens_sum BIGINT NOT NULL DEFAULT 0,
+            completion_tokens_sum BIGINT NOT NULL DEFAULT 0,
+            cost_sum DECIMAL(20,6) NOT NULL DEFAULT 0,
+            parse_structured_count INT NOT NULL DEFAULT 0,
+            parse_text_count INT NOT NULL DEFAULT 0,
+            parse_failed_count INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (llm_type_id) REFERENCES llm_type(llm_type_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS evaluation_batch_job (
+            job_id INT PRIMARY KEY AUTO_INCREMENT,
+            provider VARCHAR(20) NOT NULL,
+            provider_job_id VARCHAR(128) NOT NULL,
+            model_name VARCHAR(100) NOT NULL,
+            criteria TEXT DEFAULT NULL,
+            status ENUM('submitted', 'ingesting', 'completed', 'failed') DEFAULT 'submitted',
+            total_pairs INT NOT NULL DEFAULT 0,
+            success_count INT NOT NULL DEFAULT 0,
+            fail_count INT NOT NULL DEFAULT 0,
+            skipped_count INT NOT NULL DEFAULT 0,
+            pair_map JSON NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP NULL DEFAULT NULL,
+            INDEX idx_status (status),
+            INDEX idx_created_at (created_at)
+        )
+        """,
+        """
         CREATE TABLE IF NOT EXISTS standard_QS (
             std_qs_id INT PRIMARY KEY AUTO_INCREMENT,
             content TEXT NOT NULL,
@@ -235,6 +553,19 @@ def create_tables():
         )
         """,
         """
+        CREATE TABLE IF NOT EXISTS evaluation_dead_letter (
+            pair_id INT NOT NULL,
+            model_name VARCHAR(100) NOT NULL,
+            error TEXT DEFAULT NULL,
+            attempts INT NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (model_name, pair_id),
+            INDEX idx_pair_id (pair_id),
+            FOREIGN KEY (pair_id) REFERENCES standard_pair(pair_id) ON DELETE CASCADE
+        )
+        """,
+        """
         CREATE TABLE IF NOT EXISTS user_sessions (
             session_id VARCHAR(128) PRIMARY KEY,
             user_id INT NOT NULL,
@@ -276,8 +607,207 @@ def create_tables():
         success, message = execute_query(query)
         results.append((success, message))
     
+    applied_migrations = []
+    results.extend(apply_schema_migrations(applied_migrations))
+    
+    # 汇总表由评估器增量维护，只在刚创建（为空）或新增了汇总列时根据已有评估记录重建，
+    # 避免每次启动都扫描整个 llm_evaluation
+    success, rows = execute_query("SELECT 1 FROM llm_evaluation_summary LIMIT 1", fetch=True)
+    summary_empty = success and not rows
+    summary_migrated = any(table_name == 'llm_evaluation_summary' for table_name, _ in applied_migrations)
+    if summary_empty or summary_migrated:
+        results.append(rebuild_evaluation_summary())
+    
     return results
 
+def apply_schema_migrations(applied=None):
+    """
+    为已存在的表补充 SCHEMA_MIGRATIONS 中缺少的列和索引
+
+    Args:
+        applied: 传入列表时追加成功执行的迁移 (表名, 列名或索引名)
+    """
+    results = []
+    for table_name, name, kind, definition in SCHEMA_MIGRATIONS:
+        if kind == 'COLUMN':
+            check_query = """
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+            """
+            alter_query = f"ALTER TABLE `{table_name}` ADD COLUMN `{name}` {definition}"
+        else:
+            check_query = """
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+            """
+            alter_query = f"ALTER TABLE `{table_name}` ADD INDEX `{name}` {definition}"
+        
+        success, result = execute_query(check_query, (table_name, name), True)
+        if not success:
+            results.append((False, result))
+        elif result[0][0] == 0:
+            success, message = execute_query(alter_query)
+            results.append((success, message))
+            if success and applied is not None:
+                applied.append((table_name, name))
+    
+    return results
+
+def update_evaluation_summary(cursor, llm_type_id, score, dimension_scores=None, token_usage=None):
+    """
+    在当前事务中将一条新的评估分数累加到 llm_evaluation_summary
+    
+    Args:
+        cursor: 写入 llm_evaluation 所在事务的游标
+        llm_type_id: 模型类型ID
+        score: 评估分数
+        dimension_scores: 各维度分数 {维度: 分数}，为None时只累加总分
+        token_usage: {'prompt_tokens', 'completion_tokens', 'cost_usd'}，为None时不累加用量
+    """
+    update_evaluation_summary_batch(cursor, [(llm_type_id, score, dimension_scores, token_usage)])
+
+def update_evaluation_summary_batch(cursor, entries):
+    """
+    在当前事务中将多条新的评估分数累加到 llm_evaluation_summary，每个模型类型只执行一次写入
+    
+    Args:
+        cursor: 写入 llm_evaluation 所在事务的游标
+        entries: [(llm_type_id, score, dimension_scores, token_usage), ...]，各项含义同 update_evaluation_summary
+    """
+    dim_sum_columns = [f"{dim}_sum" for dim in EVALUATION_DIMENSIONS]
+    usage_keys = ('prompt_tokens', 'completion_tokens', 'cost_usd')
+    usage_columns = ['prompt_tokens_sum', 'completion_tokens_sum', 'cost_sum']
+    sum_columns = dim_sum_columns + usage_columns
+    
+    # 先在内存中按模型类型聚合
+    totals = {}
+    for llm_type_id, score, dimension_scores, token_usage in entries:
+        total = totals.setdefault(llm_type_id, {
+            'count': 0, 'sum': 0, 'sq_sum': 0, 'min': score, 'max': score,
+            'dim_count': 0, 'sums': [0] * len(sum_columns)
+        })
+        total['count'] += 1
+        total['sum'] += score
+        total['sq_sum'] += score * score
+        total['min'] = min(total['min'], score)
+        total['max'] = max(total['max'], score)
+        if dimension_scores:
+            total['dim_count'] += 1
+        values = [dimension_scores[dim] if dimension_scores else 0 for dim in EVALUATION_DIMENSIONS]
+        values += [(token_usage or {}).get(key) or 0 for key in usage_keys]
+        total['sums'] = [a + b for a, b in zip(total['sums'], values)]
+    
+    for llm_type_id, total in totals.items():
+        cursor.execute(f"""
+            INSERT INTO llm_evaluation_summary
+                (llm_type_id, eval_count, score_sum, score_sq_sum, min_score, max_score,
+                 dim_count, {', '.join(sum_columns)})
+            VALUES (%s, %s, %s, %s, %s, %s, %s, {', '.join(['%s'] * len(sum_columns))})
+            ON DUPLICATE KEY UPDATE
+                eval_count = eval_count + VALUES(eval_count),
+                score_sum = score_sum + VALUES(score_sum),
+                score_sq_sum = score_sq_sum + VALUES(score_sq_sum),
+                min_score = LEAST(COALESCE(min_score, VALUES(min_score)), VALUES(min_score)),
+                max_score = GREATEST(COALESCE(max_score, VALUES(max_score)), VALUES(max_score)),
+                dim_count = dim_count + VALUES(dim_count),
+                {', '.join(f'{col} = {col} + VALUES({col})' for col in sum_columns)}
+        """, (llm_type_id, total['count'], total['sum'], total['sq_sum'], total['min'], total['max'],
+              total['dim_count'], *total['sums']))
+
+def add_parse_outcome_counts(counts):
+    """
+    将输出解析次数累加到 llm_evaluation_summary
+    
+    Args:
+        counts: {llm_type_id: {'structured': 次数, 'text': 次数, 'failed': 次数}}
+        
+    Returns:
+        Tuple[success, message]
+    """
+    if not counts:
+        return True, "操作成功"
+    
+    columns = list(PARSE_OUTCOME_COLUMNS.values())
+    params = []
+    for llm_type_id, outcome_counts in counts.items():
+        params.append(llm_type_id)
+        params.extend(outcome_counts.get(method, 0) for method in PARSE_OUTCOME_COLUMNS)
+    
+    row_placeholder = f"({', '.join(['%s'] * (len(columns) + 1))})"
+    query = f"""
+    INSERT INTO llm_evaluation_summary (llm_type_id, {', '.join(columns)})
+    VALUES {', '.join([row_placeholder] * len(counts))}
+    ON DUPLICATE KEY UPDATE
+        {', '.join(f'{col} = {col} + VALUES({col})' for col in columns)}
+    """
+    return execute_query(query, tuple(params))
+
+def rebuild_evaluation_summary(llm_type_ids=None, cursor=None):
+    """
+    从 llm_evaluation 重新计算汇总表
+    
+    只重新计算评估相关的列，输出解析次数（PARSE_OUTCOME_COLUMNS）无法从评估记录推算，原样保留。
+    
+    增量维护只覆盖通过评估器写入的记录；批量导入或级联删除评估记录后需要调用本函数重建。
+    删除 ori_qs / ori_ans / standard_ans / llm_type 的行会通过外键 ON DELETE CASCADE
+    连带删除 llm_evaluation 记录，汇总表不会自动减少：任何删除这些行的代码都应在同一事务中
+    先查出受影响的 llm_type_id，删除后以 cursor 调用本函数（参见 app.py 中替换标准答案的流程）；
+    直接在数据库中删除时，在数据库管理页面点击“重建评估汇总”。
+    
+    Args:
+        llm_type_ids: 只重建指定模型类型，None 表示全部重建
+        cursor: 传入时在调用方事务中执行，否则单独开启事务
+        
+    Returns:
+        Tuple[success, message]，传入 cursor 时返回 None
+    """
+    def rebuild(cur):
+        condition = ""
+        params = ()
+        if llm_type_ids is not None:
+            if not llm_type_ids:
+                return "操作成功"
+            condition = f"WHERE llm_type_id IN ({', '.join(['%s'] * len(llm_type_ids))})"
+            params = tuple(llm_type_ids)
+        
+        summary_columns = ['eval_count', 'score_sum', 'score_sq_sum', 'min_score', 'max_score', 'dim_count',
+                           *(f'{dim}_sum' for dim in EVALUATION_DIMENSIONS),
+                           'prompt_tokens_sum', 'completion_tokens_sum', 'cost_sum']
+        reset_values = {col: 'NULL' if col in ('min_score', 'max_score') else '0' for col in summary_columns}
+        # 先清零评估相关的列（不删除行，保留解析次数），没有评估记录的模型保持为0
+        cur.execute(f"""
+            UPDATE llm_evaluation_summary
+            SET {', '.join(f'{col} = {value}' for col, value in reset_values.items())}
+            {condition}
+        """, params)
+        cur.execute(f"""
+            INSERT INTO llm_evaluation_summary (llm_type_id, {', '.join(summary_columns)})
+            SELECT 
+                llm_type_id,
+                COUNT(*),
+                SUM(llm_score),
+                SUM(llm_score * llm_score),
+                MIN(llm_score),
+                MAX(llm_score),
+                COUNT({EVALUATION_DIMENSIONS[0]}_score),
+                {', '.join(f'COALESCE(SUM({dim}_score), 0)' for dim in EVALUATION_DIMENSIONS)},
+                COALESCE(SUM(prompt_tokens), 0),
+                COALESCE(SUM(completion_tokens), 0),
+                COALESCE(SUM(cost_usd), 0)
+            FROM llm_evaluation
+            {condition}
+            GROUP BY llm_type_id
+            ON DUPLICATE KEY UPDATE
+                {', '.join(f'{col} = VALUES({col})' for col in summary_columns)}
+        """, params)
+        return "评估汇总表重建成功"
+    
+    if cursor is not None:
+        rebuild(cursor)
+        return None
+    
+    return execute_transaction(rebuild)
+
 def get_table_names():
     """获取数据库中所有表名"""
     query = """
@@ -394,6 +924,9 @@ def batch_import_json_data(json_data_dict):
                 cursor.executemany(sql_query, rows_to_insert)
                 # No explicit conn.commit() needed here if autocommit=True, but doesn't hurt for clarity or if autocommit is False.
                 conn.commit() 
+                invalidate_reference_data(table_name)
+                if table_name == 'llm_evaluation':
+                    rebuild_evaluation_summary()
                 inserted_count = cursor.rowcount if cursor.rowcount != -1 else len(rows_to_insert)
                 results[table_name] = {"success": True, "message": f"成功导入 {inserted_count} 条记录。", "inserted_count": inserted_count}
             except Error as e:
@@ -412,25 +945,39 @@ def batch_import_json_data(json_data_dict):
             conn.close() 
 
 def get_paginated_query(query, params=None, page=1, page_size=10):
-    """执行分页查询"""
+    """执行分页查询（总数查询和分页查询合计超过慢查询阈值时记为一条慢查询）"""
     offset = (page - 1) * page_size
     
     # 获取总数的查询
     count_query = f"SELECT COUNT(*) FROM ({query}) as count_table"
-    success_count, total_result = execute_query(count_query, params, True)
-    
-    if not success_count:
-        return False, "获取总数失败", 0, []
-    
-    total_count = total_result[0][0] if total_result else 0
-    total_pages = (total_count + page_size - 1) // page_size
-    
-    # 分页查询
     paginated_query = f"{query} LIMIT %s OFFSET %s"
     final_params = list(params) if params else []
     final_params.extend([page_size, offset])
     
-    success, result = execute_query(paginated_query, final_params, True)
+    _slow_query_state.paginated = True
+    try:
+        count_start = time.perf_counter()
+        success_count, total_result = execute_query(count_query, params, True)
+        count_ms = (time.perf_counter() - count_start) * 1000
+        
+        if not success_count:
+            return False, "获取总数失败", 0, []
+        
+        total_count = total_result[0][0] if total_result else 0
+        total_pages = (total_count + page_size - 1) // page_size
+        
+        # 分页查询
+        page_start = time.perf_counter()
+        success, result = execute_query(paginated_query, final_params, True)
+        page_ms = (time.perf_counter() - page_start) * 1000
+    finally:
+        _slow_query_state.paginated = False
+    
+    if is_slow(count_ms + page_ms):
+        _log_slow_query(paginated_query, final_params, count_ms + page_ms, detail={
+            'count_ms': round(count_ms, 3), 'page_ms': round(page_ms, 3),
+            'page': page, 'page_size': page_size, 'total_count': total_count
+        })
     
     if success:
         return True, "查询成功", total_count, result, total_pages
@@ -543,19 +1090,18 @@ def get_question_answer_pairs(page=1, page_size=10):
     return get_paginated_query(query, None, page, page_size)
 
 def get_model_performance_comparison(page=1, page_size=10):
-    """获取模型性能比较"""
+    """获取模型性能比较（读取 llm_evaluation_summary 汇总表）"""
     query = """
     SELECT 
         lt.name as model_name,
         lt.params as model_params,
-        COUNT(le.eval_id) as total_evaluations,
-        AVG(le.llm_score) as avg_score,
-        MAX(le.llm_score) as max_score,
-        MIN(le.llm_score) as min_score,
+        COALESCE(s.eval_count, 0) as total_evaluations,
+        s.score_sum / NULLIF(s.eval_count, 0) as avg_score,
+        s.max_score,
+        s.min_score,
         lt.costs_per_million_token as cost_per_million
     FROM llm_type lt
-    LEFT JOIN llm_evaluation le ON lt.llm_type_id = le.llm_type_id
-    GROUP BY lt.llm_type_id, lt.name, lt.params, lt.costs_per_million_token
+    LEFT JOIN llm_evaluation_summary s ON lt.llm_type_id = s.llm_type_id
     ORDER BY avg_score DESC
     """
     return get_paginated_query(query, None, page, page_size)
@@ -678,19 +1224,21 @@ def get_tag_distribution(page=1, page_size=10):
     return get_paginated_query(query, None, page, page_size)
 
 def get_model_cost_analysis(page=1, page_size=10):
-    """获取模型成本分析"""
+    """获取模型成本分析（按实际记录的token用量计费，读取 llm_evaluation_summary 汇总表）"""
     query = """
     SELECT 
         lt.name as model_name,
         lt.params as parameters,
         lt.costs_per_million_token as cost_per_million,
-        COUNT(le.eval_id) as total_evaluations,
-        AVG(le.llm_score) as avg_score,
-        (COUNT(le.eval_id) * lt.costs_per_million_token / 1000000) as estimated_cost
+        COALESCE(s.eval_count, 0) as total_evaluations,
+        s.score_sum / NULLIF(s.eval_count, 0) as avg_score,
+        COALESCE(s.prompt_tokens_sum, 0) as prompt_tokens,
+        COALESCE(s.completion_tokens_sum, 0) as completion_tokens,
+        COALESCE(s.cost_sum, 0) as total_cost,
+        s.cost_sum / NULLIF(s.eval_count, 0) as avg_cost_per_evaluation
     FROM llm_type lt
-    LEFT JOIN llm_evaluation le ON lt.llm_type_id = le.llm_type_id
-    GROUP BY lt.llm_type_id, lt.name, lt.params, lt.costs_per_million_token
-    ORDER BY estimated_cost DESC
+    LEFT JOIN llm_evaluation_summary s ON lt.llm_type_id = s.llm_type_id
+    ORDER BY total_cost DESC
     """
     return get_paginated_query(query, None, page, page_size)
 
@@ -5,7 +5,13 @@ LLM评估模块
 
 import os
 import logging
-from typing import List, Dict, Tuple, Optional
+import threading
+from collections import deque
+from functools import partial
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Dict, Tuple, Optional
 from decimal import Decimal
 import json
 from datetime import datetime
@@ -15,14 +21,23 @@ from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from dotenv import load_dotenv
 
 # Local imports
 from database import (
-    get_connection, execute_query, 
-    get_paginated_query
+    get_connection, execute_query, execute_transaction,
+    get_paginated_query,
+    update_evaluation_summary_batch, add_parse_outcome_counts, EVALUATION_DIMENSIONS,
+    PARSE_OUTCOME_COLUMNS
 )
+from metadata_cache import get_llm_type, get_tag_id
+from batch_jobs import get_batch_provider, STATUS_COMPLETED, STATUS_FAILED
+from token_counter import count_tokens
+from llm_resilience import call_with_resilience, get_rate_limiter
+from sampling import StratifiedSampler, stratified_bootstrap_ci
+from text_preprocessor import preprocess_pair, MAX_QUESTION_TOKENS, MAX_ANSWER_TOKENS
+from model_registry import load_model_registry
+from mock_llm import MockChatModel
 
 # 加载环境变量
 load_dotenv()
@@ -31,32 +46,60 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 流式获取问答对时每页的数量
+PAIRS_PAGE_SIZE = int(os.getenv('PAIRS_PAGE_SIZE', '500'))
+
+# 多模型并发评估：每批问答对的数量（每批评估完成后统一写入数据库）及默认并发/限速
+FAN_OUT_WRITE_BATCH_SIZE = 50
+DEFAULT_MODEL_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+# 输出解析统计：内存中累计的解析次数达到该数量时写入 llm_evaluation_summary（每次评估运行结束时也会写入）
+PARSE_STATS_FLUSH_SIZE = 50
+
+# 级联评估：低成本模型的分数落在该区间（含边界）内时视为不确定，升级到高成本模型
+CASCADE_UNCERTAINTY_BAND = (60.0, 80.0)
+CASCADE_TIER_CHEAP = 1
+CASCADE_TIER_EXPENSIVE = 2
+
+# 批处理任务处于 ingesting 状态超过该时间（秒）未更新时，视为导入中断，允许其他会话重新抢占
+BATCH_JOB_INGEST_TIMEOUT_SECONDS = int(os.getenv('BATCH_JOB_INGEST_TIMEOUT_SECONDS', '1800'))
+
+# 标准问答对查询的列，顺序与 _row_to_pair 对应
+PAIR_COLUMNS = """
+            sp.pair_id,
+            sq.content as question,
+            sa.ans_content as answer,
+            t.name as tag,
+            sq.std_qs_id,
+            sa.ans_id"""
+
 class LLMEvaluator:
     """LLM评估器类"""
     
     def __init__(self):
         """初始化评估器"""
-        self.models = {
-            "GPT-4": self._init_gpt4,
-            "GPT-3.5-Turbo": self._init_gpt35,
-            "Claude-3-Opus": self._init_claude_opus,
-            "Claude-3-Sonnet": self._init_claude_sonnet
+        # 模型注册表：内置云端模型 + configs/llm_models.json 中配置的模型（如本地推理服务）
+        self.model_specs = load_model_registry()
+        self.models = {name: partial(self._create_model, name) for name in self.model_specs}
+        
+        # 模型参数和成本配置，新建 llm_type 记录及计算评估成本时使用；
+        # concurrency / rpm 为该模型的并发请求数和每分钟请求数上限
+        self.model_configs = {
+            name.lower(): {key: spec[key] for key in ('params', 'cost', 'concurrency', 'rpm')}
+            for name, spec in self.model_specs.items()
         }
         
-        # 评估标准提示模板
-        self.evaluation_prompt = PromptTemplate(
-            input_variables=["question", "answer", "criteria"],
-            template="""
-你是一个专业的问答质量评估专家。请评估以下问答对的质量。
-
-【问题】
-{question}
-
-【答案】
-{answer}
-
-【评估标准】
-{criteria}
+        # 发送前问题/答案的token预算，超出部分截断
+        self.max_question_tokens = MAX_QUESTION_TOKENS
+        self.max_answer_tokens = MAX_ANSWER_TOKENS
+        
+        # 评估提示分为静态前缀和可变后缀：
+        # 前缀（角色、评分维度、输出格式）对所有请求完全相同，作为系统消息放在最前面，
+        # 便于服务端前缀缓存命中（OpenAI 自动缓存，Claude 通过 cache_control 标记）；
+        # 后缀只包含每次变化的问题、答案和评估标准
+        self.evaluation_system_prompt = """
+你是一个专业的问答质量评估专家。请评估用户给出的问答对的质量。
 
 请从以下5个维度进行评分，每个维度给出0-100分的整数分数：
 
@@ -68,7 +111,7 @@ class LLMEvaluator:
 
 请严格按照以下JSON格式返回结果，不要添加任何其他文字：
 
-{{
+{
     "accuracy": 85,
     "completeness": 90,
     "clarity": 88,
@@ -76,59 +119,162 @@ class LLMEvaluator:
     "relevance": 92,
     "total_score": 88.4,
     "reasoning": "详细的评价理由说明..."
-}}
+}
 
 注意：total_score是五个维度分数的平均值。请确保JSON格式正确，字段名使用英文。
+"""
+        
+        self.evaluation_prompt = PromptTemplate(
+            input_variables=["question", "answer", "criteria"],
+            template="""
+【问题】
+{question}
+
+【答案】
+{answer}
+
+【评估标准】
+{criteria}
 """
         )
-    
-    def _init_gpt4(self) -> ChatOpenAI:
-        """初始化GPT-4模型"""
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY环境变量未设置")
         
-        return ChatOpenAI(
-            model="gpt-4",
-            temperature=0.3,
-            openai_api_key=api_key
+        # 多问答对批量评估提示：一次请求评估多个问答对，按 pair_id 返回JSON数组
+        self.batch_evaluation_system_prompt = """
+你是一个专业的问答质量评估专家。请分别评估用户给出的每个问答对的质量，各问答对之间相互独立。
+
+请对每个问答对从以下5个维度进行评分，每个维度给出0-100分的整数分数：
+
+1. 准确性 (accuracy)：答案是否正确回答了问题
+2. 完整性 (completeness)：答案是否完整，涵盖了问题的各个方面  
+3. 清晰度 (clarity)：答案表达是否清晰易懂
+4. 专业性 (professionalism)：答案是否体现了专业水准
+5. 相关性 (relevance)：答案与问题的相关程度
+
+请严格按照以下JSON数组格式返回结果，每个问答对一个对象，不要添加任何其他文字：
+
+[
+    {
+        "pair_id": 1,
+        "accuracy": 85,
+        "completeness": 90,
+        "clarity": 88,
+        "professionalism": 87,
+        "relevance": 92,
+        "total_score": 88.4,
+        "reasoning": "详细的评价理由说明..."
+    }
+]
+
+注意：pair_id必须与给出的问答对ID一致，total_score是五个维度分数的平均值。请确保JSON格式正确，字段名使用英文。
+"""
+        
+        self.batch_evaluation_prompt = PromptTemplate(
+            input_variables=["pairs", "criteria"],
+            template="""
+{pairs}
+
+【评估标准】
+{criteria}
+"""
         )
+        
+        # 结构化输出模式下的评估结果JSON Schema，由服务商的工具调用/结构化输出直接返回分数
+        evaluation_properties = {
+            "accuracy": {"type": "integer", "minimum": 0, "maximum": 100, "description": "准确性：答案是否正确回答了问题"},
+            "completeness": {"type": "integer", "minimum": 0, "maximum": 100, "description": "完整性：答案是否完整"},
+            "clarity": {"type": "integer", "minimum": 0, "maximum": 100, "description": "清晰度：答案表达是否清晰易懂"},
+            "professionalism": {"type": "integer", "minimum": 0, "maximum": 100, "description": "专业性：答案是否体现了专业水准"},
+            "relevance": {"type": "integer", "minimum": 0, "maximum": 100, "description": "相关性：答案与问题的相关程度"},
+            "total_score": {"type": "number", "description": "五个维度分数的平均值"},
+            "reasoning": {"type": "string", "description": "详细的评价理由说明"}
+        }
+        self.evaluation_schema = {
+            "title": "submit_evaluation",
+            "description": "提交问答对的质量评估结果",
+            "type": "object",
+            "properties": evaluation_properties,
+            "required": list(evaluation_properties)
+        }
+        self.batch_evaluation_schema = {
+            "title": "submit_batch_evaluation",
+            "description": "提交多个问答对的质量评估结果，每个问答对一项",
+            "type": "object",
+            "properties": {
+                "evaluations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"pair_id": {"type": "integer"}, **evaluation_properties},
+                        "required": ["pair_id", *evaluation_properties]
+                    }
+                }
+            },
+            "required": ["evaluations"]
+        }
+        
+        # 尚未写入数据库的输出解析次数：model_name -> {'structured', 'text', 'failed'}
+        self.pending_parse_stats: Dict[str, Dict[str, int]] = {}
+        self._parse_stats_lock = threading.Lock()
     
-    def _init_gpt35(self) -> ChatOpenAI:
-        """初始化GPT-3.5模型"""
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY环境变量未设置")
+    def _create_model(self, model_name: str):
+        """按注册表中的模型定义创建模型实例"""
+        spec = self.model_specs[model_name]
+        api_key = os.getenv(spec['api_key_env']) if spec.get('api_key_env') else None
+        
+        if spec['provider'] == 'anthropic':
+            if not api_key:
+                raise ValueError(f"{spec['api_key_env']}环境变量未设置")
+            return ChatAnthropic(
+                model=spec['model'],
+                temperature=0.3,
+                anthropic_api_key=api_key,
+                # 重试由 llm_resilience 统一处理
+                max_retries=0,
+                # 启用提示前缀缓存，配合 _build_messages 中的 cache_control 标记
+                default_headers={"anthropic-beta": "prompt-caching-2024-07-31"}
+            )
+        
+        if spec['provider'] == 'mock':
+            return MockChatModel(model_name=spec['model'], **spec.get('mock', {}))
         
+        if spec['provider'] == 'openai_compatible':
+            # 本地推理服务通常不校验密钥，但客户端要求非空
+            return ChatOpenAI(
+                model=spec['model'],
+                temperature=0.3,
+                openai_api_key=api_key or "not-needed",
+                base_url=spec['base_url'],
+                max_retries=0
+            )
+        
+        if not api_key:
+            raise ValueError(f"{spec['api_key_env']}环境变量未设置")
         return ChatOpenAI(
-            model="gpt-3.5-turbo",
+            model=spec['model'],
             temperature=0.3,
-            openai_api_key=api_key
+            openai_api_key=api_key,
+            # 重试由 llm_resilience 统一处理
+            max_retries=0
         )
     
-    def _init_claude_opus(self) -> ChatAnthropic:
-        """初始化Claude-3 Opus模型"""
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY环境变量未设置")
-        
-        return ChatAnthropic(
-            model="claude-3-opus-20240229",
-            temperature=0.3,
-            anthropic_api_key=api_key
-        )
+    def _get_provider(self, model_name: str) -> str:
+        """模型所属的服务商：openai / anthropic / openai_compatible"""
+        spec = self.model_specs.get(model_name)
+        if spec:
+            return spec['provider']
+        return 'anthropic' if model_name.lower().startswith('claude') else 'openai'
     
-    def _init_claude_sonnet(self) -> ChatAnthropic:
-        """初始化Claude-3 Sonnet模型"""
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY环境变量未设置")
-        
-        return ChatAnthropic(
-            model="claude-3-sonnet-20240229",
-            temperature=0.3,
-            anthropic_api_key=api_key
-        )
+    def _get_endpoint(self, model_name: str) -> str:
+        """熔断器的划分键：兼容接口的模型按 base_url 区分，云端模型按服务商区分"""
+        spec = self.model_specs.get(model_name) or {}
+        return spec.get('base_url') or self._get_provider(model_name)
+    
+    def get_missing_api_key(self, model_name: str) -> Optional[str]:
+        """返回调用该模型所需但未设置的API密钥环境变量名，无需或已设置时返回None"""
+        spec = self.model_specs.get(model_name)
+        if not spec or spec['provider'] in ('openai_compatible', 'mock') or not spec.get('api_key_env'):
+            return None
+        return None if os.getenv(spec['api_key_env']) else spec['api_key_env']
     
     def get_available_models(self) -> List[str]:
         """获取可用的模型列表"""
@@ -152,154 +298,249 @@ class LLMEvaluator:
             logger.error(f"初始化模型 {model_name} 失败: {e}")
             raise
     
-    def get_standard_pairs(self, tag_filter: Optional[str] = None, 
-                          pair_id: Optional[int] = None,
-                          limit: Optional[int] = None) -> List[Dict]:
-        """获取标准问答对"""
+    def _build_pairs_query(self, tag_filter: Optional[str] = None,
+                           pair_id: Optional[int] = None,
+                           pair_ids: Optional[List[int]] = None,
+                           incremental_model: Optional[str] = None,
+                           select: str = PAIR_COLUMNS,
+                           cascade_cheap_model: Optional[str] = None) -> Optional[Tuple[str, List[str], List]]:
+        """
+        构造标准问答对查询的主体、过滤条件和参数
+        
+        cascade_cheap_model 用于级联评估的增量模式：除 incremental_model（高成本模型）的评估外，
+        该低成本模型在级联中直接采用（cascade_tier 为低成本层）的评估也视为已评估；
+        该模型单独运行或被升级前的评估不算在内
+
+        Returns:
+            (query, conditions, params)；筛选条件确定不会有结果（如标签不存在）时返回None
+        """
+        query = f"""
+        SELECT {select}
+        FROM standard_pair sp
+        JOIN standard_QS sq ON sp.std_qs_id = sq.std_qs_id
+        JOIN standard_ans sa ON sp.std_ans_id = sa.ans_id
+        JOIN tags t ON sq.tag_id = t.tag_id
+        """
+        conditions = []
+        params = []
         
         if pair_id:
             # 获取特定的问答对
-            query = """
-            SELECT 
-                sp.pair_id,
-                sq.content as question,
-                sa.ans_content as answer,
-                t.name as tag,
-                sq.std_qs_id,
-                sa.ans_id
-            FROM standard_pair sp
-            JOIN standard_QS sq ON sp.std_qs_id = sq.std_qs_id
-            JOIN standard_ans sa ON sp.std_ans_id = sa.ans_id
-            JOIN tags t ON sq.tag_id = t.tag_id
-            WHERE sp.pair_id = %s
-            """
-            success, result = execute_query(query, (pair_id,), fetch=True)
-            
-        elif tag_filter:
-            # 按标签筛选
-            query = """
-            SELECT 
-                sp.pair_id,
-                sq.content as question,
-                sa.ans_content as answer,
-                t.name as tag,
-                sq.std_qs_id,
-                sa.ans_id
-            FROM standard_pair sp
-            JOIN standard_QS sq ON sp.std_qs_id = sq.std_qs_id
-            JOIN standard_ans sa ON sp.std_ans_id = sa.ans_id
-            JOIN tags t ON sq.tag_id = t.tag_id
-            WHERE t.name = %s
-            """
-            params = (tag_filter,)
-            if limit:
-                query += " LIMIT %s"
-                params = (tag_filter, limit)
-            
-            success, result = execute_query(query, params, fetch=True)
-        else:
-            # 获取所有问答对
-            query = """
-            SELECT 
-                sp.pair_id,
-                sq.content as question,
-                sa.ans_content as answer,
-                t.name as tag,
-                sq.std_qs_id,
-                sa.ans_id
-            FROM standard_pair sp
-            JOIN standard_QS sq ON sp.std_qs_id = sq.std_qs_id
-            JOIN standard_ans sa ON sp.std_ans_id = sa.ans_id
-            JOIN tags t ON sq.tag_id = t.tag_id
-            """
-            if limit:
-                query += f" LIMIT {limit}"
-            
-            success, result = execute_query(query, fetch=True)
+            conditions.append("sp.pair_id = %s")
+            params.append(pair_id)
+        elif pair_ids is not None:
+            if not pair_ids:
+                return None
+            conditions.append(f"sp.pair_id IN ({', '.join(['%s'] * len(pair_ids))})")
+            params.extend(pair_ids)
+        
+        if tag_filter and not pair_id:
+            # 通过元数据缓存解析标签ID，直接使用 standard_QS 的 tag_id 索引过滤
+            tag_id = get_tag_id(tag_filter)
+            if tag_id is None:
+                logger.info(f"标签不存在: {tag_filter}")
+                return None
+            conditions.append("sq.tag_id = %s")
+            params.append(tag_id)
+        
+        if incremental_model:
+            # 模型尚无 llm_type 记录时说明从未评估过，不参与反连接；都没有记录时所有问答对都需要评估
+            matches = []
+            match_params = []
+            llm_type = get_llm_type(incremental_model)
+            if llm_type:
+                matches.append("le.llm_type_id = %s")
+                match_params.append(llm_type['llm_type_id'])
+            cheap_type = get_llm_type(cascade_cheap_model) if cascade_cheap_model else None
+            if cheap_type:
+                matches.append("(le.llm_type_id = %s AND le.cascade_tier = %s)")
+                match_params.extend([cheap_type['llm_type_id'], CASCADE_TIER_CHEAP])
+            if matches:
+                # 反连接走 idx_ans_type_date (std_ans_id, llm_type_id, evaluation_date) 索引
+                conditions.append(f"""
+                NOT EXISTS (
+                    SELECT 1 FROM llm_evaluation le
+                    WHERE le.std_ans_id = sa.ans_id
+                      AND ({' OR '.join(matches)})
+                      AND le.evaluation_date >= GREATEST(sq.updated_at, sa.updated_at)
+                )
+                """)
+                params.extend(match_params)
+        
+        return query, conditions, params
+    
+    @staticmethod
+    def _row_to_pair(row) -> Dict:
+        return {
+            'pair_id': row[0],
+            'question': row[1],
+            'answer': row[2],
+            'tag': row[3],
+            'std_qs_id': row[4],
+            'ans_id': row[5]
+        }
+    
+    def get_standard_pairs(self, tag_filter: Optional[str] = None, 
+                          pair_id: Optional[int] = None,
+                          limit: Optional[int] = None,
+                          pair_ids: Optional[List[int]] = None,
+                          incremental_model: Optional[str] = None) -> List[Dict]:
+        """
+        获取标准问答对
+        
+        Args:
+            tag_filter: 按标签名筛选
+            pair_id: 只获取指定的问答对
+            limit: 最大返回数量
+            pair_ids: 只获取指定的一组问答对（如死信列表重试）
+            incremental_model: 增量模式，只返回该模型尚未评估过、或问题/答案在最近一次
+                               评估之后有更新的问答对
+        """
+        
+        built = self._build_pairs_query(tag_filter, pair_id, pair_ids, incremental_model)
+        if built is None:
+            return []
+        query, conditions, params = built
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        if limit and not pair_id:
+            query += " LIMIT %s"
+            params.append(limit)
+        
+        success, result = execute_query(query, tuple(params), fetch=True)
         
         if not success:
             logger.error(f"获取标准问答对失败: {result}")
             return []
         
-        pairs = []
-        for row in result:
-            pairs.append({
-                'pair_id': row[0],
-                'question': row[1],
-                'answer': row[2],
-                'tag': row[3],
-                'std_qs_id': row[4],
-                'ans_id': row[5]
-            })
+        return [self._row_to_pair(row) for row in result]
+    
+    def iter_standard_pairs(self, tag_filter: Optional[str] = None,
+                            pair_id: Optional[int] = None,
+                            limit: Optional[int] = None,
+                            pair_ids: Optional[List[int]] = None,
+                            incremental_model: Optional[str] = None,
+                            page_size: int = PAIRS_PAGE_SIZE,
+                            after_pair_id: int = 0,
+                            cascade_cheap_model: Optional[str] = None) -> Iterator[Dict]:
+        """
+        逐页获取标准问答对的生成器，参数含义与 get_standard_pairs 相同
+        （cascade_cheap_model 见 _build_pairs_query）
         
-        return pairs
+        按 pair_id 键集分页（pair_id > 上一页最后一个ID），每次只在内存中保留一页，
+        第一页返回后即可开始评估，适合大规模问答对
+        """
+        built = self._build_pairs_query(tag_filter, pair_id, pair_ids, incremental_model,
+                                        cascade_cheap_model=cascade_cheap_model)
+        if built is None:
+            return
+        query, conditions, params = built
+        remaining = limit if limit and not pair_id else None
+        last_pair_id = after_pair_id
+        
+        while remaining is None or remaining > 0:
+            fetch_size = page_size if remaining is None else min(page_size, remaining)
+            page_query = (query + " WHERE " + " AND ".join(conditions + ["sp.pair_id > %s"])
+                          + " ORDER BY sp.pair_id LIMIT %s")
+            success, result = execute_query(page_query, tuple(params + [last_pair_id, fetch_size]),
+                                            fetch=True)
+            if not success:
+                logger.error(f"获取标准问答对失败: {result}")
+                return
+            
+            for row in result:
+                yield self._row_to_pair(row)
+            
+            if len(result) < fetch_size:
+                return
+            last_pair_id = result[-1][0]
+            if remaining is not None:
+                remaining -= len(result)
+    
+    def count_standard_pairs(self, tag_filter: Optional[str] = None,
+                             pair_id: Optional[int] = None,
+                             pair_ids: Optional[List[int]] = None,
+                             incremental_model: Optional[str] = None,
+                             after_pair_id: int = 0) -> int:
+        """统计符合条件的标准问答对数量（pair_id 大于 after_pair_id）"""
+        built = self._build_pairs_query(tag_filter, pair_id, pair_ids, incremental_model,
+                                        select="COUNT(*)")
+        if built is None:
+            return 0
+        query, conditions, params = built
+        query += " WHERE " + " AND ".join(conditions + ["sp.pair_id > %s"])
+        
+        success, result = execute_query(query, tuple(params + [after_pair_id]), fetch=True)
+        if not success:
+            logger.error(f"统计标准问答对失败: {result}")
+            return 0
+        return result[0][0]
     
     def evaluate_pair(self, model_name: str, question: str, answer: str, 
-                     criteria: str = "标准问答评估", temperature: float = 0.3) -> Dict:
-        """评估单个问答对"""
+                     criteria: str = "标准问答评估", temperature: float = 0.3,
+                     structured_output: bool = False) -> Dict:
+        """
+        评估单个问答对
+        
+        发送前先预处理问题和答案（去除HTML标记、合并空白、按token预算截断），
+        返回结果的 truncation 字段记录是否发生了截断；
+        structured_output 为True时通过服务商的结构化输出（工具调用）直接获取分数，
+        结构化结果缺失或不完整时回退为解析模型的文本输出
+        """
+        prepared = preprocess_pair(question, answer, self.max_question_tokens, self.max_answer_tokens)
+        eval_result = self._evaluate_prepared_pair(model_name, prepared['question'], prepared['answer'],
+                                                   criteria, temperature, structured_output)
+        eval_result['truncation'] = prepared['truncation']
+        return eval_result
+    
+    def _evaluate_prepared_pair(self, model_name: str, question: str, answer: str,
+                                criteria: str, temperature: float,
+                                structured_output: bool) -> Dict:
+        """评估单个已预处理的问答对"""
         
         try:
             # 初始化模型
             llm = self.init_model(model_name, temperature)
             
-            # 创建评估链
-            chain = LLMChain(llm=llm, prompt=self.evaluation_prompt)
+            # 静态前缀 + 可变后缀
+            messages = self._build_messages(
+                model_name,
+                self.evaluation_system_prompt,
+                self.evaluation_prompt.format(question=question, answer=answer, criteria=criteria)
+            )
+            
+            # 执行评估（瞬时错误自动退避重试）
+            parsed = None
+            if structured_output:
+                structured_llm = llm.with_structured_output(self.evaluation_schema, include_raw=True)
+                output = call_with_resilience(self._get_endpoint(model_name), structured_llm.invoke, messages)
+                response = output['raw']
+                parsed = output.get('parsed')
+            else:
+                response = call_with_resilience(self._get_endpoint(model_name), llm.invoke, messages)
             
-            # 执行评估
-            result = chain.run(
-                question=question,
-                answer=answer,
-                criteria=criteria
+            result = self._message_text(response)
+            usage = self._extract_usage(
+                response, messages, result or json.dumps(parsed or {}, ensure_ascii=False)
             )
             
-            logger.info(f"LLM原始输出: {result}")
+            logger.info(f"LLM原始输出: {result or parsed}")
             
-            # 解析结果
-            try:
-                # 清理和提取JSON部分
-                json_str = self._extract_json_from_response(result)
-                logger.info(f"提取的JSON字符串: {json_str}")
-                
-                evaluation = json.loads(json_str)
-                logger.info(f"解析后的JSON: {evaluation}")
-                
-                # 渲染到页面上
-                # st.write(json_str)
-                
-                # 验证和清理字段
-                evaluation = self._validate_and_clean_evaluation(evaluation)
-                
+            if isinstance(parsed, dict) and self._has_all_dimensions(parsed):
+                self._record_parse_outcome(model_name, 'structured')
                 return {
                     'success': True,
-                    'evaluation': evaluation,
-                    'raw_response': result
-                }
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON解析失败: {e}")
-                logger.error(f"尝试解析的JSON字符串: '{json_str}'")
-                logger.error(f"LLM完整原始输出: {result}")
-                
-                # 尝试使用正则表达式提取分数
-                fallback_evaluation = self._extract_scores_with_regex(result)
-                
-                return {
-                    'success': False,
-                    'error': f"JSON解析失败: {e}",
-                    'evaluation': fallback_evaluation,
-                    'raw_response': result
+                    'evaluation': self._validate_and_clean_evaluation(parsed),
+                    'raw_response': json.dumps(parsed, ensure_ascii=False),
+                    'usage': usage
                 }
             
-            except Exception as parse_error:
-                logger.error(f"解析过程出错: {parse_error}")
-                logger.error(f"LLM完整原始输出: {result}")
-                
-                return {
-                    'success': False,
-                    'error': f"解析错误: {parse_error}",
-                    'evaluation': self._get_default_evaluation(f"解析失败: {parse_error}"),
-                    'raw_response': result
-                }
+            # 结构化结果不可用时回退为文本解析
+            eval_result = self._parse_evaluation_response(result, usage)
+            self._record_parse_outcome(model_name, 'text' if eval_result['success'] else 'failed')
+            return eval_result
                 
         except Exception as e:
             logger.error(f"评估过程出错: {e}")
@@ -309,6 +550,422 @@ class LLMEvaluator:
                 'evaluation': self._get_default_evaluation(f"评估失败: {e}")
             }
     
+    def _parse_evaluation_response(self, result: str, usage: Optional[Dict] = None) -> Dict:
+        """解析单个问答对的模型输出，返回与 evaluate_pair 相同格式的评估结果"""
+        
+        # 解析结果
+        try:
+            # 清理和提取JSON部分
+            json_str = self._extract_json_from_response(result)
+            logger.info(f"提取的JSON字符串: {json_str}")
+            
+            evaluation = json.loads(json_str)
+            logger.info(f"解析后的JSON: {evaluation}")
+            
+            # 渲染到页面上
+            # st.write(json_str)
+            
+            # 验证和清理字段
+            evaluation = self._validate_and_clean_evaluation(evaluation)
+            
+            return {
+                'success': True,
+                'evaluation': evaluation,
+                'raw_response': result,
+                'usage': usage
+            }
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON解析失败: {e}")
+            logger.error(f"尝试解析的JSON字符串: '{json_str}'")
+            logger.error(f"LLM完整原始输出: {result}")
+            
+            # 尝试使用正则表达式提取分数
+            fallback_evaluation = self._extract_scores_with_regex(result)
+            
+            return {
+                'success': False,
+                'error': f"JSON解析失败: {e}",
+                'evaluation': fallback_evaluation,
+                'raw_response': result,
+                'usage': usage
+            }
+        
+        except Exception as parse_error:
+            logger.error(f"解析过程出错: {parse_error}")
+            logger.error(f"LLM完整原始输出: {result}")
+            
+            return {
+                'success': False,
+                'error': f"解析错误: {parse_error}",
+                'evaluation': self._get_default_evaluation(f"解析失败: {parse_error}"),
+                'raw_response': result,
+                'usage': usage
+            }
+    
+    def evaluate_pairs_batch(self, model_name: str, pairs: List[Dict],
+                             criteria: str = "标准问答评估", temperature: float = 0.3,
+                             structured_output: bool = False) -> Dict[int, Dict]:
+        """
+        在一次请求中评估多个问答对
+        
+        批量结果中缺失或无法解析的问答对会回退为单独调用 evaluate_pair
+        
+        Args:
+            model_name: 模型名称
+            pairs: 问答对列表，每项至少包含 pair_id、question、answer
+            criteria: 评估标准
+            temperature: 模型温度
+            structured_output: 是否使用服务商结构化输出
+            
+        Returns:
+            Dict[int, Dict]: pair_id -> 与 evaluate_pair 返回格式相同的评估结果
+        """
+        # 与 evaluate_pair 相同的预处理，批量请求及单独回退都使用预处理后的文本
+        truncations = {}
+        prepared_pairs = []
+        for pair in pairs:
+            prepared = preprocess_pair(pair['question'], pair['answer'],
+                                       self.max_question_tokens, self.max_answer_tokens)
+            truncations[pair['pair_id']] = prepared['truncation']
+            prepared_pairs.append({**pair, 'question': prepared['question'], 'answer': prepared['answer']})
+        
+        results = self._evaluate_prepared_pairs_batch(model_name, prepared_pairs, criteria, temperature,
+                                                      structured_output)
+        for pair_id, eval_result in results.items():
+            eval_result['truncation'] = truncations.get(pair_id)
+        return results
+    
+    def _evaluate_prepared_pairs_batch(self, model_name: str, pairs: List[Dict], criteria: str,
+                                       temperature: float, structured_output: bool) -> Dict[int, Dict]:
+        """在一次请求中评估多个已预处理的问答对"""
+        if len(pairs) == 1:
+            pair = pairs[0]
+            return {pair['pair_id']: self._evaluate_prepared_pair(
+                model_name, pair['question'], pair['answer'], criteria, temperature, structured_output
+            )}
+        
+        results = {}
+        usage = None
+        pair_blocks = {
+            pair['pair_id']: f"【问答对 pair_id={pair['pair_id']}】\n【问题】\n{pair['question']}\n【答案】\n{pair['answer']}"
+            for pair in pairs
+        }
+        # 是否收到了批量响应：只有收到响应但缺失或不完整的问答对才计为解析失败，
+        # 请求本身出错（网络、限流等）时由逐条评估记录解析结果
+        response_received = False
+        
+        try:
+            llm = self.init_model(model_name, temperature)
+            
+            pairs_text = "\n\n".join(pair_blocks.values())
+            messages = self._build_messages(
+                model_name,
+                self.batch_evaluation_system_prompt,
+                self.batch_evaluation_prompt.format(pairs=pairs_text, criteria=criteria)
+            )
+            items = None
+            if structured_output:
+                structured_llm = llm.with_structured_output(self.batch_evaluation_schema, include_raw=True)
+                output = call_with_resilience(self._get_endpoint(model_name), structured_llm.invoke, messages)
+                response = output['raw']
+                parsed = output.get('parsed')
+                if isinstance(parsed, dict) and isinstance(parsed.get('evaluations'), list):
+                    items = [item for item in parsed['evaluations'] if isinstance(item, dict)]
+            else:
+                response = call_with_resilience(self._get_endpoint(model_name), llm.invoke, messages)
+            response_received = True
+            
+            text = self._message_text(response)
+            usage = self._extract_usage(
+                response, messages, text or json.dumps(items or [], ensure_ascii=False)
+            )
+            logger.info(f"批量评估LLM原始输出: {text or items}")
+            
+            parse_method = 'structured'
+            if items is None:
+                # 结构化结果不可用时回退为文本解析
+                items = self._parse_batch_response(text)
+                parse_method = 'text'
+            
+            pair_ids = {pair['pair_id'] for pair in pairs}
+            for item in items:
+                pair_id = self._safe_int_convert(item.get('pair_id'))
+                if pair_id not in pair_ids or pair_id in results:
+                    continue
+                if not self._has_all_dimensions(item):
+                    logger.warning(f"批量评估结果字段不完整 - Pair ID: {pair_id}")
+                    continue
+                
+                results[pair_id] = {
+                    'success': True,
+                    'evaluation': self._validate_and_clean_evaluation(item),
+                    # 只保存该问答对自己的评估结果，避免每条记录重复存储整个批量响应
+                    'raw_response': json.dumps(item, ensure_ascii=False)
+                }
+                self._record_parse_outcome(model_name, parse_method)
+                
+        except Exception as e:
+            logger.error(f"批量评估过程出错，回退为逐条评估: {e}")
+        
+        # 整批请求的用量分摊到每个问答对上，各问答对之和等于整批用量
+        usage_shares = self._split_batch_usage(
+            usage, pair_blocks,
+            {pair_id: eval_result['raw_response'] for pair_id, eval_result in results.items()}
+        ) if usage is not None else {}
+        for pair_id, eval_result in results.items():
+            eval_result['usage'] = usage_shares.get(pair_id)
+        
+        # 批量结果中缺失或无效的问答对单独评估，其分摊的批量用量并入单独评估的用量
+        for pair in pairs:
+            if pair['pair_id'] not in results:
+                logger.info(f"回退为单独评估 - Pair ID: {pair['pair_id']}")
+                if response_received:
+                    self._record_parse_outcome(model_name, 'failed')
+                eval_result = self._evaluate_prepared_pair(
+                    model_name, pair['question'], pair['answer'], criteria, temperature, structured_output
+                )
+                share = usage_shares.get(pair['pair_id'])
+                if share:
+                    eval_result['usage'] = {
+                        key: value + (eval_result.get('usage') or {}).get(key, 0)
+                        for key, value in share.items()
+                    }
+                results[pair['pair_id']] = eval_result
+        
+        return results
+    
+    @staticmethod
+    def _split_total(total: int, weights: List[float]) -> List[int]:
+        """按权重把整数总量拆分，权重全为0时平均拆分；取整余数记在第一项，各项之和等于总量"""
+        if not weights:
+            return []
+        weight_sum = sum(weights)
+        if weight_sum <= 0:
+            weights, weight_sum = [1] * len(weights), len(weights)
+        shares = [int(total * weight // weight_sum) for weight in weights]
+        shares[0] += total - sum(shares)
+        return shares
+    
+    def _split_batch_usage(self, usage: Dict, pair_blocks: Dict[int, str],
+                           outputs: Dict[int, str]) -> Dict[int, Dict]:
+        """
+        将一次批量请求的用量分摊到请求中的各问答对
+        
+        输入token：每个问答对计入自身文本的token数，其余（系统提示、评估标准等共享部分）平均分摊，
+        本地估算的自身token数超过实际输入token时改为按自身token数比例分摊；缓存token属于共享前缀，平均分摊；
+        输出token按各问答对评估结果的长度比例分摊（没有解析出结果的问答对不分摊输出）；
+        请求数记在第一个问答对上
+        """
+        pair_ids = list(pair_blocks)
+        own_tokens = [count_tokens(pair_blocks[pair_id]) for pair_id in pair_ids]
+        equal = [1] * len(pair_ids)
+        if sum(own_tokens) <= usage['prompt_tokens']:
+            prompt_shares = [own + shared for own, shared in zip(
+                own_tokens, self._split_total(usage['prompt_tokens'] - sum(own_tokens), equal)
+            )]
+        else:
+            prompt_shares = self._split_total(usage['prompt_tokens'], own_tokens)
+        
+        splits = {
+            'prompt_tokens': prompt_shares,
+            'completion_tokens': self._split_total(
+                usage['completion_tokens'], [len(outputs.get(pair_id, '')) for pair_id in pair_ids]
+            ),
+            'cache_read_tokens': self._split_total(usage['cache_read_tokens'], equal),
+            'cache_creation_tokens': self._split_total(usage['cache_creation_tokens'], equal),
+            'requests': self._split_total(usage['requests'], [1] + [0] * (len(pair_ids) - 1)),
+        }
+        return {
+            pair_id: {key: shares[index] for key, shares in splits.items()}
+            for index, pair_id in enumerate(pair_ids)
+        }
+    
+    def _record_parse_outcome(self, model_name: str, method: str):
+        """
+        记录一次输出解析结果，累计达到 PARSE_STATS_FLUSH_SIZE 次时写入数据库
+        
+        method: structured（结构化输出直接可用）/ text（文本解析成功）/ failed（解析失败）
+        """
+        with self._parse_stats_lock:
+            stats = self.pending_parse_stats.setdefault(
+                model_name, {outcome: 0 for outcome in PARSE_OUTCOME_COLUMNS}
+            )
+            stats[method] += 1
+            pending = sum(sum(counts.values()) for counts in self.pending_parse_stats.values())
+        
+        if pending >= PARSE_STATS_FLUSH_SIZE:
+            self.flush_parse_statistics()
+    
+    def flush_parse_statistics(self):
+        """将内存中累计的输出解析次数写入 llm_evaluation_summary，写入失败时保留到下次"""
+        with self._parse_stats_lock:
+            pending, self.pending_parse_stats = self.pending_parse_stats, {}
+        if not pending:
+            return
+        
+        try:
+            counts = {self._get_or_create_llm_type(model_name): stats for model_name, stats in pending.items()}
+            success, message = add_parse_outcome_counts(counts)
+        except Exception as e:
+            success, message = False, str(e)
+        
+        if not success:
+            logger.error(f"写入输出解析统计失败: {message}")
+            with self._parse_stats_lock:
+                for model_name, stats in pending.items():
+                    current = self.pending_parse_stats.setdefault(
+                        model_name, {outcome: 0 for outcome in PARSE_OUTCOME_COLUMNS}
+                    )
+                    for outcome, count in stats.items():
+                        current[outcome] += count
+    
+    def get_parse_statistics(self) -> List[Dict]:
+        """获取各模型的输出解析统计及解析失败率（数据库中的累计次数加上尚未写入的次数）"""
+        columns = list(PARSE_OUTCOME_COLUMNS.values())
+        success, rows = execute_query(
+            f"""
+            SELECT lt.name, {', '.join(f's.{col}' for col in columns)}
+            FROM llm_evaluation_summary s
+            JOIN llm_type lt ON s.llm_type_id = lt.llm_type_id
+            WHERE {' + '.join(f's.{col}' for col in columns)} > 0
+            ORDER BY lt.name
+            """,
+            fetch=True
+        )
+        if not success:
+            logger.error(f"获取输出解析统计失败: {rows}")
+            rows = []
+        
+        # 模型名称与 llm_type 一样不区分大小写
+        totals = {}
+        for row in rows:
+            totals[row[0].casefold()] = {'model_name': row[0], **dict(zip(PARSE_OUTCOME_COLUMNS, row[1:]))}
+        with self._parse_stats_lock:
+            for model_name, stats in self.pending_parse_stats.items():
+                entry = totals.setdefault(model_name.casefold(), {
+                    'model_name': model_name, **{outcome: 0 for outcome in PARSE_OUTCOME_COLUMNS}
+                })
+                for outcome, count in stats.items():
+                    entry[outcome] += count
+        
+        statistics = []
+        for entry in totals.values():
+            total = sum(entry[outcome] for outcome in PARSE_OUTCOME_COLUMNS)
+            statistics.append({
+                'model_name': entry['model_name'],
+                'total': total,
+                **{outcome: entry[outcome] for outcome in PARSE_OUTCOME_COLUMNS},
+                'failure_rate': entry['failed'] / total if total else 0.0
+            })
+        return statistics
+    
+    def _build_messages(self, model_name: str, system_prompt: str, user_prompt: str) -> List:
+        """
+        构造静态前缀（系统消息）+ 可变后缀（用户消息）的消息列表
+        
+        Claude 模型在系统消息上标记 cache_control，使服务端缓存前缀；
+        OpenAI 模型对相同前缀自动缓存，无需额外标记。前缀长度低于服务端
+        最小缓存长度时请求照常处理，只是不会命中缓存
+        """
+        if self._get_provider(model_name) == 'anthropic':
+            system_message = SystemMessage(content=[{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }])
+        else:
+            system_message = SystemMessage(content=system_prompt)
+        
+        return [system_message, HumanMessage(content=user_prompt)]
+    
+    def _extract_usage(self, response, messages: List, output_text: str) -> Dict:
+        """
+        从模型响应中提取token用量和前缀缓存命中情况
+        
+        服务商未返回用量时，用本地分词器根据请求和输出文本估算
+        """
+        metadata = getattr(response, 'response_metadata', None) or {}
+        usage_metadata = getattr(response, 'usage_metadata', None) or {}
+        
+        # Anthropic: usage.cache_read_input_tokens / cache_creation_input_tokens
+        anthropic_usage = metadata.get('usage') or {}
+        # OpenAI: token_usage.prompt_tokens_details.cached_tokens
+        openai_usage = metadata.get('token_usage') or {}
+        prompt_details = openai_usage.get('prompt_tokens_details') or {}
+        
+        prompt_tokens = usage_metadata.get('input_tokens')
+        completion_tokens = usage_metadata.get('output_tokens')
+        if prompt_tokens is None:
+            prompt_tokens = sum(count_tokens(self._message_text(message)) for message in messages)
+        if completion_tokens is None:
+            completion_tokens = count_tokens(output_text)
+        
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cache_read_tokens': (anthropic_usage.get('cache_read_input_tokens') or
+                                  prompt_details.get('cached_tokens') or 0),
+            'cache_creation_tokens': anthropic_usage.get('cache_creation_input_tokens') or 0,
+            # API请求数：批量请求分摊到各问答对时只记在第一个问答对上
+            'requests': 1
+        }
+    
+    def _message_text(self, message) -> str:
+        """获取消息的纯文本内容（兼容带 cache_control 的内容块列表）"""
+        if isinstance(message.content, list):
+            return "".join(block.get('text', '') for block in message.content if isinstance(block, dict))
+        return message.content
+    
+    def _calculate_cost(self, model_name: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """按 llm_type 中的每百万token单价计算成本，记录不存在时使用内置配置"""
+        llm_type = get_llm_type(model_name)
+        if llm_type and llm_type['costs_per_million_token'] is not None:
+            price = float(llm_type['costs_per_million_token'])
+        else:
+            price = self.model_configs.get(model_name.lower(), {"cost": 0.0})["cost"]
+        return (prompt_tokens + completion_tokens) * price / 1000000
+    
+    def _parse_batch_response(self, response: str) -> List[Dict]:
+        """从批量评估响应中解析评估对象列表，解析失败时返回空列表"""
+        
+        if "```" in response:
+            for part in response.split("```"):
+                part = part.strip()
+                if part.startswith("json"):
+                    part = part[4:].strip()
+                if part.startswith("["):
+                    response = part
+                    break
+        
+        start_idx = response.find("[")
+        end_idx = response.rfind("]")
+        if start_idx == -1 or end_idx <= start_idx:
+            logger.error("批量评估响应中未找到JSON数组")
+            return []
+        
+        try:
+            items = json.loads(response[start_idx:end_idx + 1])
+        except json.JSONDecodeError as e:
+            logger.error(f"批量评估JSON解析失败: {e}")
+            return []
+        
+        if not isinstance(items, list):
+            return []
+        return [item for item in items if isinstance(item, dict)]
+    
+    def _has_all_dimensions(self, evaluation: Dict) -> bool:
+        """检查评估结果是否包含全部五个维度的分数"""
+        keys = {str(key).strip().lower() for key in evaluation}
+        return all(dim in keys for dim in EVALUATION_DIMENSIONS)
+    
+    def _safe_int_convert(self, value) -> Optional[int]:
+        """安全地转换值为整数，失败时返回None"""
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return None
+    
     def _extract_json_from_response(self, response: str) -> str:
         """从LLM响应中提取JSON字符串"""
         
@@ -446,28 +1103,97 @@ class LLMEvaluator:
     
     def save_evaluation_result(self, pair_id: int, ans_id: int, 
                               model_name: str, evaluation: Dict,
-                              llm_answer: str = "") -> bool:
-        """保存评估结果到数据库"""
+                              llm_answer: str = "",
+                              usage: Optional[Dict] = None,
+                              truncation: Optional[Dict] = None) -> bool:
+        """
+        保存评估结果到数据库
+        
+        usage 为该次评估的token用量（prompt_tokens、completion_tokens），
+        提供时按模型单价计算成本一并保存；
+        truncation 为预处理时问题/答案是否被截断（question_truncated、answer_truncated）
+        """
+        
+        success = self.save_evaluation_results([{
+            'pair_id': pair_id,
+            'ans_id': ans_id,
+            'model_name': model_name,
+            'evaluation': evaluation,
+            'llm_answer': llm_answer,
+            'usage': usage,
+            'truncation': truncation
+        }])
+        if success:
+            logger.info(f"评估结果已保存 - Pair ID: {pair_id}, 分数: {evaluation['total_score']}")
+        return success
+    
+    def save_evaluation_results(self, records: List[Dict]) -> bool:
+        """
+        在一个事务中批量保存评估结果，并按模型类型累加汇总统计
+        
+        Args:
+            records: [{'pair_id', 'ans_id', 'model_name', 'evaluation', 'llm_answer', 'usage',
+                       'truncation'}, ...]，级联评估的记录另含 cascade_tier
+        """
+        if not records:
+            return True
         
         try:
-            # 首先获取或创建LLM类型记录
-            llm_type_id = self._get_or_create_llm_type(model_name)
+            rows = []
+            summary_entries = []
+            for record in records:
+                model_name = record['model_name']
+                # 首先获取或创建LLM类型记录
+                llm_type_id = self._get_or_create_llm_type(model_name)
+                evaluation = record['evaluation']
+                # 与 llm_score DECIMAL(5,2) 精度一致，保证汇总表与明细表可对账
+                score = self._to_score_decimal(evaluation['total_score'])
+                dimension_scores = {
+                    dim: self._to_score_decimal(evaluation.get(dim, 0))
+                    for dim in EVALUATION_DIMENSIONS
+                }
+                
+                usage = record.get('usage')
+                truncation = record.get('truncation')
+                token_usage = None
+                if usage and usage.get('prompt_tokens') is not None:
+                    token_usage = {
+                        'prompt_tokens': usage['prompt_tokens'],
+                        'completion_tokens': usage.get('completion_tokens') or 0,
+                    }
+                    token_usage['cost_usd'] = Decimal(str(self._calculate_cost(
+                        model_name, token_usage['prompt_tokens'], token_usage['completion_tokens']
+                    ))).quantize(Decimal('0.000001'))
+                
+                rows.append((
+                    record.get('llm_answer', ''), llm_type_id, record['ans_id'], score,
+                    *dimension_scores.values(),
+                    *((token_usage[key] for key in ('prompt_tokens', 'completion_tokens', 'cost_usd'))
+                      if token_usage else (None, None, None)),
+                    record.get('cascade_tier'),
+                    *((truncation['question_truncated'], truncation['answer_truncated'])
+                      if truncation else (None, None))
+                ))
+                summary_entries.append((llm_type_id, score, dimension_scores, token_usage))
             
-            # 插入评估记录
-            eval_query = """
+            # 插入评估记录（总分及各维度分数），并在同一事务中累加模型汇总统计
+            dimension_columns = ", ".join(f"{dim}_score" for dim in EVALUATION_DIMENSIONS)
+            eval_query = f"""
             INSERT INTO llm_evaluation 
-            (llm_answer, llm_type_id, std_ans_id, llm_score)
-            VALUES (%s, %s, %s, %s)
+            (llm_answer, llm_type_id, std_ans_id, llm_score, {dimension_columns},
+             prompt_tokens, completion_tokens, cost_usd, cascade_tier, question_truncated, answer_truncated)
+            VALUES (%s, %s, %s, %s, {", ".join(["%s"] * len(EVALUATION_DIMENSIONS))}, %s, %s, %s, %s, %s, %s)
             """
             
-            success, result = execute_query(
-                eval_query,
-                (llm_answer, llm_type_id, ans_id, 
-                 Decimal(str(evaluation['total_score'])))
-            )
+            def insert_evaluations(cursor):
+                # executemany 会将 INSERT ... VALUES 合并为一条多行插入语句
+                cursor.executemany(eval_query, rows)
+                update_evaluation_summary_batch(cursor, summary_entries)
+                return len(rows)
+            
+            success, result = execute_transaction(insert_evaluations)
             
             if success:
-                logger.info(f"评估结果已保存 - Pair ID: {pair_id}, 分数: {evaluation['total_score']}")
                 return True
             else:
                 logger.error(f"保存评估结果失败: {result}")
@@ -477,43 +1203,39 @@ class LLMEvaluator:
             logger.error(f"保存评估结果出错: {e}")
             return False
     
+    @staticmethod
+    def _to_score_decimal(value) -> Decimal:
+        """将分数限制在0-100并转换为两位小数，与 DECIMAL(5,2) 列一致"""
+        score = min(max(float(value or 0), 0.0), 100.0)
+        return Decimal(str(score)).quantize(Decimal('0.01'))
+    
     def _get_or_create_llm_type(self, model_name: str) -> int:
         """获取或创建LLM类型记录"""
         
-        # 模型参数和成本配置
-        model_configs = {
-            "gpt-4": {"params": 1000000000000, "cost": 30.0},  # 1T参数，$30/1M tokens
-            "gpt-3.5-turbo": {"params": 175000000000, "cost": 0.5},  # 175B参数，$0.5/1M tokens
-            "claude-3-opus": {"params": 500000000000, "cost": 15.0},  # 估计500B参数，$15/1M tokens
-            "claude-3-sonnet": {"params": 200000000000, "cost": 3.0}  # 估计200B参数，$3/1M tokens
-        }
-        
-        config = model_configs.get(model_name, {"params": 0, "cost": 0.0})
+        config = self.model_configs.get(model_name.lower(), {"params": 0, "cost": 0.0})
         
-        # 检查是否已存在
-        check_query = "SELECT llm_type_id FROM llm_type WHERE name = %s"
-        success, result = execute_query(check_query, (model_name,), fetch=True)
-        
-        if success and result:
-            return result[0][0]
+        # 优先从进程级元数据缓存中查找
+        llm_type = get_llm_type(model_name)
+        if llm_type:
+            return llm_type['llm_type_id']
         
-        # 创建新记录
+        # 创建新记录；并发创建同名记录时通过 LAST_INSERT_ID(expr) 返回已有ID
         insert_query = """
         INSERT INTO llm_type (name, params, costs_per_million_token)
         VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE llm_type_id = LAST_INSERT_ID(llm_type_id)
         """
         
-        success, result = execute_query(
-            insert_query,
-            (model_name, config["params"], Decimal(str(config["cost"])))
-        )
+        def create_llm_type(cursor):
+            cursor.execute(
+                insert_query,
+                (model_name, config["params"], Decimal(str(config["cost"])))
+            )
         
-        if success:
-            # 获取新插入的ID
-            get_id_query = "SELECT LAST_INSERT_ID()"
-            success, result = execute_query(get_id_query, fetch=True)
-            if success and result:
-                return result[0][0]
+        success, result = execute_transaction(create_llm_type)
+        
+        if success and result:
+            return result
         
         raise Exception(f"无法创建LLM类型记录: {model_name}")
     
@@ -522,111 +1244,1090 @@ class LLMEvaluator:
                       pair_id: Optional[int] = None,
                       limit: Optional[int] = None,
                       criteria: str = "标准问答评估",
-                      temperature: float = 0.3) -> Dict:
-        """批量评估标准问答对"""
+                      temperature: float = 0.3,
+                      pairs_per_request: int = 1,
+                      max_cost: Optional[float] = None,
+                      max_tokens: Optional[int] = None,
+                      pair_ids: Optional[List[int]] = None,
+                      structured_output: bool = False,
+                      incremental: bool = False,
+                      sample_size: Optional[int] = None,
+                      target_ci_width: Optional[float] = None,
+                      sample_seed: Optional[int] = None,
+                      confidence: float = 0.95) -> Dict:
+        """
+        批量评估标准问答对
         
-        logger.info(f"开始批量评估 - 模型: {model_name}, 温度: {temperature}")
+        sample_size 不为空时进入抽样模式（见 _sampled_evaluate），只评估按标签分层随机抽取的问答对；
+        incremental 为True时只评估该模型尚未评估或评估后有更新的问答对；
+        pairs_per_request 大于1时，每次API请求打包评估多个问答对；
+        structured_output 为True时使用服务商结构化输出获取分数；
+        max_cost（美元）/ max_tokens 为本次运行的预算，累计用量达到预算后
+        不再发起新请求，已完成的评估照常保存。
+        评估失败的问答对记入死信列表，可通过 retry_dead_letters 单独重试
+        """
         
-        # 获取问答对
-        pairs = self.get_standard_pairs(tag_filter, pair_id, limit)
+        if sample_size:
+            return self._sampled_evaluate(model_name, tag_filter, sample_size, target_ci_width,
+                                          sample_seed, confidence, criteria=criteria,
+                                          temperature=temperature, pairs_per_request=pairs_per_request,
+                                          max_cost=max_cost, max_tokens=max_tokens,
+                                          structured_output=structured_output)
         
-        if not pairs:
-            return {
-                'success': False,
-                'message': '没有找到需要评估的问答对',
-                'results': []
-            }
+        pairs_per_request = max(1, pairs_per_request)
+        logger.info(f"开始批量评估 - 模型: {model_name}, 温度: {temperature}, "
+                    f"每次请求问答对数: {pairs_per_request}")
+        
+        # 逐页获取问答对，拿到第一页即开始评估
+        incremental_model = model_name if incremental else None
+        pair_iter = self.iter_standard_pairs(tag_filter, pair_id, limit, pair_ids, incremental_model)
         
         results = []
+        # 本次运行失败的问答对（pair_id -> 错误信息）及成功保存的问答对
+        failed_pairs = {}
+        succeeded_pairs = []
         success_count = 0
         fail_count = 0
+        # 前缀缓存统计：API请求数、命中缓存的请求数、缓存读取/写入的输入token数
+        cache_stats = {'requests': 0, 'cache_hits': 0, 'cache_read_tokens': 0, 'cache_creation_tokens': 0}
+        # 本次运行的累计用量（包括解析失败的请求）
+        token_usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0}
+        budget_exceeded = False
+        processed_count = 0
+        skipped_count = 0
         
-        for i, pair in enumerate(pairs):
-            logger.info(f"评估进度: {i+1}/{len(pairs)} - Pair ID: {pair['pair_id']}")
-            
+        config = self.model_configs.get(model_name.lower(), {})
+        concurrency = max(1, config.get('concurrency', 1))
+        limiter = get_rate_limiter(model_name, config.get('rpm', 0))
+        
+        def evaluate_chunk(chunk):
+            limiter.acquire()
             try:
-                # 评估问答对
-                eval_result = self.evaluate_pair(
-                    model_name, 
-                    pair['question'], 
-                    pair['answer'], 
-                    criteria,
-                    temperature
-                )
+                # 评估问答对（多个问答对合并为一次请求）
+                return self.evaluate_pairs_batch(model_name, chunk, criteria, temperature,
+                                                 structured_output)
+            except Exception as e:
+                logger.error(f"评估Pair ID {[pair['pair_id'] for pair in chunk]}时出错: {e}")
+                return {}
+        
+        def handle_chunk(chunk, chunk_results):
+            nonlocal success_count, fail_count
+            for pair in chunk:
+                eval_result = chunk_results.get(pair['pair_id'], {
+                    'success': False,
+                    'error': '评估失败',
+                    'evaluation': self._get_default_evaluation('评估失败')
+                })
                 
-                if eval_result['success']:
-                    # 保存评估结果
-                    save_success = self.save_evaluation_result(
-                        pair['pair_id'],
-                        pair['ans_id'],
-                        model_name,
-                        eval_result['evaluation'],
-                        eval_result.get('raw_response', '')
+                usage = eval_result.get('usage')
+                if usage:
+                    cache_stats['requests'] += usage['requests']
+                    cache_stats['cache_hits'] += usage['requests'] if usage['cache_read_tokens'] else 0
+                    cache_stats['cache_read_tokens'] += usage['cache_read_tokens']
+                    cache_stats['cache_creation_tokens'] += usage['cache_creation_tokens']
+                    token_usage['prompt_tokens'] += usage['prompt_tokens']
+                    token_usage['completion_tokens'] += usage['completion_tokens']
+                    token_usage['cost_usd'] += self._calculate_cost(
+                        model_name, usage['prompt_tokens'], usage['completion_tokens']
                     )
-                    
-                    if save_success:
-                        success_count += 1
+                
+                try:
+                    if eval_result['success']:
+                        # 保存评估结果
+                        save_success = self.save_evaluation_result(
+                            pair['pair_id'],
+                            pair['ans_id'],
+                            model_name,
+                            eval_result['evaluation'],
+                            eval_result.get('raw_response', ''),
+                            usage,
+                            eval_result.get('truncation')
+                        )
+                        
+                        if save_success:
+                            success_count += 1
+                            succeeded_pairs.append(pair['pair_id'])
+                        else:
+                            fail_count += 1
+                            failed_pairs[pair['pair_id']] = '保存评估结果失败'
                     else:
                         fail_count += 1
-                else:
+                        failed_pairs[pair['pair_id']] = eval_result.get('error', '评估失败')
+                    
+                    results.append({
+                        'pair_id': pair['pair_id'],
+                        'question': pair['question'][:100] + '...' if len(pair['question']) > 100 else pair['question'],
+                        'score': eval_result['evaluation']['total_score'],
+                        'answer': pair['answer'],
+                        'success': eval_result['success'],
+                        'error': eval_result.get('error', '')
+                    })
+                    
+                except Exception as e:
+                    logger.error(f"评估Pair ID {pair['pair_id']}时出错: {e}")
                     fail_count += 1
+                    failed_pairs[pair['pair_id']] = str(e)
+                    
+                    results.append({
+                        'pair_id': pair['pair_id'],
+                        'question': pair['question'][:100] + '...' if len(pair['question']) > 100 else pair['question'],
+                        'score': 0,
+                        'success': False,
+                        'error': str(e)
+                    })
+        
+        # 按模型配置的并发数同时发出多个请求，结果按提交顺序在当前线程处理和保存；
+        # 预算只统计已完成的请求，并发时最多可能多出 concurrency - 1 个进行中的请求
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"eval-{model_name}") as executor:
+            while True:
+                chunk = list(islice(pair_iter, pairs_per_request))
+                if not chunk:
+                    break
                 
-                results.append({
+                if ((max_cost is not None and token_usage['cost_usd'] >= max_cost) or
+                        (max_tokens is not None and
+                         token_usage['prompt_tokens'] + token_usage['completion_tokens'] >= max_tokens)):
+                    budget_exceeded = True
+                    logger.warning(f"已达到运行预算，停止评估 - 已用token: "
+                                   f"{token_usage['prompt_tokens'] + token_usage['completion_tokens']}, "
+                                   f"已用成本: ${token_usage['cost_usd']:.4f}")
+                    # 剩余问答对只统计数量，不再读取内容
+                    pair_iter.close()
+                    skipped_count = self.count_standard_pairs(
+                        tag_filter, pair_id, pair_ids, incremental_model,
+                        after_pair_id=chunk[-1]['pair_id']
+                    ) + len(chunk)
+                    if limit and not pair_id:
+                        skipped_count = min(skipped_count, limit - processed_count)
+                    break
+                
+                processed_count += len(chunk)
+                logger.info(f"评估进度: {processed_count} - "
+                            f"Pair ID: {', '.join(str(pair['pair_id']) for pair in chunk)}")
+                
+                in_flight.append((chunk, executor.submit(evaluate_chunk, chunk)))
+                if len(in_flight) >= concurrency:
+                    done_chunk, future = in_flight.popleft()
+                    handle_chunk(done_chunk, future.result())
+            
+            while in_flight:
+                done_chunk, future = in_flight.popleft()
+                handle_chunk(done_chunk, future.result())
+        
+        self.flush_parse_statistics()
+        
+        if processed_count + skipped_count == 0:
+            return {
+                'success': False,
+                'message': '没有需要评估的新增或变更问答对' if incremental else '没有找到需要评估的问答对',
+                'results': []
+            }
+        
+        self._update_dead_letters(model_name, failed_pairs, succeeded_pairs)
+        
+        message = f'评估完成 - 成功: {success_count}, 失败: {fail_count}'
+        if budget_exceeded:
+            message += f'，已达到运行预算，跳过 {skipped_count} 个问答对'
+        logger.info(f"批量评估完成 - 成功: {success_count}, 失败: {fail_count}, 跳过: {skipped_count}")
+        
+        return {
+            'success': True,
+            'message': message,
+            'total_pairs': processed_count + skipped_count,
+            'success_count': success_count,
+            'fail_count': fail_count,
+            'skipped_count': skipped_count,
+            'budget_exceeded': budget_exceeded,
+            'token_usage': token_usage,
+            'cache_stats': cache_stats,
+            'results': results
+        }
+    
+    def _get_pair_strata(self, tag_filter: Optional[str] = None) -> Tuple[Dict[int, List[int]], Dict[int, str]]:
+        """
+        按标签分层获取全部问答对ID
+        
+        Returns:
+            (tag_id -> pair_id 列表, tag_id -> 标签名)
+        """
+        query = """
+        SELECT sp.pair_id, t.tag_id, t.name
+        FROM standard_pair sp
+        JOIN standard_QS sq ON sp.std_qs_id = sq.std_qs_id
+        JOIN tags t ON sq.tag_id = t.tag_id
+        """
+        params = ()
+        if tag_filter:
+            tag_id = get_tag_id(tag_filter)
+            if tag_id is None:
+                logger.info(f"标签不存在: {tag_filter}")
+                return {}, {}
+            query += " WHERE sq.tag_id = %s"
+            params = (tag_id,)
+        
+        success, result = execute_query(query, params, fetch=True)
+        if not success:
+            logger.error(f"获取问答对分层信息失败: {result}")
+            return {}, {}
+        
+        strata = {}
+        tag_names = {}
+        for pair_id, tag_id, tag_name in result:
+            strata.setdefault(tag_id, []).append(pair_id)
+            tag_names[tag_id] = tag_name
+        return strata, tag_names
+    
+    def _sampled_evaluate(self, model_name: str, tag_filter: Optional[str], sample_size: int,
+                          target_ci_width: Optional[float] = None,
+                          sample_seed: Optional[int] = None,
+                          confidence: float = 0.95,
+                          max_cost: Optional[float] = None,
+                          max_tokens: Optional[int] = None,
+                          **eval_kwargs) -> Dict:
+        """
+        抽样评估：按标签分层随机抽取 sample_size 个问答对评估，报告平均分及 bootstrap 置信区间
+        
+        target_ci_width 不为空时持续追加抽样（每轮 sample_size 个），直到置信区间宽度
+        不超过该值、问答对抽完或达到运行预算。相同的 sample_seed 会抽到相同的问答对，
+        多个模型使用同一种子即可在同一批样本上对比
+        """
+        strata, tag_names = self._get_pair_strata(tag_filter)
+        if not strata:
+            return {'success': False, 'message': '没有找到需要评估的问答对', 'results': []}
+        
+        sampler = StratifiedSampler(strata, sample_seed)
+        pair_tags = {pair_id: tag_id for tag_id, pair_ids in strata.items() for pair_id in pair_ids}
+        scores_by_tag = {tag_id: [] for tag_id in strata}
+        
+        combined = {
+            'total_pairs': 0, 'success_count': 0, 'fail_count': 0, 'skipped_count': 0,
+            'budget_exceeded': False, 'results': [],
+            'token_usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0},
+            'cache_stats': {'requests': 0, 'cache_hits': 0, 'cache_read_tokens': 0, 'cache_creation_tokens': 0}
+        }
+        mean = ci_low = ci_high = float('nan')
+        rounds = 0
+        
+        while sampler.remaining:
+            rounds += 1
+            pair_ids = sampler.draw(sample_size)
+            logger.info(f"抽样评估第 {rounds} 轮 - 模型: {model_name}, 问答对: {len(pair_ids)}")
+            
+            # 剩余预算传给本轮评估
+            used = combined['token_usage']
+            round_result = self.batch_evaluate(
+                model_name, pair_ids=pair_ids,
+                max_cost=None if max_cost is None else max(max_cost - used['cost_usd'], 0.0),
+                max_tokens=None if max_tokens is None else
+                max(max_tokens - used['prompt_tokens'] - used['completion_tokens'], 0),
+                **eval_kwargs
+            )
+            if not round_result['success']:
+                break
+            
+            for key in ('total_pairs', 'success_count', 'fail_count', 'skipped_count'):
+                combined[key] += round_result[key]
+            for key in combined['token_usage']:
+                combined['token_usage'][key] += round_result['token_usage'][key]
+            for key in combined['cache_stats']:
+                combined['cache_stats'][key] += round_result['cache_stats'][key]
+            combined['results'].extend(round_result['results'])
+            for item in round_result['results']:
+                if item['success']:
+                    scores_by_tag[pair_tags[item['pair_id']]].append(float(item['score']))
+            
+            mean, ci_low, ci_high = stratified_bootstrap_ci(
+                scores_by_tag, sampler.population_sizes, confidence, seed=sample_seed
+            )
+            logger.info(f"抽样评估第 {rounds} 轮完成 - 平均分: {mean:.2f}, "
+                        f"{confidence:.0%} 置信区间: [{ci_low:.2f}, {ci_high:.2f}]")
+            
+            if round_result['budget_exceeded']:
+                combined['budget_exceeded'] = True
+                break
+            if target_ci_width is None or ci_high - ci_low <= target_ci_width:
+                break
+        
+        if not combined['results']:
+            return {'success': False, 'message': '抽样评估没有成功的评估结果', 'results': []}
+        
+        ci_width = ci_high - ci_low
+        evaluated = combined['total_pairs'] - combined['skipped_count']
+        message = (f'抽样评估完成 - 样本: {evaluated}/{sum(sampler.population_sizes.values())}, '
+                   f'平均分: {mean:.2f}, {confidence:.0%} 置信区间: [{ci_low:.2f}, {ci_high:.2f}]')
+        if target_ci_width is not None and not ci_width <= target_ci_width:
+            message += f'，未达到目标区间宽度 {target_ci_width}'
+        
+        return {
+            'success': True,
+            'message': message,
+            **combined,
+            'sampling': {
+                'population_size': sum(sampler.population_sizes.values()),
+                'sample_size': evaluated,
+                'rounds': rounds,
+                'mean': mean,
+                'ci_low': ci_low,
+                'ci_high': ci_high,
+                'ci_width': ci_width,
+                'confidence': confidence,
+                'strata': [
+                    {
+                        'tag': tag_names[tag_id],
+                        'population': sampler.population_sizes[tag_id],
+                        'evaluated': len(scores_by_tag[tag_id]),
+                        'mean': round(sum(scores_by_tag[tag_id]) / len(scores_by_tag[tag_id]), 2)
+                        if scores_by_tag[tag_id] else None
+                    }
+                    for tag_id in strata
+                ]
+            }
+        }
+    
+    def fan_out_evaluate(self, model_names: List[str],
+                         tag_filter: Optional[str] = None,
+                         pair_id: Optional[int] = None,
+                         limit: Optional[int] = None,
+                         criteria: str = "标准问答评估",
+                         temperature: float = 0.3,
+                         structured_output: bool = False,
+                         write_batch_size: int = FAN_OUT_WRITE_BATCH_SIZE) -> Dict:
+        """
+        多模型并发评估：每个问答对只从数据库读取一次，同时分发给多个模型评估
+        
+        每个模型使用独立的线程池（并发数）和限速器（每分钟请求数），配置见 model_configs；
+        每批 write_batch_size 个问答对的全部模型结果在一个事务中批量写入。
+        
+        Returns:
+            包含各模型对比汇总（comparison）和逐问答对各模型分数（results）的字典
+        """
+        model_names = [name for name in dict.fromkeys(model_names) if name in self.models]
+        if not model_names:
+            return {'success': False, 'message': '没有可用的评估模型', 'results': []}
+        
+        logger.info(f"开始多模型并发评估 - 模型: {', '.join(model_names)}")
+        
+        executors = {}
+        limiters = {}
+        for model_name in model_names:
+            config = self.model_configs.get(model_name.lower(), {})
+            executors[model_name] = ThreadPoolExecutor(
+                max_workers=config.get('concurrency', DEFAULT_MODEL_CONCURRENCY),
+                thread_name_prefix=f"eval-{model_name}"
+            )
+            limiters[model_name] = get_rate_limiter(
+                model_name, config.get('rpm', DEFAULT_REQUESTS_PER_MINUTE)
+            )
+        
+        def evaluate(model_name, pair):
+            limiters[model_name].acquire()
+            return self.evaluate_pair(model_name, pair['question'], pair['answer'], criteria,
+                                      temperature, structured_output)
+        
+        stats = {
+            model_name: {
+                'model_name': model_name, 'success_count': 0, 'fail_count': 0,
+                'score_sum': 0.0, 'dimension_sums': {dim: 0.0 for dim in EVALUATION_DIMENSIONS},
+                'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0,
+                'failed_pairs': {}, 'succeeded_pairs': []
+            }
+            for model_name in model_names
+        }
+        results = []
+        pair_iter = self.iter_standard_pairs(tag_filter, pair_id, limit)
+        
+        try:
+            while True:
+                batch = list(islice(pair_iter, max(1, write_batch_size)))
+                if not batch:
+                    break
+                
+                futures = [
+                    (pair, model_name, executors[model_name].submit(evaluate, model_name, pair))
+                    for pair in batch for model_name in model_names
+                ]
+                
+                records = []
+                rows = {pair['pair_id']: {
                     'pair_id': pair['pair_id'],
                     'question': pair['question'][:100] + '...' if len(pair['question']) > 100 else pair['question'],
-                    'score': eval_result['evaluation']['total_score'],
-                    'answer': pair['answer'],
-                    'success': eval_result['success'],
-                    'error': eval_result.get('error', '')
-                })
+                    'scores': {}
+                } for pair in batch}
+                for pair, model_name, future in futures:
+                    model_stats = stats[model_name]
+                    try:
+                        eval_result = future.result()
+                    except Exception as e:
+                        logger.error(f"{model_name} 评估Pair ID {pair['pair_id']}时出错: {e}")
+                        eval_result = {'success': False, 'error': str(e)}
+                    
+                    usage = eval_result.get('usage')
+                    if usage:
+                        model_stats['prompt_tokens'] += usage['prompt_tokens']
+                        model_stats['completion_tokens'] += usage['completion_tokens']
+                        model_stats['cost_usd'] += self._calculate_cost(
+                            model_name, usage['prompt_tokens'], usage['completion_tokens']
+                        )
+                    
+                    if not eval_result['success']:
+                        model_stats['fail_count'] += 1
+                        model_stats['failed_pairs'][pair['pair_id']] = eval_result.get('error', '评估失败')
+                        rows[pair['pair_id']]['scores'][model_name] = None
+                        continue
+                    
+                    evaluation = eval_result['evaluation']
+                    records.append({
+                        'pair_id': pair['pair_id'],
+                        'ans_id': pair['ans_id'],
+                        'model_name': model_name,
+                        'evaluation': evaluation,
+                        'llm_answer': eval_result.get('raw_response', ''),
+                        'usage': usage,
+                        'truncation': eval_result.get('truncation')
+                    })
+                    rows[pair['pair_id']]['scores'][model_name] = evaluation['total_score']
                 
+                # 本批所有模型的评估结果一次写入
+                saved = self.save_evaluation_results(records)
+                for record in records:
+                    model_stats = stats[record['model_name']]
+                    if saved:
+                        model_stats['success_count'] += 1
+                        model_stats['succeeded_pairs'].append(record['pair_id'])
+                        model_stats['score_sum'] += float(record['evaluation']['total_score'])
+                        for dim in EVALUATION_DIMENSIONS:
+                            model_stats['dimension_sums'][dim] += float(record['evaluation'].get(dim, 0) or 0)
+                    else:
+                        model_stats['fail_count'] += 1
+                        model_stats['failed_pairs'][record['pair_id']] = '保存评估结果失败'
+                
+                results.extend(rows.values())
+                logger.info(f"多模型评估进度: {len(results)} 个问答对")
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+            self.flush_parse_statistics()
+        
+        if not results:
+            return {'success': False, 'message': '没有找到需要评估的问答对', 'results': []}
+        
+        comparison = []
+        for model_name in model_names:
+            model_stats = stats[model_name]
+            self._update_dead_letters(model_name, model_stats.pop('failed_pairs'),
+                                      model_stats.pop('succeeded_pairs'))
+            success_count = model_stats['success_count']
+            dimension_sums = model_stats.pop('dimension_sums')
+            model_stats['avg_score'] = round(model_stats.pop('score_sum') / success_count, 2) if success_count else None
+            model_stats['dimension_averages'] = {
+                dim: round(total / success_count, 2) if success_count else None
+                for dim, total in dimension_sums.items()
+            }
+            comparison.append(model_stats)
+        
+        logger.info(f"多模型并发评估完成 - 问答对: {len(results)}")
+        return {
+            'success': True,
+            'message': f'多模型评估完成 - 问答对: {len(results)}, 模型: {len(model_names)}',
+            'total_pairs': len(results),
+            'comparison': comparison,
+            'results': results
+        }
+    
+    def cascade_evaluate(self, cheap_model: str, expensive_model: str,
+                         tag_filter: Optional[str] = None,
+                         pair_id: Optional[int] = None,
+                         limit: Optional[int] = None,
+                         criteria: str = "标准问答评估",
+                         temperature: float = 0.3,
+                         uncertainty_band: Tuple[float, float] = CASCADE_UNCERTAINTY_BAND,
+                         structured_output: bool = False,
+                         incremental: bool = False) -> Dict:
+        """
+        级联评估：先用低成本模型评分，分数落在不确定区间或解析失败时再升级到高成本模型
+        
+        每个问答对只保存最终采用的分数（记在产生该分数的模型下），并在 cascade_tier 列中
+        记录层级；被升级的低成本评估只计入本次运行的用量和成本。
+        两层模型按各自配置的并发数和限速器并发评估，每批 FAN_OUT_WRITE_BATCH_SIZE 个问答对
+        的结果在一个事务中批量写入。
+        incremental 为True时跳过已有级联结果（低成本层直接采用或高成本模型评估）且之后未更新的问答对
+        """
+        if cheap_model not in self.models or expensive_model not in self.models:
+            return {'success': False, 'message': '不支持的评估模型', 'results': []}
+        
+        low, high = sorted(uncertainty_band)
+        logger.info(f"开始级联评估 - 低成本模型: {cheap_model}, 高成本模型: {expensive_model}, "
+                    f"不确定区间: [{low}, {high}]")
+        
+        tier_stats = {
+            model_name: {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0}
+            for model_name in (cheap_model, expensive_model)
+        }
+        # 低成本层直接采用的问答对若改用高成本模型评估的估算成本
+        avoided_cost = 0.0
+        escalations = {'uncertain': 0, 'failed': 0}
+        success_count = 0
+        fail_count = 0
+        failed_pairs = {}
+        succeeded_pairs = []
+        results = []
+        records = []
+        started_at = time.monotonic()
+        
+        # 与 fan_out_evaluate 相同，每个模型使用独立的线程池（并发数）和限速器（每分钟请求数）
+        executors = {}
+        limiters = {}
+        for model_name in (cheap_model, expensive_model):
+            config = self.model_configs.get(model_name.lower(), {})
+            executors[model_name] = ThreadPoolExecutor(
+                max_workers=config.get('concurrency', DEFAULT_MODEL_CONCURRENCY),
+                thread_name_prefix=f"cascade-{model_name}"
+            )
+            limiters[model_name] = get_rate_limiter(
+                model_name, config.get('rpm', DEFAULT_REQUESTS_PER_MINUTE)
+            )
+        
+        def evaluate(model_name, pair):
+            limiters[model_name].acquire()
+            return self.evaluate_pair(model_name, pair['question'], pair['answer'], criteria,
+                                      temperature, structured_output)
+        
+        def collect(model_name, pair, future):
+            """在当前线程取回评估结果并累计该层的用量和成本"""
+            try:
+                eval_result = future.result()
             except Exception as e:
-                logger.error(f"评估Pair ID {pair['pair_id']}时出错: {e}")
-                fail_count += 1
+                logger.error(f"{model_name} 评估Pair ID {pair['pair_id']}时出错: {e}")
+                eval_result = {'success': False, 'error': str(e),
+                               'evaluation': self._get_default_evaluation(str(e))}
+            usage = eval_result.get('usage')
+            tier_stats[model_name]['requests'] += 1
+            if usage:
+                tier_stats[model_name]['prompt_tokens'] += usage['prompt_tokens']
+                tier_stats[model_name]['completion_tokens'] += usage['completion_tokens']
+                tier_stats[model_name]['cost_usd'] += self._calculate_cost(
+                    model_name, usage['prompt_tokens'], usage['completion_tokens']
+                )
+            return eval_result
+        
+        def flush():
+            nonlocal success_count, fail_count
+            saved = self.save_evaluation_results(records)
+            for record in records:
+                if saved:
+                    success_count += 1
+                    succeeded_pairs.append(record['pair_id'])
+                else:
+                    fail_count += 1
+                    failed_pairs[record['pair_id']] = '保存评估结果失败'
+            records.clear()
+        
+        pair_iter = self.iter_standard_pairs(tag_filter, pair_id, limit,
+                                             incremental_model=expensive_model if incremental else None,
+                                             cascade_cheap_model=cheap_model if incremental else None)
+        try:
+            while True:
+                batch = list(islice(pair_iter, FAN_OUT_WRITE_BATCH_SIZE))
+                if not batch:
+                    break
+                
+                # 本批问答对同时提交低成本层；需要升级的问答对在取回结果时立即提交高成本层
+                cheap_futures = [executors[cheap_model].submit(evaluate, cheap_model, pair) for pair in batch]
+                outcomes = []
+                for pair, future in zip(batch, cheap_futures):
+                    eval_result = collect(cheap_model, pair, future)
+                    if not eval_result['success']:
+                        escalations['failed'] += 1
+                    elif low <= float(eval_result['evaluation']['total_score']) <= high:
+                        escalations['uncertain'] += 1
+                    else:
+                        # 低成本层直接采用，按相同用量估算高成本模型本应花费的成本
+                        usage = eval_result.get('usage')
+                        if usage:
+                            avoided_cost += self._calculate_cost(
+                                expensive_model, usage['prompt_tokens'], usage['completion_tokens']
+                            )
+                        outcomes.append((pair, cheap_model, CASCADE_TIER_CHEAP, eval_result))
+                        continue
+                    outcomes.append((pair, expensive_model, CASCADE_TIER_EXPENSIVE,
+                                     executors[expensive_model].submit(evaluate, expensive_model, pair)))
                 
+                for pair, model_name, tier, outcome in outcomes:
+                    eval_result = outcome if tier == CASCADE_TIER_CHEAP else collect(model_name, pair, outcome)
+                    
+                    if eval_result['success']:
+                        records.append({
+                            'pair_id': pair['pair_id'],
+                            'ans_id': pair['ans_id'],
+                            'model_name': model_name,
+                            'evaluation': eval_result['evaluation'],
+                            'llm_answer': eval_result.get('raw_response', ''),
+                            'usage': eval_result.get('usage'),
+                            'truncation': eval_result.get('truncation'),
+                            'cascade_tier': tier
+                        })
+                    else:
+                        fail_count += 1
+                        failed_pairs[pair['pair_id']] = eval_result.get('error', '评估失败')
+                    
+                    results.append({
+                        'pair_id': pair['pair_id'],
+                        'question': pair['question'][:100] + '...' if len(pair['question']) > 100 else pair['question'],
+                        'score': eval_result['evaluation']['total_score'],
+                        'model_name': model_name,
+                        'cascade_tier': tier,
+                        'success': eval_result['success'],
+                        'error': eval_result.get('error', '')
+                    })
+                
+                # 本批结果在一个事务中批量写入
+                flush()
+                logger.info(f"级联评估进度: {len(results)} 个问答对")
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+            self.flush_parse_statistics()
+        
+        if not results:
+            return {'success': False, 'message': '没有找到需要评估的问答对', 'results': []}
+        
+        # 失败的问答对记在高成本模型的死信列表中
+        self._update_dead_letters(expensive_model, failed_pairs, succeeded_pairs)
+        
+        total_cost = sum(stats['cost_usd'] for stats in tier_stats.values())
+        escalated_count = escalations['uncertain'] + escalations['failed']
+        elapsed = time.monotonic() - started_at
+        message = (f'级联评估完成 - 成功: {success_count}, 失败: {fail_count}, '
+                   f'升级到 {expensive_model}: {escalated_count}/{len(results)}')
+        logger.info(message)
+        
+        return {
+            'success': True,
+            'message': message,
+            'total_pairs': len(results),
+            'success_count': success_count,
+            'fail_count': fail_count,
+            'escalated_count': escalated_count,
+            'escalations': escalations,
+            'tier_stats': tier_stats,
+            'total_cost': total_cost,
+            # 全部使用高成本模型的估算成本，用于对比级联节省的成本
+            'estimated_expensive_only_cost': tier_stats[expensive_model]['cost_usd'] + avoided_cost,
+            'avg_cost_per_pair': total_cost / len(results),
+            'avg_seconds_per_pair': elapsed / len(results),
+            'results': results
+        }
+    
+    def _update_dead_letters(self, model_name: str, failed_pairs: Dict[int, str],
+                             succeeded_pairs: List[int]):
+        """记录本次失败的问答对，并移除本次已成功评估的问答对"""
+        if not failed_pairs and not succeeded_pairs:
+            return
+        
+        def update(cursor):
+            if failed_pairs:
+                cursor.executemany(
+                    """
+                    INSERT INTO evaluation_dead_letter (pair_id, model_name, error)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE attempts = attempts + 1, error = VALUES(error)
+                    """,
+                    [(pair_id, model_name, str(error)[:1000]) for pair_id, error in failed_pairs.items()]
+                )
+            for start in range(0, len(succeeded_pairs), 500):
+                chunk = succeeded_pairs[start:start + 500]
+                cursor.execute(
+                    f"""
+                    DELETE FROM evaluation_dead_letter
+                    WHERE model_name = %s AND pair_id IN ({', '.join(['%s'] * len(chunk))})
+                    """,
+                    (model_name, *chunk)
+                )
+        
+        success, result = execute_transaction(update)
+        if not success:
+            logger.error(f"更新死信列表失败: {result}")
+    
+    def get_dead_letters(self, model_name: Optional[str] = None) -> List[Dict]:
+        """获取评估失败待重试的问答对"""
+        query = """
+        SELECT pair_id, model_name, error, attempts, updated_at
+        FROM evaluation_dead_letter
+        """
+        params = None
+        if model_name:
+            query += " WHERE model_name = %s"
+            params = (model_name,)
+        query += " ORDER BY updated_at DESC"
+        
+        success, rows = execute_query(query, params, fetch=True)
+        if not success:
+            logger.error(f"获取死信列表失败: {rows}")
+            return []
+        
+        columns = ('pair_id', 'model_name', 'error', 'attempts', 'updated_at')
+        return [dict(zip(columns, row)) for row in rows]
+    
+    def retry_dead_letters(self, model_name: str,
+                           criteria: str = "标准问答评估",
+                           temperature: float = 0.3,
+                           pairs_per_request: int = 1,
+                           structured_output: bool = False) -> Dict:
+        """只重新评估死信列表中该模型失败的问答对，不重复评估已成功的问答对"""
+        pair_ids = [item['pair_id'] for item in self.get_dead_letters(model_name)]
+        if not pair_ids:
+            return {
+                'success': False,
+                'message': '没有需要重试的问答对',
+                'results': []
+            }
+        
+        return self.batch_evaluate(model_name, criteria=criteria, temperature=temperature,
+                                   pairs_per_request=pairs_per_request, pair_ids=pair_ids,
+                                   structured_output=structured_output)
+    
+    def submit_batch_job(self, model_name: str,
+                         tag_filter: Optional[str] = None,
+                         pair_id: Optional[int] = None,
+                         limit: Optional[int] = None,
+                         criteria: str = "标准问答评估",
+                         temperature: float = 0.3,
+                         provider_name: Optional[str] = None,
+                         incremental: bool = False) -> Dict:
+        """
+        将标准问答对序列化为服务商批处理任务并提交
+        
+        Args:
+            provider_name: openai / anthropic / local，为None时按模型自动选择
+            incremental: 只提交该模型尚未评估或评估后有更新的问答对
+            
+        Returns:
+            Dict: {'success', 'message', 'job_id', 'total_pairs'}
+        """
+        pairs = self.get_standard_pairs(tag_filter, pair_id, limit,
+                                        incremental_model=model_name if incremental else None)
+        if not pairs:
+            return {'success': False, 'message': '没有找到需要评估的问答对'}
+        
+        if provider_name is None:
+            provider_name = self._get_provider(model_name)
+            # 模拟模型没有批处理接口，使用本地文件替身服务商
+            if provider_name == 'mock':
+                provider_name = 'local'
+        
+        try:
+            provider = get_batch_provider(provider_name)
+            # 本地替身服务商不调用真实模型，直接使用模型显示名
+            if provider_name == 'local':
+                model_id = model_name
+            else:
+                llm = self.init_model(model_name, temperature)
+                model_id = getattr(llm, 'model_name', None) or getattr(llm, 'model')
+            
+            requests = []
+            pair_map = {}
+            for pair in pairs:
+                custom_id = f"pair-{pair['pair_id']}"
+                prepared = preprocess_pair(pair['question'], pair['answer'],
+                                           self.max_question_tokens, self.max_answer_tokens)
+                requests.append(provider.build_request(
+                    custom_id,
+                    model_id,
+                    self.evaluation_system_prompt,
+                    self.evaluation_prompt.format(question=prepared['question'], answer=prepared['answer'],
+                                                  criteria=criteria),
+                    temperature
+                ))
+                pair_map[custom_id] = {'pair_id': pair['pair_id'], 'ans_id': pair['ans_id'],
+                                       'truncation': prepared['truncation']}
+            
+            provider_job_id = provider.submit(requests)
+        except Exception as e:
+            logger.error(f"提交批处理任务失败: {e}")
+            return {'success': False, 'message': f'提交批处理任务失败: {e}'}
+        
+        insert_query = """
+        INSERT INTO evaluation_batch_job
+        (provider, provider_job_id, model_name, criteria, total_pairs, pair_map)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        success, job_id = execute_transaction(lambda cursor: cursor.execute(insert_query, (
+            provider_name, provider_job_id, model_name, criteria, len(pairs),
+            json.dumps(pair_map)
+        )))
+        
+        if not success:
+            logger.error(f"记录批处理任务失败: {job_id}")
+            return {'success': False, 'message': f'批处理任务已提交({provider_job_id})，但记录失败: {job_id}'}
+        
+        logger.info(f"批处理任务已提交 - Job ID: {job_id}, 服务商任务ID: {provider_job_id}, 问答对数: {len(pairs)}")
+        return {
+            'success': True,
+            'message': f'批处理任务已提交，共 {len(pairs)} 个问答对',
+            'job_id': job_id,
+            'total_pairs': len(pairs)
+        }
+    
+    def refresh_batch_job(self, job_id: int) -> Dict:
+        """
+        轮询批处理任务状态，任务完成时取回结果并写入评估表
+        
+        Returns:
+            Dict: {'success', 'status', 'message'}，导入完成时另含 success_count、fail_count、skipped_count、results
+        """
+        success, rows = execute_query(
+            """
+            SELECT provider, provider_job_id, model_name, status, pair_map, created_at,
+                   updated_at < NOW() - INTERVAL %s SECOND AS stale
+            FROM evaluation_batch_job WHERE job_id = %s
+            """,
+            (BATCH_JOB_INGEST_TIMEOUT_SECONDS, job_id), fetch=True
+        )
+        if not success or not rows:
+            return {'success': False, 'status': None, 'message': f'批处理任务不存在: {job_id}'}
+        
+        provider_name, provider_job_id, model_name, status, pair_map, created_at, stale = rows[0]
+        if status == 'ingesting' and not stale:
+            return {'success': True, 'status': status, 'message': '任务结果正在由其他会话导入'}
+        if status not in ('submitted', 'ingesting'):
+            return {'success': True, 'status': status, 'message': f'任务状态: {status}'}
+        if status == 'ingesting':
+            logger.warning(f"批处理任务导入超时，重新导入 - Job ID: {job_id}")
+        
+        try:
+            provider = get_batch_provider(provider_name)
+            provider_status = provider.get_status(provider_job_id)
+        except Exception as e:
+            logger.error(f"查询批处理任务状态失败: {e}")
+            return {'success': False, 'status': status, 'message': f'查询任务状态失败: {e}'}
+        
+        if provider_status == STATUS_FAILED:
+            execute_query(
+                "UPDATE evaluation_batch_job SET status = 'failed', completed_at = NOW() WHERE job_id = %s",
+                (job_id,)
+            )
+            return {'success': False, 'status': 'failed', 'message': '服务商批处理任务失败'}
+        
+        if provider_status != STATUS_COMPLETED:
+            return {'success': True, 'status': status, 'message': '任务处理中'}
+        
+        # 抢占导入权，避免多个会话重复导入同一任务
+        claimed, _ = execute_transaction(lambda cursor: self._claim_batch_job(cursor, job_id))
+        if not claimed:
+            return {'success': True, 'status': 'ingesting', 'message': '任务结果正在由其他会话导入'}
+        
+        try:
+            return self._ingest_batch_job(job_id, provider, provider_job_id, model_name, pair_map, created_at)
+        except Exception as e:
+            # 导入中途出错时退回 submitted，下次刷新重新导入（已保存的问答对会被跳过）
+            logger.error(f"导入批处理结果失败: {e}")
+            execute_query("UPDATE evaluation_batch_job SET status = 'submitted' WHERE job_id = %s", (job_id,))
+            return {'success': False, 'status': 'submitted', 'message': f'导入批处理结果失败: {e}'}
+    
+    def _ingest_batch_job(self, job_id: int, provider, provider_job_id: str, model_name: str,
+                          pair_map, created_at) -> Dict:
+        """
+        取回已完成任务的结果并写入评估表
+
+        任务提交之后已有评估结果的问答对（其他运行的评估，或本任务上一次中断的导入）不再重复保存，
+        计为跳过而不是成功
+        """
+        provider_results = provider.fetch_results(provider_job_id)
+        
+        if isinstance(pair_map, (str, bytes)):
+            pair_map = json.loads(pair_map)
+        
+        saved_ans_ids = self._get_evaluated_answer_ids(
+            model_name, [pair['ans_id'] for pair in pair_map.values()], created_at
+        )
+        
+        results = []
+        success_count = 0
+        fail_count = 0
+        skipped_count = 0
+        for custom_id, pair in pair_map.items():
+            if pair['ans_id'] in saved_ans_ids:
+                skipped_count += 1
                 results.append({
                     'pair_id': pair['pair_id'],
-                    'question': pair['question'][:100] + '...' if len(pair['question']) > 100 else pair['question'],
-                    'score': 0,
+                    'score': None,
                     'success': False,
-                    'error': str(e)
+                    'skipped': True,
+                    'error': '任务提交后已有评估结果，跳过'
                 })
+                continue
+            
+            item = provider_results.get(custom_id)
+            if item is None or item['content'] is None:
+                eval_result = {
+                    'success': False,
+                    'error': item['error'] if item else '批处理结果缺失',
+                    'evaluation': self._get_default_evaluation('批处理结果缺失')
+                }
+            else:
+                eval_result = self._parse_evaluation_response(item['content'])
+            
+            # OpenAI 返回 prompt_tokens/completion_tokens，Anthropic 返回 input_tokens/output_tokens
+            usage = None
+            if item and item.get('usage'):
+                usage = {
+                    'prompt_tokens': item['usage'].get('prompt_tokens', item['usage'].get('input_tokens')),
+                    'completion_tokens': item['usage'].get('completion_tokens', item['usage'].get('output_tokens'))
+                }
+            
+            saved = eval_result['success'] and self.save_evaluation_result(
+                pair['pair_id'],
+                pair['ans_id'],
+                model_name,
+                eval_result['evaluation'],
+                eval_result.get('raw_response', ''),
+                usage,
+                pair.get('truncation')
+            )
+            if saved:
+                success_count += 1
+            else:
+                fail_count += 1
+            
+            results.append({
+                'pair_id': pair['pair_id'],
+                'score': eval_result['evaluation']['total_score'],
+                'success': bool(saved),
+                'error': eval_result.get('error', '')
+            })
         
-        logger.info(f"批量评估完成 - 成功: {success_count}, 失败: {fail_count}")
+        execute_query(
+            """
+            UPDATE evaluation_batch_job
+            SET status = 'completed', success_count = %s, fail_count = %s, skipped_count = %s,
+                completed_at = NOW()
+            WHERE job_id = %s
+            """,
+            (success_count, fail_count, skipped_count, job_id)
+        )
         
+        message = f'导入完成 - 成功: {success_count}, 失败: {fail_count}'
+        if skipped_count:
+            message += f'，跳过 {skipped_count} 个任务提交后已有评估结果的问答对'
+        logger.info(f"批处理任务导入完成 - Job ID: {job_id}, 成功: {success_count}, 失败: {fail_count}, "
+                    f"跳过: {skipped_count}")
         return {
             'success': True,
-            'message': f'评估完成 - 成功: {success_count}, 失败: {fail_count}',
-            'total_pairs': len(pairs),
+            'status': 'completed',
+            'message': message,
             'success_count': success_count,
             'fail_count': fail_count,
+            'skipped_count': skipped_count,
             'results': results
         }
     
+    def _claim_batch_job(self, cursor, job_id: int) -> bool:
+        """
+        在事务中将任务从 submitted（或导入超时的 ingesting）改为 ingesting，
+        失败说明已被其他会话抢占
+        """
+        cursor.execute(
+            """
+            UPDATE evaluation_batch_job SET status = 'ingesting', updated_at = NOW()
+            WHERE job_id = %s
+              AND (status = 'submitted'
+                   OR (status = 'ingesting' AND updated_at < NOW() - INTERVAL %s SECOND))
+            """,
+            (job_id, BATCH_JOB_INGEST_TIMEOUT_SECONDS)
+        )
+        if cursor.rowcount != 1:
+            raise ValueError("批处理任务已被其他会话导入")
+        return True
+    
+    def _get_evaluated_answer_ids(self, model_name: str, ans_ids: List[int], since) -> set:
+        """一组答案中在 since 之后已有该模型评估记录的答案ID"""
+        llm_type = get_llm_type(model_name)
+        if not llm_type or not ans_ids:
+            return set()
+        success, rows = execute_query(
+            f"""
+            SELECT DISTINCT std_ans_id FROM llm_evaluation
+            WHERE llm_type_id = %s AND evaluation_date >= %s
+              AND std_ans_id IN ({', '.join(['%s'] * len(ans_ids))})
+            """,
+            (llm_type['llm_type_id'], since, *ans_ids), fetch=True
+        )
+        if not success:
+            raise RuntimeError(f"查询已导入的评估结果失败: {rows}")
+        return {row[0] for row in rows}
+    
+    def get_batch_jobs(self, limit: int = 20) -> List[Dict]:
+        """获取最近的批处理任务"""
+        success, rows = execute_query(
+            """
+            SELECT job_id, provider, provider_job_id, model_name, status,
+                   total_pairs, success_count, fail_count, skipped_count, created_at, completed_at
+            FROM evaluation_batch_job
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            (limit,), fetch=True
+        )
+        if not success:
+            logger.error(f"获取批处理任务失败: {rows}")
+            return []
+        
+        columns = ('job_id', 'provider', 'provider_job_id', 'model_name', 'status',
+                   'total_pairs', 'success_count', 'fail_count', 'skipped_count', 'created_at', 'completed_at')
+        return [dict(zip(columns, row)) for row in rows]
+    
     def get_evaluation_statistics(self, model_name: Optional[str] = None) -> Dict:
         """获取评估统计信息"""
         
-        base_query = """
+        if model_name:
+            return self._query_summary_statistics("lt.name = %s", (model_name,))
+        return self._query_summary_statistics()
+    
+    def get_evaluation_statistics_bulk(self, model_names: List[str]) -> Dict:
+        """
+        一次分组查询获取多个模型的评估统计
+        
+        Args:
+            model_names: 模型名称列表
+            
+        Returns:
+            Dict: {'success', 'statistics'}，statistics 中每个模型一项，
+                  字段与 get_evaluation_statistics 相同，另含 dimension_averages
+        """
+        if not model_names:
+            return {'success': True, 'statistics': []}
+        
+        placeholders = ", ".join(["%s"] * len(model_names))
+        return self._query_summary_statistics(f"lt.name IN ({placeholders})", tuple(model_names))
+    
+    def _query_summary_statistics(self, condition: Optional[str] = None,
+                                  params: Optional[Tuple] = None) -> Dict:
+        """从增量维护的汇总表读取模型统计，每个模型一行，无需扫描 llm_evaluation"""
+        
+        query = """
         SELECT 
             lt.name as model_name,
-            COUNT(*) as total_evaluations,
-            AVG(le.llm_score) as avg_score,
-            MIN(le.llm_score) as min_score,
-            MAX(le.llm_score) as max_score,
-            STDDEV(le.llm_score) as score_stddev
-        FROM llm_evaluation le
-        JOIN llm_type lt ON le.llm_type_id = lt.llm_type_id
-        """
+            s.eval_count as total_evaluations,
+            s.score_sum / s.eval_count as avg_score,
+            s.min_score,
+            s.max_score,
+            SQRT(GREATEST(s.score_sq_sum / s.eval_count - POW(s.score_sum / s.eval_count, 2), 0)) as score_stddev,
+            s.dim_count,
+            {dimension_averages}
+        FROM llm_evaluation_summary s
+        JOIN llm_type lt ON s.llm_type_id = lt.llm_type_id
+        WHERE s.eval_count > 0
+        """.format(dimension_averages=",\n            ".join(
+            f"s.{dim}_sum / NULLIF(s.dim_count, 0) as avg_{dim}" for dim in EVALUATION_DIMENSIONS
+        ))
         
-        if model_name:
-            base_query += " WHERE lt.name = %s"
-            params = (model_name,)
-        else:
-            params = None
+        if condition:
+            query += f" AND {condition}"
         
-        base_query += " GROUP BY lt.name ORDER BY avg_score DESC"
+        query += " ORDER BY avg_score DESC"
         
-        success, result = execute_query(base_query, params, fetch=True)
+        success, result = execute_query(query, params, fetch=True)
         
         if not success:
             return {'success': False, 'error': result}
@@ -639,7 +2340,13 @@ class LLMEvaluator:
                 'avg_score': float(row[2]) if row[2] else 0,
                 'min_score': float(row[3]) if row[3] else 0,
                 'max_score': float(row[4]) if row[4] else 0,
-                'score_stddev': float(row[5]) if row[5] else 0
+                'score_stddev': float(row[5]) if row[5] else 0,
+                # 只统计带维度分数的评估记录，旧记录没有维度分数时为空
+                'dimension_averages': {
+                    dim: float(value)
+                    for dim, value in zip(EVALUATION_DIMENSIONS, row[7:])
+                    if value is not None
+                } if row[6] else {}
             })
         
         return {
@@ -657,9 +2364,73 @@ def evaluate_standard_pairs(model_name: str,
                            pair_id: Optional[int] = None,
                            limit: Optional[int] = None,
                            criteria: str = "标准问答评估",
-                           temperature: float = 0.3) -> Dict:
+                           temperature: float = 0.3,
+                           pairs_per_request: int = 1,
+                           max_cost: Optional[float] = None,
+                           max_tokens: Optional[int] = None,
+                           structured_output: bool = False,
+                           incremental: bool = False,
+                           sample_size: Optional[int] = None,
+                           target_ci_width: Optional[float] = None,
+                           sample_seed: Optional[int] = None) -> Dict:
     """评估标准问答对的便捷函数"""
-    return evaluator.batch_evaluate(model_name, tag_filter, pair_id, limit, criteria, temperature)
+    return evaluator.batch_evaluate(model_name, tag_filter, pair_id, limit, criteria, temperature,
+                                    pairs_per_request, max_cost, max_tokens,
+                                    structured_output=structured_output, incremental=incremental,
+                                    sample_size=sample_size, target_ci_width=target_ci_width,
+                                    sample_seed=sample_seed)
+
+
+def fan_out_evaluate_models(model_names: List[str],
+                            tag_filter: Optional[str] = None,
+                            pair_id: Optional[int] = None,
+                            limit: Optional[int] = None,
+                            criteria: str = "标准问答评估",
+                            temperature: float = 0.3,
+                            structured_output: bool = False) -> Dict:
+    """多模型并发评估的便捷函数"""
+    return evaluator.fan_out_evaluate(model_names, tag_filter, pair_id, limit, criteria, temperature,
+                                      structured_output)
+
+def cascade_evaluate_pairs(cheap_model: str, expensive_model: str,
+                           tag_filter: Optional[str] = None,
+                           pair_id: Optional[int] = None,
+                           limit: Optional[int] = None,
+                           criteria: str = "标准问答评估",
+                           temperature: float = 0.3,
+                           uncertainty_band: Tuple[float, float] = CASCADE_UNCERTAINTY_BAND,
+                           structured_output: bool = False,
+                           incremental: bool = False) -> Dict:
+    """级联评估的便捷函数"""
+    return evaluator.cascade_evaluate(cheap_model, expensive_model, tag_filter, pair_id, limit, criteria,
+                                      temperature, uncertainty_band, structured_output, incremental)
+
+def submit_evaluation_batch_job(model_name: str,
+                                tag_filter: Optional[str] = None,
+                                pair_id: Optional[int] = None,
+                                limit: Optional[int] = None,
+                                criteria: str = "标准问答评估",
+                                temperature: float = 0.3,
+                                provider_name: Optional[str] = None,
+                                incremental: bool = False) -> Dict:
+    """提交离线批处理评估任务的便捷函数"""
+    return evaluator.submit_batch_job(model_name, tag_filter, pair_id, limit, criteria, temperature,
+                                      provider_name, incremental)
+
+
+def refresh_evaluation_batch_job(job_id: int) -> Dict:
+    """轮询并导入离线批处理评估任务的便捷函数"""
+    return evaluator.refresh_batch_job(job_id)
+
+
+def retry_failed_evaluations(model_name: str,
+                             criteria: str = "标准问答评估",
+                             temperature: float = 0.3,
+                             pairs_per_request: int = 1,
+                             structured_output: bool = False) -> Dict:
+    """重试死信列表中失败评估的便捷函数"""
+    return evaluator.retry_dead_letters(model_name, criteria, temperature, pairs_per_request,
+                                        structured_output)
 
 
 def get_model_statistics(model_name: Optional[str] = None) -> Dict:
@@ -667,6 +2438,11 @@ def get_model_statistics(model_name: Optional[str] = None) -> Dict:
     return evaluator.get_evaluation_statistics(model_name)
 
 
+def get_model_statistics_bulk(models: List[str]) -> Dict:
+    """一次查询获取多个模型评估统计的便捷函数"""
+    return evaluator.get_evaluation_statistics_bulk(models)
+
+
 if __name__ == "__main__":
     # 测试代码
     print("LLM评估器测试")
@@ -0,0 +1,219 @@
+"""
+LLM调用容错模块
+为模型调用提供带抖动的指数退避重试（遵循 Retry-After 响应头）和按服务商划分的熔断器，
+避免瞬时的限流/服务端错误直接变成失败的评估，也避免持续向故障端点发送请求；
+并提供按模型的客户端限速器，并发调用多个模型时各自控制请求速率。
+"""
+
+import random
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 重试参数
+MAX_RETRIES = 4
+BASE_DELAY_SECONDS = 1.0
+MAX_DELAY_SECONDS = 60.0
+
+# 熔断参数：连续失败达到阈值后熔断，冷却时间过后放行一次试探请求
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT_SECONDS = 60.0
+
+# 可重试的HTTP状态码（529 为 Anthropic 过载）
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+# 没有状态码时按异常类名判断的可重试错误（超时、连接错误等）
+RETRYABLE_ERROR_NAMES = ('Timeout', 'Connection', 'RateLimit', 'Overloaded', 'InternalServer')
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求未发送"""
+
+
+class CircuitBreaker:
+    """单个服务商的熔断器"""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """closed / open / half_open"""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow_request(self) -> bool:
+        """是否允许发送请求；半开状态下只放行一个试探请求"""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._half_open_in_flight:
+                self._half_open_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._half_open_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._half_open_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._half_open_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """获取服务商的熔断器（进程内共享）"""
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker()
+        return _breakers[provider]
+
+
+class RateLimiter:
+    """按每分钟请求数限速：相邻两次放行之间至少间隔 60/requests_per_minute 秒，线程安全"""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute and requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        """阻塞到下一个可用的请求时间点"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key: str, requests_per_minute: float) -> RateLimiter:
+    """获取模型的限速器（进程内共享，首次获取时的速率生效）"""
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = RateLimiter(requests_per_minute)
+        return _rate_limiters[key]
+
+
+def _get_status_code(error: Exception) -> Optional[int]:
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        response = getattr(error, 'response', None)
+        status_code = getattr(response, 'status_code', None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """判断错误是否为瞬时错误（限流、服务端错误、超时、连接错误）"""
+    status_code = _get_status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """从错误响应的 retry-after-ms / Retry-After 头中读取建议等待秒数"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            # HTTP-date 格式
+            return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def get_backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """计算第 attempt 次重试前的等待时间：全抖动指数退避，服务端给出 Retry-After 时以其为下限"""
+    delay = random.uniform(0, min(MAX_DELAY_SECONDS, BASE_DELAY_SECONDS * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return min(delay, MAX_DELAY_SECONDS)
+
+
+def call_with_resilience(provider: str, func: Callable, *args,
+                         max_retries: int = MAX_RETRIES, **kwargs):
+    """
+    在熔断器保护下调用 func，瞬时错误按退避策略重试
+
+    Args:
+        provider: 服务商名称（openai / anthropic），同一服务商共享熔断器
+        func: 实际的模型调用
+        max_retries: 最大重试次数
+
+    Raises:
+        CircuitOpenError: 熔断器打开，请求未发送
+        Exception: 不可重试的错误或重试耗尽后的最后一个错误
+    """
+    breaker = get_circuit_breaker(provider)
+
+    for attempt in range(max_retries + 1):
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{provider} 服务熔断中，暂停发送请求")
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable_error(e):
+                # 请求本身的错误（如参数错误、鉴权失败）不代表端点故障，不计入熔断
+                breaker.record_success()
+                raise
+
+            breaker.record_failure()
+            if attempt == max_retries:
+                logger.error(f"{provider} 调用重试 {max_retries} 次后仍失败: {e}")
+                raise
+
+            delay = get_backoff_delay(attempt, get_retry_after(e))
+            logger.warning(f"{provider} 调用失败，{delay:.1f} 秒后第 {attempt + 1} 次重试: {e}")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
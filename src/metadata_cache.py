@@ -0,0 +1,130 @@
+"""
+元数据缓存模块
+在进程内缓存 User、tags、llm_type 等小型、变化缓慢的参考数据表，所有会话共享
+
+缓存按表记录加载时的版本号，database 模块在这些表发生写入时递增版本号，
+读取时版本号不一致即重新加载，因此查找基本都是字典命中。
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from database import execute_query, get_reference_version
+
+# 兜底过期时间（秒），用于感知其他进程（如导入脚本）对参考表的写入
+MAX_AGE_SECONDS = 300
+
+# 各参考表的加载查询及列名
+_TABLE_QUERIES = {
+    'User': (
+        "SELECT user_id, username, name, role, is_active FROM User ORDER BY username",
+        ('user_id', 'username', 'name', 'role', 'is_active')
+    ),
+    'tags': (
+        "SELECT tag_id, name FROM tags ORDER BY name",
+        ('tag_id', 'name')
+    ),
+    'llm_type': (
+        """
+        SELECT llm_type_id, name, params, costs_per_million_token, is_active
+        FROM llm_type ORDER BY name
+        """,
+        ('llm_type_id', 'name', 'params', 'costs_per_million_token', 'is_active')
+    ),
+}
+
+
+def _casefold(value):
+    return value.casefold() if isinstance(value, str) else value
+
+
+class MetadataCache:
+    """进程级参考数据缓存"""
+
+    def __init__(self, max_age: float = MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # table -> {'version', 'loaded_at', 'rows', 'indexes'}
+        self._entries: Dict[str, Dict] = {}
+
+    def get_rows(self, table: str) -> List[Dict]:
+        """获取参考表的全部行，缓存失效时重新加载"""
+        version = get_reference_version(table)
+
+        with self._lock:
+            entry = self._entries.get(table)
+            if (entry and entry['version'] == version and
+                    time.monotonic() - entry['loaded_at'] < self.max_age):
+                return entry['rows']
+
+        query, columns = _TABLE_QUERIES[table]
+        success, result = execute_query(query, None, True)
+
+        if not success:
+            # 加载失败时不缓存，下次访问重试
+            return entry['rows'] if entry else []
+
+        rows = [dict(zip(columns, row)) for row in result]
+
+        with self._lock:
+            # 加载期间如果发生写入，版本号已变化，本次结果只返回不缓存
+            if get_reference_version(table) == version:
+                self._entries[table] = {
+                    'version': version,
+                    'loaded_at': time.monotonic(),
+                    'rows': rows,
+                    'indexes': {}
+                }
+        return rows
+
+    def lookup(self, table: str, key: str, value, casefold: bool = False) -> Optional[Dict]:
+        """
+        按列值查找单行，索引字典按需构建并随缓存一起失效
+
+        casefold 为True时忽略大小写，与表的大小写不敏感排序规则下 `列 = %s` 的匹配结果一致
+        """
+        rows = self.get_rows(table)
+        normalize = _casefold if casefold else (lambda item: item)
+        value = normalize(value)
+
+        with self._lock:
+            entry = self._entries.get(table)
+            if entry is None or entry['rows'] is not rows:
+                return next((row for row in rows if normalize(row[key]) == value), None)
+
+            index = entry['indexes'].get((key, casefold))
+            if index is None:
+                index = {normalize(row[key]): row for row in rows}
+                entry['indexes'][(key, casefold)] = index
+        return index.get(value)
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局缓存实例，所有会话共享
+metadata_cache = MetadataCache()
+
+
+def get_active_users() -> List[Dict]:
+    """获取活跃用户列表"""
+    return [row for row in metadata_cache.get_rows('User') if row['is_active']]
+
+
+def get_tag_names() -> List[str]:
+    """获取全部标签名"""
+    return [row['name'] for row in metadata_cache.get_rows('tags')]
+
+
+def get_tag_id(tag_name: str) -> Optional[int]:
+    """根据标签名获取标签ID（忽略大小写，与 tags.name 的排序规则一致）"""
+    row = metadata_cache.lookup('tags', 'name', tag_name, casefold=True)
+    return row['tag_id'] if row else None
+
+
+def get_llm_type(model_name: str) -> Optional[Dict]:
+    """根据模型名获取 llm_type 记录（忽略大小写，与 llm_type.name 的排序规则一致）"""
+    return metadata_cache.lookup('llm_type', 'name', model_name, casefold=True)
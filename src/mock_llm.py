@@ -0,0 +1,302 @@
+"""
+模拟LLM模块
+提供不调用真实API的确定性模拟模型，用于离线测量评估流水线自身的吞吐量和数据库写回开销：
+
+- MockChatModel：LangChain 聊天模型，注册表中 provider 为 mock 的模型使用它
+- 兼容 OpenAI 接口的 HTTP 替身服务（python src/mock_llm.py --port 8089），
+  可在注册表中以 openai_compatible 模型接入，连同HTTP客户端开销一起测量
+
+评分由问答内容的哈希确定，相同输入总是得到相同分数；延迟服从对数正态分布，
+并按配置的比例返回错误或格式错误的响应。
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from constants import EVALUATION_DIMENSIONS
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# 多问答对评估请求中每个问答对的标记，与 LLMEvaluator.evaluate_pairs_batch 的格式一致
+_PAIR_MARKER_RE = re.compile(r'【问答对 pair_id=(\d+)】')
+
+
+class MockLLMError(Exception):
+    """模拟的服务端错误，status_code 决定是否会被 llm_resilience 重试"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def mock_evaluation(text: str, reasoning: str = "模拟模型生成的评估结果") -> Dict:
+    """根据文本哈希生成确定性的评估结果"""
+    seed = zlib.crc32(text.encode('utf-8'))
+    scores = {dim: 60 + (seed >> (i * 5)) % 36 for i, dim in enumerate(EVALUATION_DIMENSIONS)}
+    scores['total_score'] = round(sum(scores.values()) / len(scores), 1)
+    scores['reasoning'] = reasoning
+    return scores
+
+
+def mock_response_text(user_prompt: str) -> str:
+    """为评估请求生成确定性的JSON应答；多问答对请求返回按 pair_id 排列的JSON数组"""
+    segments = _PAIR_MARKER_RE.split(user_prompt)
+    if len(segments) == 1:
+        return json.dumps(mock_evaluation(user_prompt), ensure_ascii=False)
+
+    # split 结果为 [前缀, pair_id, 内容, pair_id, 内容, ...]
+    evaluations = [
+        {'pair_id': int(pair_id), **mock_evaluation(content)}
+        for pair_id, content in zip(segments[1::2], segments[2::2])
+    ]
+    return json.dumps(evaluations, ensure_ascii=False)
+
+
+class MockBehaviour:
+    """
+    模拟服务端行为：延迟、错误率和格式错误率
+
+    同一配置的多个模型实例共享一个随机数生成器，固定 seed 且顺序调用时结果可复现
+    """
+
+    def __init__(self, latency_ms: float = 200.0, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, malformed_rate: float = 0.0,
+                 error_status: int = 500, seed: Optional[int] = 0):
+        """
+        Args:
+            latency_ms: 延迟中位数（毫秒），0表示不等待
+            latency_sigma: 对数正态分布的 sigma，0表示固定延迟
+            error_rate: 返回服务端错误的比例
+            malformed_rate: 返回格式错误（截断的JSON）的比例
+            error_status: 模拟错误的HTTP状态码，5xx/429 会被重试，4xx 不会
+            seed: 随机种子
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> Tuple[float, float]:
+        with self._lock:
+            latency = 0.0
+            if self.latency_ms > 0:
+                latency = self.latency_ms / 1000
+                if self.latency_sigma > 0:
+                    latency = self._random.lognormvariate(math.log(latency), self.latency_sigma)
+            return latency, self._random.random()
+
+    def respond(self, user_prompt: str) -> str:
+        """等待模拟延迟后返回应答文本；按比例抛出 MockLLMError 或返回格式错误的文本"""
+        latency, roll = self._draw()
+        if latency:
+            time.sleep(latency)
+
+        if roll < self.error_rate:
+            raise MockLLMError(f"模拟服务端错误 ({self.error_status})", self.error_status)
+
+        text = mock_response_text(user_prompt)
+        if roll < self.error_rate + self.malformed_rate:
+            return text[:len(text) // 2]
+        return text
+
+
+_behaviours: Dict[Tuple, MockBehaviour] = {}
+_behaviours_lock = threading.Lock()
+
+
+def get_mock_behaviour(**config) -> MockBehaviour:
+    """获取指定配置的共享模拟行为"""
+    key = tuple(sorted(config.items()))
+    with _behaviours_lock:
+        if key not in _behaviours:
+            _behaviours[key] = MockBehaviour(**config)
+        return _behaviours[key]
+
+
+def _message_text(message: BaseMessage) -> str:
+    if isinstance(message.content, list):
+        return "".join(block.get('text', '') for block in message.content if isinstance(block, dict))
+    return message.content
+
+
+class MockChatModel(BaseChatModel):
+    """确定性的模拟聊天模型"""
+
+    model_name: str = "mock"
+    temperature: float = 0.3
+    latency_ms: float = 200.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    error_status: int = 500
+    seed: Optional[int] = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    def _behaviour(self) -> MockBehaviour:
+        return get_mock_behaviour(
+            latency_ms=self.latency_ms, latency_sigma=self.latency_sigma,
+            error_rate=self.error_rate, malformed_rate=self.malformed_rate,
+            error_status=self.error_status, seed=self.seed
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        user_prompt = _message_text(messages[-1])
+        text = self._behaviour().respond(user_prompt)
+
+        prompt_tokens = sum(count_tokens(_message_text(message)) for message in messages)
+        completion_tokens = count_tokens(text)
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                'input_tokens': prompt_tokens,
+                'output_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            },
+            response_metadata={'model_name': self.model_name}
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any):
+        """模拟服务商结构化输出：解析应答JSON，数组结果包装为 {'evaluations': [...]}"""
+
+        def invoke(messages):
+            raw = self.invoke(messages)
+            try:
+                parsed = json.loads(raw.content)
+                if isinstance(parsed, list):
+                    parsed = {'evaluations': parsed}
+                parsing_error = None
+            except json.JSONDecodeError as e:
+                parsed, parsing_error = None, e
+            if include_raw:
+                return {'raw': raw, 'parsed': parsed, 'parsing_error': parsing_error}
+            return parsed
+
+        return RunnableLambda(invoke)
+
+
+class _MockOpenAIHandler(BaseHTTPRequestHandler):
+    """兼容 OpenAI /v1/chat/completions 的模拟接口"""
+
+    behaviour: MockBehaviour = None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'mock', 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            messages = request['messages']
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {'error': {'message': f'invalid request: {e}'}})
+            return
+
+        def content_text(message):
+            content = message.get('content') or ''
+            if isinstance(content, list):
+                return "".join(block.get('text', '') for block in content if isinstance(block, dict))
+            return content
+
+        try:
+            text = self.behaviour.respond(content_text(messages[-1]))
+        except MockLLMError as e:
+            self._send_json(e.status_code, {'error': {'message': str(e), 'type': 'server_error'}})
+            return
+
+        prompt_tokens = sum(count_tokens(content_text(message)) for message in messages)
+        completion_tokens = count_tokens(text)
+        self._send_json(200, {
+            'id': f"chatcmpl-mock-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        })
+
+
+def create_mock_server(host: str = '127.0.0.1', port: int = 8089, **config) -> ThreadingHTTPServer:
+    """创建模拟 OpenAI 兼容服务（调用 serve_forever() 启动，port 为0时自动分配端口）"""
+    handler = type('MockOpenAIHandler', (_MockOpenAIHandler,), {'behaviour': MockBehaviour(**config)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="兼容 OpenAI 接口的模拟LLM服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=200.0, help="延迟中位数（毫秒）")
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help="对数正态分布的 sigma")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = create_mock_server(
+        args.host, args.port,
+        latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+        error_status=args.error_status, seed=args.seed
+    )
+    print(f"模拟LLM服务已启动: http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
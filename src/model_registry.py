@@ -0,0 +1,113 @@
+"""
+模型注册表模块
+内置四个云端模型，并从 JSON 配置文件（默认 configs/llm_models.json）加载或覆盖模型定义。
+provider 为 openai_compatible 的模型通过 base_url 指向任意兼容 OpenAI 接口的服务，
+如 CPU 上运行的 llama.cpp server、vLLM 等本地推理服务，用于低成本的大批量评估；
+provider 为 mock 的模型使用 mock_llm 中的确定性模拟模型，不调用任何API，
+内置的 Mock-LLM 通过 MOCK_LLM_ENABLED 环境变量启用。
+
+配置项：
+    name         模型显示名（唯一，同名时覆盖内置定义）
+    provider     openai / anthropic / openai_compatible
+    model        服务端模型ID
+    base_url     openai_compatible 的接口地址
+    api_key_env  读取API密钥的环境变量名（openai_compatible 可不设置）
+    params       参数量（正整数，必填；覆盖内置模型时可省略），新建 llm_type 记录时使用
+    cost         每百万token单价（美元）
+    concurrency  并发请求数
+    rpm          每分钟请求数上限，0表示不限速
+    enabled      是否启用，默认启用
+    mock         mock 模型的模拟参数（latency_ms、latency_sigma、error_rate、malformed_rate、
+                 error_status、seed），见 mock_llm.MockBehaviour
+"""
+
+import json
+import os
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY_PATH = os.getenv(
+    'LLM_MODELS_CONFIG',
+    os.path.join(os.path.dirname(__file__), '..', 'configs', 'llm_models.json')
+)
+
+SUPPORTED_PROVIDERS = ('openai', 'anthropic', 'openai_compatible', 'mock')
+
+DEFAULT_MODEL_SPECS = [
+    {"name": "GPT-4", "provider": "openai", "model": "gpt-4", "api_key_env": "OPENAI_API_KEY",
+     "params": 1000000000000, "cost": 30.0, "concurrency": 4, "rpm": 500},  # 1T参数，$30/1M tokens
+    {"name": "GPT-3.5-Turbo", "provider": "openai", "model": "gpt-3.5-turbo", "api_key_env": "OPENAI_API_KEY",
+     "params": 175000000000, "cost": 0.5, "concurrency": 8, "rpm": 3500},  # 175B参数，$0.5/1M tokens
+    {"name": "Claude-3-Opus", "provider": "anthropic", "model": "claude-3-opus-20240229",
+     "api_key_env": "ANTHROPIC_API_KEY",
+     "params": 500000000000, "cost": 15.0, "concurrency": 2, "rpm": 50},  # 估计500B参数，$15/1M tokens
+    {"name": "Claude-3-Sonnet", "provider": "anthropic", "model": "claude-3-sonnet-20240229",
+     "api_key_env": "ANTHROPIC_API_KEY",
+     "params": 200000000000, "cost": 3.0, "concurrency": 4, "rpm": 50},  # 估计200B参数，$3/1M tokens
+    # 确定性模拟模型，用于离线测量评估流水线的吞吐量
+    {"name": "Mock-LLM", "provider": "mock", "model": "mock", "params": 1, "cost": 0.0,
+     "concurrency": int(os.getenv('MOCK_LLM_CONCURRENCY', '8')), "rpm": 0,
+     "enabled": os.getenv('MOCK_LLM_ENABLED', 'False').lower() == 'true',
+     "mock": {
+         "latency_ms": float(os.getenv('MOCK_LLM_LATENCY_MS', '200')),
+         "latency_sigma": float(os.getenv('MOCK_LLM_LATENCY_SIGMA', '0.5')),
+         "error_rate": float(os.getenv('MOCK_LLM_ERROR_RATE', '0')),
+         "malformed_rate": float(os.getenv('MOCK_LLM_MALFORMED_RATE', '0')),
+         "error_status": int(os.getenv('MOCK_LLM_ERROR_STATUS', '500')),
+         "seed": int(os.getenv('MOCK_LLM_SEED', '0')),
+     }},
+]
+
+_SPEC_DEFAULTS = {"cost": 0.0, "concurrency": 4, "rpm": 60, "enabled": True}
+
+
+def _validate_spec(spec: Dict) -> Optional[str]:
+    """校验单个模型定义，返回错误信息，合法时返回None"""
+    for field in ('name', 'provider', 'model'):
+        if not spec.get(field):
+            return f"缺少字段 {field}"
+    if spec['provider'] not in SUPPORTED_PROVIDERS:
+        return f"不支持的服务商 {spec['provider']}"
+    if spec['provider'] == 'openai_compatible' and not spec.get('base_url'):
+        return "openai_compatible 模型需要设置 base_url"
+    # llm_type.params 有 CHECK (params > 0) 约束，在加载时拒绝，而不是等到首次评估写库时报错
+    params = spec.get('params')
+    if isinstance(params, bool) or not isinstance(params, int) or params <= 0:
+        return f"params 必须为正整数，当前为 {params!r}"
+    return None
+
+
+def load_model_registry(path: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    加载模型注册表
+
+    Returns:
+        模型显示名 -> 模型定义（已补全默认值），只包含启用的模型，顺序为内置模型在前
+    """
+    specs = {spec['name']: dict(spec) for spec in DEFAULT_MODEL_SPECS}
+
+    path = path or MODEL_REGISTRY_PATH
+    if os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                configured = json.load(f).get('models', [])
+        except (OSError, ValueError) as e:
+            logger.error(f"读取模型配置文件失败: {path}: {e}")
+            configured = []
+
+        for spec in configured:
+            # 覆盖内置模型时只需给出变化的字段，按合并后的定义校验
+            merged = {**specs.get(spec.get('name'), {}), **spec}
+            error = _validate_spec(merged)
+            if error:
+                logger.error(f"忽略无效的模型配置 {spec.get('name')}: {error}")
+                continue
+            specs[spec['name']] = merged
+
+    return {
+        name: {**_SPEC_DEFAULTS, **spec}
+        for name, spec in specs.items()
+        if spec.get('enabled', True)
+    }
@@ -0,0 +1,171 @@
+"""
+查询统计模块
+database.execute_query 和 execute_transaction 对每条SQL记录执行耗时、影响行数和获取连接耗时，
+按规范化后的语句指纹（字面量和参数替换为 ?）在进程内汇总，所有会话共享，
+可导出、重置，并在数据库管理页面查看。
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# 是否记录查询统计
+QUERY_STATS_ENABLED = os.getenv('QUERY_STATS_ENABLED', 'True').lower() == 'true'
+# 每个指纹保留的最近耗时样本数，用于计算分位数
+QUERY_STATS_SAMPLE_SIZE = int(os.getenv('QUERY_STATS_SAMPLE_SIZE', '1000'))
+# 指纹数量上限，超出后新语句归入同一个溢出项，避免动态拼接的SQL撑大内存
+MAX_FINGERPRINTS = 1000
+_OVERFLOW_FINGERPRINT = '<其他语句>'
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%s|%\(\w+\)s')
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_LIST_RE = re.compile(r'\bVALUES\s*(\([\s?,]*\))(?:\s*,\s*\([\s?,]*\))*', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(query: str) -> str:
+    """
+    规范化SQL语句：去掉注释，字符串/数字字面量和参数占位符替换为 ?，
+    IN 列表和多行 VALUES 折叠为一项，合并空白
+    """
+    text = _COMMENT_RE.sub(' ', query)
+    text = _STRING_RE.sub('?', text)
+    text = _PLACEHOLDER_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('IN (...)', text)
+    text = _VALUES_LIST_RE.sub(r'VALUES \1', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def _hash_statement(statement: str) -> str:
+    return hashlib.md5(statement.encode('utf-8')).hexdigest()[:12]
+
+
+def statement_fingerprint(query: str) -> str:
+    """语句指纹：规范化语句的短哈希"""
+    return _hash_statement(normalize_statement(query))
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryStatsRegistry:
+    """进程级查询统计，按语句指纹汇总"""
+
+    def __init__(self, sample_size: int = QUERY_STATS_SAMPLE_SIZE, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.sample_size = sample_size
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self.started_at = time.time()
+
+    def record(self, query: str, duration_ms: float, rows: Optional[int] = None,
+               acquire_ms: float = 0.0, error: bool = False):
+        """记录一次语句执行"""
+        statement = normalize_statement(query)
+        fingerprint = _hash_statement(statement)
+
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    fingerprint, statement = _OVERFLOW_FINGERPRINT, _OVERFLOW_FINGERPRINT
+                    entry = self._entries.get(fingerprint)
+                if entry is None:
+                    entry = {
+                        'statement': statement,
+                        'count': 0,
+                        'errors': 0,
+                        'total_ms': 0.0,
+                        'max_ms': 0.0,
+                        'rows': 0,
+                        'acquire_total_ms': 0.0,
+                        'samples': deque(maxlen=self.sample_size),
+                        'last_seen': None,
+                    }
+                    self._entries[fingerprint] = entry
+
+            entry['count'] += 1
+            entry['errors'] += 1 if error else 0
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['rows'] += rows or 0
+            entry['acquire_total_ms'] += acquire_ms
+            entry['samples'].append(duration_ms)
+            entry['last_seen'] = time.time()
+
+    def snapshot(self) -> List[Dict]:
+        """导出各指纹的汇总统计，按总耗时降序"""
+        with self._lock:
+            entries = [(fingerprint, dict(entry, samples=list(entry['samples'])))
+                       for fingerprint, entry in self._entries.items()]
+
+        stats = []
+        for fingerprint, entry in entries:
+            samples = sorted(entry['samples'])
+            count = entry['count']
+            stats.append({
+                'fingerprint': fingerprint,
+                'statement': entry['statement'],
+                'count': count,
+                'errors': entry['errors'],
+                'total_ms': round(entry['total_ms'], 3),
+                'avg_ms': round(entry['total_ms'] / count, 3) if count else None,
+                'p50_ms': _round(_percentile(samples, 0.50)),
+                'p95_ms': _round(_percentile(samples, 0.95)),
+                'max_ms': round(entry['max_ms'], 3),
+                'avg_rows': round(entry['rows'] / count, 2) if count else None,
+                'avg_acquire_ms': round(entry['acquire_total_ms'] / count, 3) if count else None,
+                'last_seen': entry['last_seen'],
+            })
+        stats.sort(key=lambda item: item['total_ms'], reverse=True)
+        return stats
+
+    def dump(self) -> Dict:
+        """导出统计及统计区间，可直接序列化为JSON"""
+        return {'started_at': self.started_at, 'dumped_at': time.time(), 'statements': self.snapshot()}
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._entries.clear()
+            self.started_at = time.time()
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+# 进程级注册表
+query_stats = QueryStatsRegistry()
+
+
+def record_query(query: str, duration_ms: float, rows: Optional[int] = None,
+                 acquire_ms: float = 0.0, error: bool = False):
+    if QUERY_STATS_ENABLED:
+        query_stats.record(query, duration_ms, rows, acquire_ms, error)
+
+
+def get_query_stats() -> List[Dict]:
+    return query_stats.snapshot()
+
+
+def dump_query_stats() -> Dict:
+    return query_stats.dump()
+
+
+def reset_query_stats():
+    query_stats.reset()
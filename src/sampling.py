@@ -0,0 +1,129 @@
+"""
+抽样评估模块
+按标签分层随机抽取问答对，并用分层 bootstrap 计算平均分的置信区间，
+用评估一部分问答对的成本得到可比较的模型平均分估计。
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# bootstrap 重抽样次数
+BOOTSTRAP_RESAMPLES = 2000
+
+
+class StratifiedSampler:
+    """
+    按层（标签）不放回地逐轮抽样
+
+    每层的问答对在初始化时随机打乱一次，之后每轮按各层剩余数量的比例分配抽样数，
+    依次取出；相同的种子得到相同的抽样顺序，便于多个模型在同一批样本上对比
+    """
+
+    def __init__(self, strata: Dict[int, List[int]], seed: Optional[int] = None):
+        """
+        Args:
+            strata: 层ID -> 该层全部 pair_id
+            seed: 随机种子
+        """
+        rng = np.random.default_rng(seed)
+        self._pools = {
+            stratum: rng.permutation(np.asarray(sorted(pair_ids), dtype=np.int64))
+            for stratum, pair_ids in strata.items() if pair_ids
+        }
+        self._offsets = {stratum: 0 for stratum in self._pools}
+        self.population_sizes = {stratum: len(pool) for stratum, pool in self._pools.items()}
+
+    @property
+    def remaining(self) -> int:
+        return sum(len(pool) - self._offsets[stratum] for stratum, pool in self._pools.items())
+
+    def draw(self, size: int) -> List[int]:
+        """抽取下一轮最多 size 个 pair_id"""
+        remaining = {stratum: len(pool) - self._offsets[stratum] for stratum, pool in self._pools.items()}
+        allocation = allocate_proportional(remaining, size)
+
+        drawn = []
+        for stratum, count in allocation.items():
+            offset = self._offsets[stratum]
+            drawn.extend(int(pair_id) for pair_id in self._pools[stratum][offset:offset + count])
+            self._offsets[stratum] = offset + count
+        return drawn
+
+
+def allocate_proportional(sizes: Dict[int, int], total: int) -> Dict[int, int]:
+    """
+    按各层大小的比例分配 total 个样本（最大余数法），每层不超过其大小，
+    受大小限制分不下的名额补给仍有余量的层；样本数不少于层数时每个非空层至少分到一个。
+    total 超过各层大小之和时每层全部分配
+    """
+    available = {stratum: size for stratum, size in sizes.items() if size > 0}
+    population = sum(available.values())
+    total = min(total, population)
+    if total <= 0:
+        return {}
+
+    quotas = {stratum: total * size / population for stratum, size in available.items()}
+    allocation = {stratum: min(int(quota), available[stratum]) for stratum, quota in quotas.items()}
+    if total >= len(available):
+        for stratum in available:
+            allocation[stratum] = max(allocation[stratum], 1)
+
+    # 余数最大的层优先补足剩余名额（total 不超过总体大小，一定能补足）
+    shortfall = total - sum(allocation.values())
+    order = sorted(available, key=lambda s: quotas[s] - int(quotas[s]), reverse=True)
+    while shortfall > 0:
+        for stratum in order:
+            if shortfall <= 0:
+                break
+            if allocation[stratum] < available[stratum]:
+                allocation[stratum] += 1
+                shortfall -= 1
+
+    # 分配数超过 total（少量层被强制分到1个时可能出现）时从最大的层扣回
+    excess = sum(allocation.values()) - total
+    for stratum in sorted(allocation, key=lambda s: allocation[s], reverse=True):
+        if excess <= 0:
+            break
+        reducible = allocation[stratum] - 1
+        reduction = min(reducible, excess)
+        allocation[stratum] -= reduction
+        excess -= reduction
+
+    return {stratum: count for stratum, count in allocation.items() if count > 0}
+
+
+def stratified_bootstrap_ci(scores_by_stratum: Dict[int, List[float]],
+                            population_sizes: Dict[int, int],
+                            confidence: float = 0.95,
+                            n_resamples: int = BOOTSTRAP_RESAMPLES,
+                            seed: Optional[int] = None) -> Tuple[float, float, float]:
+    """
+    计算分层样本的总体平均分及 bootstrap 置信区间
+
+    总体均值按各层在总体中的占比加权；bootstrap 在每层内部有放回重抽样。
+    没有样本的层不参与加权。
+
+    Returns:
+        (mean, ci_low, ci_high)
+    """
+    strata = [stratum for stratum, scores in scores_by_stratum.items() if len(scores) > 0]
+    if not strata:
+        return float('nan'), float('nan'), float('nan')
+
+    weights = np.array([population_sizes.get(stratum, len(scores_by_stratum[stratum]))
+                        for stratum in strata], dtype=float)
+    weights /= weights.sum()
+
+    rng = np.random.default_rng(seed)
+    point = 0.0
+    resampled_means = np.zeros(n_resamples)
+    for weight, stratum in zip(weights, strata):
+        scores = np.asarray(scores_by_stratum[stratum], dtype=float)
+        point += weight * scores.mean()
+        samples = rng.choice(scores, size=(n_resamples, len(scores)), replace=True)
+        resampled_means += weight * samples.mean(axis=1)
+
+    alpha = (1 - confidence) / 2
+    ci_low, ci_high = np.quantile(resampled_means, [alpha, 1 - alpha])
+    return float(point), float(ci_low), float(ci_high)
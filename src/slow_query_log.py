@@ -0,0 +1,209 @@
+"""
+慢查询日志模块
+database.execute_query / get_paginated_query / execute_transaction 中耗时超过阈值的语句记入进程内的环形缓冲区，
+记录SQL、参数结构（只记录类型，不记录参数值）、耗时、调用方（database.py / app.py 中的函数）
+以及 EXPLAIN FORMAT=JSON 执行计划；可选同时写入 system_logs 表。
+
+本模块负责缓冲区、记录的组装和后台线程；EXPLAIN 和写入 system_logs 由 database 模块提交到后台线程，
+直接通过连接执行，不经过 execute_query，避免慢查询记录本身再被统计或记录，也不占用执行慢查询的请求线程。
+"""
+
+import inspect
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from query_stats import normalize_statement, statement_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 慢查询阈值（毫秒），0表示关闭
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '500'))
+# 环形缓冲区保留的慢查询条数
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', '200'))
+# 是否采集执行计划
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'True').lower() == 'true'
+# 是否同时写入 system_logs 表
+SLOW_QUERY_PERSIST = os.getenv('SLOW_QUERY_PERSIST', 'False').lower() == 'true'
+# 同一语句指纹在该时间（秒）内只采集一次执行计划，避免慢查询集中出现时反复 EXPLAIN
+EXPLAIN_INTERVAL_SECONDS = 60.0
+
+# 查找调用方时优先匹配的文件，以及需要跳过的数据库访问内部函数（按 文件名 + 函数名 匹配，其他模块的同名函数不跳过；
+# execute/executemany/_run 为 execute_transaction 传给回调的游标包装方法）
+CALLER_FILES = ('database.py', 'app.py')
+_INTERNAL_FUNCTIONS = {('database.py', name) for name in (
+    'execute_query', 'get_paginated_query', 'execute_transaction', '_log_slow_query',
+    'execute', 'executemany', '_run',
+)}
+
+# EXPLAIN 只支持这些语句
+_EXPLAINABLE_RE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)`?', re.IGNORECASE)
+
+
+def is_slow(duration_ms: float) -> bool:
+    return 0 < SLOW_QUERY_THRESHOLD_MS <= duration_ms
+
+
+def is_explainable(query: str) -> bool:
+    return SLOW_QUERY_EXPLAIN and bool(_EXPLAINABLE_RE.match(query))
+
+
+def main_table(query: str) -> Optional[str]:
+    """语句涉及的第一张表，用作 system_logs.table_name"""
+    match = _TABLE_RE.search(query)
+    return match.group(1)[:50] if match else None
+
+
+def params_shape(params: Any, many: bool = False) -> Any:
+    """参数结构：只保留类型（字符串附带长度），批量参数记录行数和第一行的结构"""
+    if params is None:
+        return None
+    if many:
+        rows = list(params) if not isinstance(params, (list, tuple)) else params
+        return {'rows': len(rows), 'row': params_shape(rows[0]) if rows else None}
+    if isinstance(params, dict):
+        return {key: params_shape(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [params_shape(value) for value in params]
+    if isinstance(params, str):
+        return f"str({len(params)})"
+    return type(params).__name__
+
+
+def find_caller() -> Optional[str]:
+    """
+    调用栈中最近的业务调用方：优先 database.py / app.py 中的函数，
+    否则为第一个不属于数据库访问内部的函数，格式为 文件:函数:行号
+    """
+    frame = inspect.currentframe()
+    fallback = None
+    try:
+        frame = frame.f_back if frame else None
+        while frame is not None:
+            filename = os.path.basename(frame.f_code.co_filename)
+            function = frame.f_code.co_name
+            if (filename, function) not in _INTERNAL_FUNCTIONS and filename != 'slow_query_log.py':
+                location = f"{filename}:{function}:{frame.f_lineno}"
+                if filename in CALLER_FILES:
+                    return location
+                if fallback is None:
+                    fallback = location
+            frame = frame.f_back
+        return fallback
+    finally:
+        del frame
+
+
+class SlowQueryLog:
+    """进程级慢查询环形缓冲区，所有会话共享"""
+
+    def __init__(self, size: int = SLOW_QUERY_LOG_SIZE):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+        self._explained_at: Dict[str, float] = {}
+
+    def should_explain(self, query: str) -> bool:
+        """同一指纹在 EXPLAIN_INTERVAL_SECONDS 内只采集一次执行计划"""
+        if not is_explainable(query):
+            return False
+        fingerprint = statement_fingerprint(query)
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(fingerprint)
+            if last is not None and now - last < EXPLAIN_INTERVAL_SECONDS:
+                return False
+            self._explained_at[fingerprint] = now
+            return True
+
+    def add(self, entry: Dict):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self) -> List[Dict]:
+        """最近的慢查询，最新的在前"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._explained_at.clear()
+
+
+def build_entry(query: str, params: Any, duration_ms: float, many: bool = False,
+                caller: Optional[str] = None, explain: Optional[Dict] = None,
+                detail: Optional[Dict] = None) -> Dict:
+    """组装一条慢查询记录"""
+    entry = {
+        'timestamp': time.time(),
+        'fingerprint': statement_fingerprint(query),
+        'statement': normalize_statement(query),
+        'sql': ' '.join(query.split()),
+        'params_shape': params_shape(params, many),
+        'duration_ms': round(duration_ms, 3),
+        'caller': caller,
+        'explain': explain,
+    }
+    if detail:
+        entry.update(detail)
+    return entry
+
+
+# 进程级慢查询日志
+slow_query_log = SlowQueryLog()
+
+
+# 后台任务队列：队列满时丢弃新任务（记录仍在缓冲区中，只是缺少执行计划），避免慢查询集中出现时堆积
+_background_tasks: queue.Queue = queue.Queue(maxsize=SLOW_QUERY_LOG_SIZE)
+_background_thread: Optional[threading.Thread] = None
+_background_lock = threading.Lock()
+
+
+def _run_background_tasks():
+    while True:
+        task = _background_tasks.get()
+        try:
+            task()
+        except Exception as e:
+            logger.error(f"慢查询后台任务失败: {e}")
+        finally:
+            _background_tasks.task_done()
+
+
+def submit_background(task: Callable[[], None]) -> bool:
+    """提交后台任务，首次提交时启动守护线程；队列已满时丢弃任务并返回False"""
+    global _background_thread
+    with _background_lock:
+        if _background_thread is None or not _background_thread.is_alive():
+            _background_thread = threading.Thread(target=_run_background_tasks, name='slow-query-log', daemon=True)
+            _background_thread.start()
+    try:
+        _background_tasks.put_nowait(task)
+        return True
+    except queue.Full:
+        logger.warning("慢查询后台任务队列已满，跳过本条记录的执行计划采集")
+        return False
+
+
+def wait_background(timeout: Optional[float] = None) -> bool:
+    """等待已提交的后台任务全部完成（测试和基准脚本使用），超时返回False"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while _background_tasks.unfinished_tasks:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def get_slow_queries() -> List[Dict]:
+    return slow_query_log.entries()
+
+
+def clear_slow_queries():
+    slow_query_log.clear()
@@ -0,0 +1,79 @@
+"""
+评估输入预处理模块
+问答对发送给模型前去除HTML标记、合并多余空白，并按token预算截断过长的问题和答案，
+减少长答案（代码块、HTML）带来的延迟和成本，避免超出模型上下文。
+"""
+
+import html
+import os
+import re
+from typing import Dict, Optional
+
+from token_counter import truncate_to_tokens
+
+# 问题/答案的token预算，0表示不截断
+MAX_QUESTION_TOKENS = int(os.getenv('EVAL_MAX_QUESTION_TOKENS', '1000'))
+MAX_ANSWER_TOKENS = int(os.getenv('EVAL_MAX_ANSWER_TOKENS', '4000'))
+
+TRUNCATION_MARKER = "\n……（内容过长，已截断）"
+
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_BLOCK_TAG_RE = re.compile(r'<\s*(br|/p|/div|/li|/h[1-6]|/pre|/tr|/blockquote)\b[^<>]*>', re.IGNORECASE)
+_PRE_TAG_RE = re.compile(r'<\s*pre\b[^<>]*>', re.IGNORECASE)
+_LIST_ITEM_RE = re.compile(r'<\s*li\b[^<>]*>', re.IGNORECASE)
+# 只匹配形如标签的片段，避免误删正文中的 a < b > c
+_TAG_RE = re.compile(r'</?[a-zA-Z][a-zA-Z0-9]*(\s[^<>]*)?/?>')
+_INLINE_SPACE_RE = re.compile(r'(?<=\S)[ \t ]+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """去除HTML标记和注释、还原实体，合并行内多余空白和连续空行（保留行首缩进）"""
+    if not text:
+        return ""
+
+    text = _COMMENT_RE.sub('', text)
+    text = _BLOCK_TAG_RE.sub('\n', text)
+    text = _PRE_TAG_RE.sub('\n', text)
+    text = _LIST_ITEM_RE.sub('\n- ', text)
+    text = _TAG_RE.sub('', text)
+    text = html.unescape(text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    lines = [_INLINE_SPACE_RE.sub(' ', line).rstrip() for line in text.split('\n')]
+    return _BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def preprocess_text(text: Optional[str], max_tokens: int) -> Dict:
+    """
+    规范化并按token预算截断单段文本
+
+    Returns:
+        {'text', 'truncated'}
+    """
+    truncated_text, truncated = truncate_to_tokens(normalize_text(text), max_tokens)
+    return {
+        'text': truncated_text + TRUNCATION_MARKER if truncated else truncated_text,
+        'truncated': truncated
+    }
+
+
+def preprocess_pair(question: Optional[str], answer: Optional[str],
+                    max_question_tokens: int = MAX_QUESTION_TOKENS,
+                    max_answer_tokens: int = MAX_ANSWER_TOKENS) -> Dict:
+    """
+    预处理一个问答对
+
+    Returns:
+        {'question', 'answer', 'truncation': {'question_truncated', 'answer_truncated'}}
+    """
+    processed_question = preprocess_text(question, max_question_tokens)
+    processed_answer = preprocess_text(answer, max_answer_tokens)
+    return {
+        'question': processed_question['text'],
+        'answer': processed_answer['text'],
+        'truncation': {
+            'question_truncated': processed_question['truncated'],
+            'answer_truncated': processed_answer['truncated']
+        }
+    }
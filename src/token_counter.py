@@ -0,0 +1,71 @@
+"""
+Token计数模块
+服务商响应中没有返回用量信息时（如本地替身服务商），用本地分词器估算token数。
+安装了 tiktoken 时使用 cl100k_base 编码，否则按字符粗略估算。
+"""
+
+from typing import Optional, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+_encoding = None
+# 编码加载失败后不再重试，避免离线环境下每次计数都尝试联网下载
+_encoding_failed = False
+
+
+def _get_encoding():
+    """延迟加载 tiktoken 编码，加载失败时返回None"""
+    global _encoding, _encoding_failed
+    if _encoding is None and TIKTOKEN_AVAILABLE and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # 编码文件需要联网下载，离线环境下回退为字符估算
+            _encoding_failed = True
+            return None
+    return _encoding
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """估算文本的token数"""
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    # 字符估算：中日韩字符约1个token，其余字符约4个一个token
+    cjk_count = sum(1 for c in text if '⺀' <= c <= '鿿' or '豈' <= c <= '﫿')
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> Tuple[str, bool]:
+    """
+    将文本截断到不超过 max_tokens 个token（保留开头部分）
+
+    Returns:
+        (截断后的文本, 是否发生了截断)
+    """
+    text = text or ""
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text, False
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        # 按token边界截断可能切开多字节字符，去掉解码出的替换字符
+        return encoding.decode(encoding.encode(text)[:max_tokens]).rstrip('\ufffd'), True
+
+    # 字符估算时二分查找满足预算的最长前缀
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low], True
@@ -0,0 +1,9 @@
+"""
+单元测试公共配置
+被测模块位于 src/ 下并以顶层模块方式互相导入，这里将 src 加入导入路径。
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
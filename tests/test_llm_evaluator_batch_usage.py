@@ -0,0 +1,87 @@
+"""
+llm_evaluator 批量评估用量分摊单元测试：整批请求的token用量分摊到各问答对，总和与整批用量一致
+"""
+
+import json
+
+import pytest
+
+# llm_evaluator 依赖 langchain 和数据库驱动，未安装时跳过本文件
+llm_evaluator = pytest.importorskip('llm_evaluator')
+
+from constants import EVALUATION_DIMENSIONS
+
+MODEL = 'GPT-4'
+BATCH_USAGE = {'input_tokens': 1000, 'output_tokens': 301}
+SINGLE_USAGE = {'input_tokens': 200, 'output_tokens': 50}
+
+
+class FakeResponse:
+    def __init__(self, content, usage_metadata):
+        self.content = content
+        self.usage_metadata = usage_metadata
+        self.response_metadata = {}
+
+
+class FakeLLM:
+    """批量请求只返回 returned_ids 中问答对的结果，单独请求返回一个完整结果"""
+
+    def __init__(self, returned_ids):
+        self.returned_ids = returned_ids
+
+    def invoke(self, messages):
+        scores = {dim: 80 for dim in EVALUATION_DIMENSIONS}
+        if 'pair_id=' in messages[-1].content:
+            # 第一个问答对的评估理由更长，输出token按结果长度分摊时占比更大
+            items = [{'pair_id': pair_id, **scores, 'comments': '理由' * (20 if index == 0 else 1)}
+                     for index, pair_id in enumerate(self.returned_ids)]
+            return FakeResponse(json.dumps(items, ensure_ascii=False), BATCH_USAGE)
+        return FakeResponse(json.dumps(scores), SINGLE_USAGE)
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    evaluator = llm_evaluator.LLMEvaluator()
+    monkeypatch.setattr(evaluator, '_record_parse_outcome', lambda *args: None)
+    return evaluator
+
+
+def run_batch(evaluator, monkeypatch, returned_ids):
+    monkeypatch.setattr(evaluator, 'init_model', lambda *args: FakeLLM(returned_ids))
+    pairs = [{'pair_id': pair_id, 'question': f'问题{pair_id}' * pair_id, 'answer': f'答案{pair_id}'}
+             for pair_id in (1, 2, 3)]
+    return evaluator._evaluate_prepared_pairs_batch(MODEL, pairs, '标准问答评估', 0.3, False)
+
+
+def test_split_total_sums_to_total():
+    assert llm_evaluator.LLMEvaluator._split_total(10, [1, 1, 1]) == [4, 3, 3]
+    assert llm_evaluator.LLMEvaluator._split_total(7, [0, 0]) == [4, 3]
+    assert llm_evaluator.LLMEvaluator._split_total(100, [3, 1, 0]) == [75, 25, 0]
+    assert llm_evaluator.LLMEvaluator._split_total(5, []) == []
+
+
+def test_batch_usage_is_split_across_pairs(evaluator, monkeypatch):
+    results = run_batch(evaluator, monkeypatch, [1, 2, 3])
+    usages = [results[pair_id]['usage'] for pair_id in (1, 2, 3)]
+
+    assert sum(usage['prompt_tokens'] for usage in usages) == BATCH_USAGE['input_tokens']
+    assert sum(usage['completion_tokens'] for usage in usages) == BATCH_USAGE['output_tokens']
+    assert [usage['requests'] for usage in usages] == [1, 0, 0]
+    # 问答对越长分摊的输入token越多，结果越长分摊的输出token越多
+    assert usages[0]['prompt_tokens'] < usages[2]['prompt_tokens']
+    assert usages[0]['completion_tokens'] > usages[1]['completion_tokens']
+    assert all(usage['prompt_tokens'] > 0 for usage in usages)
+
+
+def test_fallback_pair_keeps_its_share_of_batch_usage(evaluator, monkeypatch):
+    results = run_batch(evaluator, monkeypatch, [1, 2])
+    usages = [results[pair_id]['usage'] for pair_id in (1, 2, 3)]
+
+    # 单独回退评估的问答对：批量请求分摊的输入token加上单独请求的用量
+    assert (sum(usage['prompt_tokens'] for usage in usages)
+            == BATCH_USAGE['input_tokens'] + SINGLE_USAGE['input_tokens'])
+    assert (sum(usage['completion_tokens'] for usage in usages)
+            == BATCH_USAGE['output_tokens'] + SINGLE_USAGE['output_tokens'])
+    assert usages[2]['completion_tokens'] == SINGLE_USAGE['output_tokens']
+    assert usages[2]['prompt_tokens'] > SINGLE_USAGE['input_tokens']
+    assert sum(usage['requests'] for usage in usages) == 2
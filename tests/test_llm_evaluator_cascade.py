@@ -0,0 +1,86 @@
+"""
+llm_evaluator 级联评估单元测试：增量模式的反连接条件和两层模型的并发评估
+"""
+
+import threading
+
+import pytest
+
+# llm_evaluator 依赖 langchain 和数据库驱动，未安装时跳过本文件
+llm_evaluator = pytest.importorskip('llm_evaluator')
+
+CHEAP, EXPENSIVE = 'GPT-3.5-Turbo', 'GPT-4'
+LLM_TYPE_IDS = {CHEAP: 11, EXPENSIVE: 22}
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    monkeypatch.setattr(llm_evaluator, 'get_llm_type',
+                        lambda name: {'llm_type_id': LLM_TYPE_IDS[name]} if name in LLM_TYPE_IDS else None)
+    return llm_evaluator.LLMEvaluator()
+
+
+def anti_join(built):
+    _, conditions, params = built
+    return ' '.join(' '.join(conditions).split()), params
+
+
+def test_incremental_anti_join_single_model(evaluator):
+    condition, params = anti_join(evaluator._build_pairs_query(incremental_model=EXPENSIVE))
+    assert 'AND (le.llm_type_id = %s) AND' in condition
+    assert 'cascade_tier' not in condition
+    assert params == [22]
+
+
+def test_cascade_anti_join_only_matches_cheap_tier_rows(evaluator):
+    condition, params = anti_join(evaluator._build_pairs_query(incremental_model=EXPENSIVE,
+                                                               cascade_cheap_model=CHEAP))
+    # 低成本模型单独运行（cascade_tier 为空）或被升级的评估不能让问答对被跳过
+    assert 'AND (le.llm_type_id = %s OR (le.llm_type_id = %s AND le.cascade_tier = %s)) AND' in condition
+    assert params == [22, 11, llm_evaluator.CASCADE_TIER_CHEAP]
+
+
+def test_cascade_anti_join_without_expensive_llm_type(evaluator, monkeypatch):
+    monkeypatch.delitem(LLM_TYPE_IDS, EXPENSIVE)
+    condition, params = anti_join(evaluator._build_pairs_query(incremental_model=EXPENSIVE,
+                                                               cascade_cheap_model=CHEAP))
+    assert 'AND ((le.llm_type_id = %s AND le.cascade_tier = %s)) AND' in condition
+    assert params == [11, llm_evaluator.CASCADE_TIER_CHEAP]
+
+
+def test_cascade_evaluates_tiers_concurrently_with_limiters(evaluator, monkeypatch):
+    pairs = [{'pair_id': i, 'ans_id': 100 + i, 'question': f'q{i}', 'answer': f'a{i}'} for i in range(1, 7)]
+    # 奇数问答对落在不确定区间需要升级
+    cheap_scores = {f'q{i}': 70.0 if i % 2 else 95.0 for i in range(1, 7)}
+    acquired = []
+    threads = set()
+    saved = []
+
+    class CountingLimiter:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        def acquire(self):
+            acquired.append(self.model_name)
+
+    def fake_evaluate_pair(model_name, question, answer, *args):
+        threads.add(threading.current_thread().name)
+        score = cheap_scores[question] if model_name == CHEAP else 88.0
+        return {'success': True, 'evaluation': {'total_score': score}, 'usage': None}
+
+    monkeypatch.setattr(llm_evaluator, 'get_rate_limiter', lambda model_name, rpm: CountingLimiter(model_name))
+    monkeypatch.setattr(evaluator, 'evaluate_pair', fake_evaluate_pair)
+    monkeypatch.setattr(evaluator, 'iter_standard_pairs', lambda *args, **kwargs: iter(pairs))
+    monkeypatch.setattr(evaluator, 'save_evaluation_results', lambda records: saved.extend(records) or True)
+    monkeypatch.setattr(evaluator, '_update_dead_letters', lambda *args: None)
+
+    result = evaluator.cascade_evaluate(CHEAP, EXPENSIVE)
+
+    assert result['success_count'] == 6
+    assert result['escalations'] == {'uncertain': 3, 'failed': 0}
+    assert sorted(acquired) == sorted([CHEAP] * 6 + [EXPENSIVE] * 3)
+    assert all(name.startswith('cascade-') for name in threads)
+    assert [(record['pair_id'], record['model_name'], record['cascade_tier']) for record in saved] == [
+        (i, EXPENSIVE, llm_evaluator.CASCADE_TIER_EXPENSIVE) if i % 2 else (i, CHEAP, llm_evaluator.CASCADE_TIER_CHEAP)
+        for i in range(1, 7)
+    ]
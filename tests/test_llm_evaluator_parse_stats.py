@@ -0,0 +1,58 @@
+"""
+llm_evaluator 输出解析统计单元测试：累计次数写入汇总表，读取时合并尚未写入的次数
+"""
+
+import pytest
+
+# llm_evaluator 依赖 langchain 和数据库驱动，未安装时跳过本文件
+llm_evaluator = pytest.importorskip('llm_evaluator')
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    evaluator = llm_evaluator.LLMEvaluator()
+    monkeypatch.setattr(evaluator, '_get_or_create_llm_type', lambda model_name: {'GPT-4': 7}[model_name])
+    return evaluator
+
+
+def test_flush_writes_counts_per_llm_type(evaluator, monkeypatch):
+    written = []
+    monkeypatch.setattr(llm_evaluator, 'add_parse_outcome_counts',
+                        lambda counts: written.append(counts) or (True, "操作成功"))
+    for method in ('structured', 'structured', 'failed'):
+        evaluator._record_parse_outcome('GPT-4', method)
+
+    evaluator.flush_parse_statistics()
+    assert written == [{7: {'structured': 2, 'text': 0, 'failed': 1}}]
+    assert evaluator.pending_parse_stats == {}
+
+
+def test_flush_keeps_counts_when_write_fails(evaluator, monkeypatch):
+    monkeypatch.setattr(llm_evaluator, 'add_parse_outcome_counts', lambda counts: (False, "连接失败"))
+    evaluator._record_parse_outcome('GPT-4', 'text')
+    evaluator.flush_parse_statistics()
+    evaluator._record_parse_outcome('GPT-4', 'text')
+    assert evaluator.pending_parse_stats == {'GPT-4': {'structured': 0, 'text': 2, 'failed': 0}}
+
+
+def test_flushes_when_pending_reaches_threshold(evaluator, monkeypatch):
+    written = []
+    monkeypatch.setattr(llm_evaluator, 'PARSE_STATS_FLUSH_SIZE', 3)
+    monkeypatch.setattr(llm_evaluator, 'add_parse_outcome_counts',
+                        lambda counts: written.append(counts) or (True, "操作成功"))
+    for _ in range(4):
+        evaluator._record_parse_outcome('GPT-4', 'structured')
+    assert written == [{7: {'structured': 3, 'text': 0, 'failed': 0}}]
+    assert evaluator.pending_parse_stats == {'GPT-4': {'structured': 1, 'text': 0, 'failed': 0}}
+
+
+def test_statistics_merge_stored_and_pending_counts(evaluator, monkeypatch):
+    monkeypatch.setattr(llm_evaluator, 'execute_query',
+                        lambda query, params=None, fetch=False: (True, [('gpt-4', 5, 2, 1)]))
+    evaluator._record_parse_outcome('GPT-4', 'failed')
+    evaluator._record_parse_outcome('Claude-3-Opus', 'text')
+
+    statistics = {entry['model_name']: entry for entry in evaluator.get_parse_statistics()}
+    assert statistics['gpt-4'] == {'model_name': 'gpt-4', 'total': 9, 'structured': 5, 'text': 2,
+                                   'failed': 2, 'failure_rate': pytest.approx(2 / 9)}
+    assert statistics['Claude-3-Opus']['total'] == 1
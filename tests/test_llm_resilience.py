@@ -0,0 +1,215 @@
+"""
+llm_resilience 单元测试：熔断器状态转换、Retry-After 解析与退避下限、重试流程和限速器
+"""
+
+from email.utils import formatdate
+
+import pytest
+
+import llm_resilience
+from llm_resilience import (CircuitBreaker, CircuitOpenError, RateLimiter, call_with_resilience,
+                            get_backoff_delay, get_retry_after, is_retryable_error)
+
+
+class FakeClock:
+    """可手动推进的 monotonic 时钟，sleep 只推进时间并记录等待时长"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_resilience.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(llm_resilience.time, 'sleep', fake.sleep)
+    return fake
+
+
+@pytest.fixture(autouse=True)
+def isolated_breakers(monkeypatch):
+    monkeypatch.setattr(llm_resilience, '_breakers', {})
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow_request()
+
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_breaker_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+
+    clock.now += 9.9
+    assert breaker.state == 'open'
+    clock.now += 0.1
+    assert breaker.state == 'half_open'
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_breaker_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow_request()
+
+
+def test_breaker_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow_request()
+    # 重新熔断后需要再等待一个完整的冷却时间
+    clock.now += 9
+    assert breaker.state == 'open'
+    clock.now += 1
+    assert breaker.state == 'half_open'
+
+
+def test_retryable_errors():
+    assert is_retryable_error(FakeAPIError(429))
+    assert is_retryable_error(FakeAPIError(529))
+    assert not is_retryable_error(FakeAPIError(400))
+    assert not is_retryable_error(FakeAPIError(401))
+
+    class APITimeoutError(Exception):
+        pass
+
+    assert is_retryable_error(APITimeoutError())
+    assert not is_retryable_error(ValueError())
+
+
+def test_retry_after_headers():
+    assert get_retry_after(FakeAPIError(429, {'retry-after': '7'})) == 7.0
+    assert get_retry_after(FakeAPIError(429, {'retry-after-ms': '1500', 'retry-after': '7'})) == 1.5
+    assert get_retry_after(FakeAPIError(429, {'retry-after': 'soon'})) is None
+    assert get_retry_after(FakeAPIError(429)) is None
+    assert get_retry_after(ValueError()) is None
+
+
+def test_retry_after_http_date():
+    delay = get_retry_after(FakeAPIError(503, {'retry-after': formatdate(usegmt=True)}))
+    assert delay is not None and 0.0 <= delay <= 1.0
+
+
+def test_backoff_delay_uses_retry_after_as_lower_bound(monkeypatch):
+    # 抖动取到0时，等待时间仍不小于 Retry-After
+    monkeypatch.setattr(llm_resilience.random, 'uniform', lambda low, high: low)
+    assert get_backoff_delay(0) == 0.0
+    assert get_backoff_delay(0, retry_after=5.0) == 5.0
+    for attempt in range(6):
+        assert get_backoff_delay(attempt, retry_after=12.5) >= 12.5
+
+
+def test_backoff_delay_is_capped(monkeypatch):
+    monkeypatch.setattr(llm_resilience.random, 'uniform', lambda low, high: high)
+    assert get_backoff_delay(20) == llm_resilience.MAX_DELAY_SECONDS
+    assert get_backoff_delay(0, retry_after=3600) == llm_resilience.MAX_DELAY_SECONDS
+
+
+def test_call_retries_transient_errors(clock):
+    outcomes = [FakeAPIError(429, {'retry-after': '3'}), FakeAPIError(503), 'ok']
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_resilience('test', flaky) == 'ok'
+    assert len(clock.sleeps) == 2
+    assert clock.sleeps[0] >= 3.0
+    assert llm_resilience.get_circuit_breaker('test').state == 'closed'
+
+
+def test_call_does_not_retry_client_errors(clock):
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise FakeAPIError(400)
+
+    with pytest.raises(FakeAPIError):
+        call_with_resilience('test', bad_request)
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_call_raises_when_circuit_open(clock):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise FakeAPIError(503)
+
+    with pytest.raises(FakeAPIError):
+        call_with_resilience('test', failing, max_retries=llm_resilience.FAILURE_THRESHOLD - 1)
+    assert llm_resilience.get_circuit_breaker('test').state == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience('test', failing)
+    assert len(calls) == llm_resilience.FAILURE_THRESHOLD
+
+
+def test_rate_limiter_spaces_requests(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_rate_limiter_disabled():
+    limiter = RateLimiter(requests_per_minute=0)
+    assert limiter.interval == 0.0
+    limiter.acquire()
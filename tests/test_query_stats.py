@@ -0,0 +1,68 @@
+"""
+query_stats 单元测试：语句规范化、指纹和注册表汇总
+"""
+
+from query_stats import QueryStatsRegistry, normalize_statement, statement_fingerprint
+
+
+def test_normalize_literals_and_placeholders():
+    assert (normalize_statement("SELECT * FROM t WHERE a = 'x' AND b = 42 AND c = %s")
+            == "SELECT * FROM t WHERE a = ? AND b = ? AND c = ?")
+    assert normalize_statement("SELECT %(name)s, 3.14") == "SELECT ?, ?"
+
+
+def test_normalize_comments_and_whitespace():
+    query = """
+        SELECT a  -- 注释
+        FROM t /* 多行
+        注释 */ WHERE id = 1
+    """
+    assert normalize_statement(query) == "SELECT a FROM t WHERE id = ?"
+
+
+def test_normalize_collapses_in_lists():
+    assert normalize_statement("SELECT 1 FROM t WHERE id IN (1, 2, 3)") == "SELECT ? FROM t WHERE id IN (...)"
+    assert (normalize_statement("DELETE FROM t WHERE id IN (%s,%s)")
+            == normalize_statement("DELETE FROM t WHERE id in ( %s )"))
+
+
+def test_normalize_collapses_multi_row_values():
+    single = normalize_statement("INSERT INTO t (a, b) VALUES (%s, %s)")
+    multi = normalize_statement("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (1, 'x')")
+    assert single == multi == "INSERT INTO t (a, b) VALUES (?, ?)"
+
+
+def test_fingerprint_ignores_values():
+    assert (statement_fingerprint("SELECT * FROM t WHERE id IN (1, 2)")
+            == statement_fingerprint("SELECT * FROM t WHERE id IN (7, 8, 9, 10)"))
+    assert statement_fingerprint("SELECT * FROM t") != statement_fingerprint("SELECT * FROM u")
+
+
+def test_registry_aggregates_by_fingerprint():
+    registry = QueryStatsRegistry(sample_size=10)
+    registry.record("SELECT * FROM t WHERE id = 1", 10.0, rows=1, acquire_ms=1.0)
+    registry.record("SELECT * FROM t WHERE id = 2", 30.0, rows=3, acquire_ms=3.0)
+    registry.record("UPDATE t SET a = 1", 5.0, error=True)
+
+    stats = registry.snapshot()
+    assert [entry['statement'] for entry in stats] == ["SELECT * FROM t WHERE id = ?", "UPDATE t SET a = ?"]
+    select = stats[0]
+    assert select['count'] == 2
+    assert select['avg_ms'] == 20.0
+    assert select['max_ms'] == 30.0
+    assert select['avg_rows'] == 2.0
+    assert select['avg_acquire_ms'] == 2.0
+    assert stats[1]['errors'] == 1
+
+
+def test_registry_overflow_and_reset():
+    registry = QueryStatsRegistry(max_fingerprints=2)
+    for table in ('a', 'b', 'c', 'd'):
+        registry.record(f"SELECT * FROM {table}", 1.0)
+
+    stats = registry.snapshot()
+    assert len(stats) == 3
+    assert {entry['count'] for entry in stats if entry['statement'] == '<其他语句>'} == {2}
+
+    registry.reset()
+    assert registry.snapshot() == []
@@ -0,0 +1,75 @@
+"""
+sampling 单元测试：按比例分配样本数和分层 bootstrap 置信区间
+"""
+
+import math
+
+import pytest
+
+# sampling 依赖 numpy，未安装时跳过本文件
+pytest.importorskip('numpy')
+
+from sampling import allocate_proportional, stratified_bootstrap_ci
+
+
+@pytest.mark.parametrize('sizes, total', [
+    ({1: 100, 2: 50, 3: 10}, 32),
+    ({1: 7, 2: 3}, 5),
+    ({1: 1000, 2: 1, 3: 1}, 10),
+    ({1: 3, 2: 3, 3: 3}, 4),
+])
+def test_allocation_sums_to_total_and_respects_sizes(sizes, total):
+    allocation = allocate_proportional(sizes, total)
+    assert sum(allocation.values()) == total
+    assert all(0 < count <= sizes[stratum] for stratum, count in allocation.items())
+
+
+def test_allocation_clamps_to_stratum_sizes():
+    assert allocate_proportional({1: 5}, 10) == {1: 5}
+    assert allocate_proportional({1: 2, 2: 3}, 100) == {1: 2, 2: 3}
+
+
+def test_allocation_fills_strata_with_room():
+    # 小层全部抽完后，剩余名额全部落在仍有余量的层上
+    assert allocate_proportional({1: 2, 2: 3, 3: 100}, 104) == {1: 2, 2: 3, 3: 99}
+    assert allocate_proportional({1: 1, 2: 1000}, 500) == {1: 1, 2: 499}
+
+
+def test_allocation_is_proportional():
+    assert allocate_proportional({1: 600, 2: 300, 3: 100}, 10) == {1: 6, 2: 3, 3: 1}
+
+
+def test_allocation_gives_small_strata_at_least_one():
+    allocation = allocate_proportional({1: 1000, 2: 2, 3: 1}, 10)
+    assert allocation[2] >= 1 and allocation[3] >= 1
+
+
+def test_allocation_skips_empty_strata():
+    assert allocate_proportional({1: 10, 2: 0}, 3) == {1: 3}
+    assert allocate_proportional({1: 0}, 3) == {}
+    assert allocate_proportional({1: 10}, 0) == {}
+
+
+def test_bootstrap_ci_contains_weighted_mean():
+    scores = {1: [60, 62, 64, 66, 68], 2: [90, 91, 92, 93, 94]}
+    mean, low, high = stratified_bootstrap_ci(scores, {1: 300, 2: 100}, seed=7)
+    assert mean == pytest.approx(0.75 * 64 + 0.25 * 92)
+    assert low <= mean <= high
+
+
+def test_bootstrap_ci_is_deterministic_with_seed():
+    scores = {1: [1.0, 5.0, 9.0], 2: [2.0, 4.0]}
+    sizes = {1: 10, 2: 10}
+    assert (stratified_bootstrap_ci(scores, sizes, seed=1)
+            == stratified_bootstrap_ci(scores, sizes, seed=1))
+
+
+def test_bootstrap_ci_constant_scores_is_degenerate():
+    mean, low, high = stratified_bootstrap_ci({1: [80, 80, 80]}, {1: 50}, seed=0)
+    assert mean == low == high == pytest.approx(80)
+
+
+def test_bootstrap_ci_ignores_empty_strata():
+    mean, _, _ = stratified_bootstrap_ci({1: [70, 70], 2: []}, {1: 10, 2: 90}, seed=0)
+    assert mean == pytest.approx(70)
+    assert all(math.isnan(value) for value in stratified_bootstrap_ci({1: []}, {1: 10}))
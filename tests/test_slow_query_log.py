@@ -0,0 +1,41 @@
+"""
+slow_query_log 单元测试：调用方查找、参数结构和后台任务
+"""
+
+import threading
+
+from slow_query_log import find_caller, params_shape, submit_background, wait_background
+
+
+def execute():
+    # 与 database.py 游标包装方法同名的业务函数不应被当作内部函数跳过
+    return find_caller()
+
+
+def test_find_caller_matches_module_and_function():
+    assert execute().startswith('test_slow_query_log.py:execute:')
+
+
+def test_params_shape_hides_values():
+    assert params_shape((1, 'abc', 2.5)) == ['int', 'str(3)', 'float']
+    assert params_shape({'name': 'x'}) == {'name': 'str(1)'}
+    assert params_shape([(1, 'a'), (2, 'b')], many=True) == {'rows': 2, 'row': ['int', 'str(1)']}
+
+
+def test_submit_background_runs_task_off_thread():
+    threads = []
+    assert submit_background(lambda: threads.append(threading.current_thread()))
+    assert wait_background(5)
+    assert threads and threads[0] is not threading.current_thread()
+
+
+def test_background_task_errors_do_not_stop_worker():
+    done = []
+
+    def failing():
+        raise RuntimeError("boom")
+
+    assert submit_background(failing)
+    assert submit_background(lambda: done.append(True))
+    assert wait_background(5)
+    assert done == [True]
@@ -0,0 +1,68 @@
+"""
+text_preprocessor / token_counter 单元测试：HTML规范化和按token预算截断
+"""
+
+import pytest
+
+import token_counter
+from text_preprocessor import TRUNCATION_MARKER, normalize_text, preprocess_pair
+from token_counter import count_tokens, truncate_to_tokens
+
+
+@pytest.fixture
+def char_estimate(monkeypatch):
+    """使用字符估算，结果不依赖是否安装了 tiktoken"""
+    monkeypatch.setattr(token_counter, '_get_encoding', lambda: None)
+
+
+def test_normalize_strips_html_and_entities():
+    text = "<p>Hello&nbsp;<b>world</b></p><!-- note --><div>a &lt; b</div>"
+    assert normalize_text(text) == "Hello world\na < b"
+
+
+def test_normalize_list_items_and_blank_lines():
+    text = "<ul><li>one</li><li>two</li></ul>\r\n\r\n\r\n\r\nend"
+    # 连续空行最多保留一行
+    assert normalize_text(text) == "- one\n\n- two\n\nend"
+
+
+def test_normalize_keeps_indentation_and_collapses_inline_space():
+    assert normalize_text("    code   line  \n  x") == "code line\n  x"
+    assert normalize_text(None) == ""
+
+
+def test_count_tokens_char_estimate(char_estimate):
+    assert count_tokens("") == 0
+    assert count_tokens("数据库") == 3
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2
+
+
+def test_truncate_within_budget_is_unchanged(char_estimate):
+    assert truncate_to_tokens("短文本", 10) == ("短文本", False)
+    assert truncate_to_tokens("任意长度" * 100, 0) == ("任意长度" * 100, False)
+    assert truncate_to_tokens(None, 5) == ("", False)
+
+
+def test_truncate_keeps_longest_prefix_within_budget(char_estimate):
+    text = "数据库" * 20 + "x" * 40
+    truncated, was_truncated = truncate_to_tokens(text, 50)
+    assert was_truncated
+    assert text.startswith(truncated)
+    assert count_tokens(truncated) <= 50
+    assert count_tokens(text[:len(truncated) + 1]) > 50
+
+
+def test_truncate_with_available_encoding():
+    # 安装了 tiktoken 时按token边界截断，否则为字符估算，两种情况都不超过预算
+    text = "evaluation pipeline " * 200
+    truncated, was_truncated = truncate_to_tokens(text, 30)
+    assert was_truncated
+    assert count_tokens(truncated) <= 30
+
+
+def test_preprocess_pair_reports_truncation(char_estimate):
+    result = preprocess_pair("<p>问题</p>", "答" * 100, max_question_tokens=10, max_answer_tokens=20)
+    assert result['question'] == "问题"
+    assert result['answer'] == "答" * 20 + TRUNCATION_MARKER
+    assert result['truncation'] == {'question_truncated': False, 'answer_truncated': True}